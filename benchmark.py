@@ -0,0 +1,367 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+# Roda sem servidor gráfico; precisa ser definido antes de importar o Qt
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import Qt, QEvent, QByteArray, QT_VERSION_STR
+
+import main
+
+SIZES = {'1KB': 1024, '1MB': 1024 * 1024, '50MB': 50 * 1024 * 1024}
+ENCODINGS = {
+    'utf-8': 'linha com acentuação: ação, coração, pão — “aspas” ✓ {n}\n',
+    'latin-1': 'linha com acentuação: ação, coração, pão, señor, über {n}\n',
+    'cp1252': 'linha com acentuação: ação, coração, € 10, “aspas” {n}\n',
+}
+
+SYNTAX_FIXTURES = {
+    '.py': ('python', lambda n: ''.join(f'def func_{i}(a, b):\n    return a * {i} + b\n\n' for i in range(n))),
+    '.cpp': ('g++', lambda n: '#include <cstdio>\n' + ''.join(f'int func_{i}(int a) {{ return a * {i}; }}\n' for i in range(n)) +
+             'int main() { std::printf("%d", func_0(1)); return 0; }\n'),
+    '.java': ('javac', lambda n: 'public class Main {\n' + ''.join(f'    static int func{i}(int a) {{ return a * {i}; }}\n' for i in range(n)) +
+              '    public static void main(String[] args) { System.out.println(func0(1)); }\n}\n'),
+    '.js': ('esprima', lambda n: ''.join(f'function func{i}(a, b) {{ return a * {i} + b; }}\n' for i in range(n))),
+    '.rb': ('ruby', lambda n: ''.join(f'def func_{i}(a, b)\n  a * {i} + b\nend\n' for i in range(n))),
+}
+
+
+class ChunkedOutput:
+    # Imita o QProcess para medir a leitura da saída sem depender de um processo real
+    def __init__(self, chunk, count):
+        self.chunk = QByteArray(chunk)
+        self.remaining = count
+
+    def readAllStandardOutput(self):
+        if self.remaining <= 0:
+            return QByteArray()
+        self.remaining -= 1
+        return self.chunk
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'min_s': min(timings), 'median_s': statistics.median(timings), 'max_s': max(timings), 'runs': repeat}
+
+
+def toolAvailable(tool):
+    if tool == 'esprima':
+        try:
+            import esprima  # noqa: F401
+            return True
+        except ImportError:
+            return False
+    return shutil.which(tool) is not None
+
+
+def writeFixture(path, encoding, size):
+    template = ENCODINGS[encoding]
+    with open(path, 'w', encoding=encoding, newline='\n') as f:
+        written = 0
+        n = 0
+        while written < size:
+            line = template.format(n=n)
+            f.write(line)
+            written += len(line.encode(encoding))
+            n += 1
+
+
+def waitFor(app, condition, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return condition()
+
+
+def benchStartup(app, repeat):
+    def construct():
+        window = main.MainWindow()
+        app.processEvents()
+        window.close()
+        window.deleteLater()
+        # processEvents não entrega o DeferredDelete: sem isto o coletor destruiria a janela em outra thread
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+    return measure(construct, repeat)
+
+
+def benchLoadFile(app, window, workdir, sizes, repeat):
+    results = {}
+    for label in sizes:
+        for encoding in ENCODINGS:
+            path = os.path.join(workdir, f'load_{label}_{encoding}.txt')
+            writeFixture(path, encoding, SIZES[label])
+            runs = 1 if SIZES[label] > 10 * 1024 * 1024 else repeat
+            stats = measure(lambda: window.loadFile(path), runs)
+            stats['bytes'] = os.path.getsize(path)
+            results[f'{label}/{encoding}'] = stats
+            os.remove(path)
+    return results
+
+
+def benchCheckSyntax(app, window, workdir, repeat, lines):
+    results = {}
+    for ext, (tool, generator) in SYNTAX_FIXTURES.items():
+        if not toolAvailable(tool):
+            results[ext] = {'skipped': f'{tool} not available'}
+            continue
+        path = os.path.join(workdir, f'Main{ext}')
+        code = generator(lines)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        window.currentFile = path
+        window.editor.setText(code)
+        stats = measure(window.checkSyntax, repeat)
+        stats['problems'] = len(window.problemsWidget.toPlainText().splitlines())
+        results[ext] = stats
+    window.currentFile = ''
+    return results
+
+
+def benchJavaScriptBackends(repeat, functions):
+    # Compara o serviço persistente em Node com o esprima em Python puro sobre um "bundle" grande
+    bundle = ''.join(f'function func{i}(a, b) {{ var items = [a, b, {i}]; return items.map(function (x) {{ return x * 2; }}); }}\n'
+                     for i in range(functions))
+    broken = bundle + 'var = ;\n'
+    results = {'bytes': len(bundle)}
+    for backend in ['node', 'esprima']:
+        checker = main.JavaScriptChecker(backend)
+        if backend == 'node' and not checker.nodeAvailable:
+            results[backend] = {'skipped': 'node not available'}
+            continue
+        if backend == 'esprima' and checker.esprimaModule() is None:
+            results[backend] = {'skipped': 'esprima not available'}
+            continue
+        checker.errors('var warmup = 1;')  # inicia o processo do Node fora da medição
+        stats = measure(lambda: checker.errors(bundle), repeat)
+        stats['errors_found'] = len(checker.errors(broken))
+        results[backend] = stats
+        checker.close()
+    return results
+
+
+def benchRunOutput(app, workdir, repeat, chunks):
+    # Caminho da saída das execuções: RunSession.readStdout grava no log indexado e na aba da execução
+    chunk = ''.join(f'output line {i} com acentuação\n' for i in range(200)).encode('utf-8')
+    session = main.RunSession('bench', 'bench', [], workdir)
+    logs = os.path.join(workdir, 'runs')
+
+    def feed():
+        session.output.clear()
+        session.stdoutDecoder = main.StreamDecoder()
+        session.log = main.RunLog('bench', 'bench', logs)
+        session.process = ChunkedOutput(chunk, chunks)
+        for _ in range(chunks):
+            session.readStdout()
+        session.log.close('Finished')
+
+    stats = measure(feed, repeat)
+    total = len(chunk) * chunks
+    stats['bytes'] = total
+    stats['mb_per_s'] = total / stats['median_s'] / (1024 * 1024)
+    stats['log_lines'] = session.log.lines
+    session.process = None
+    session.output.deleteLater()
+    session.deleteLater()
+    shutil.rmtree(logs)
+    return stats
+
+
+def benchWatchRerun(app, window, workdir):
+    # Além do tempo, confere que a nova execução sobrevive ao SIGKILL atrasado do stop() da anterior
+    if not toolAvailable('python'):
+        return {'skipped': 'python not available'}
+    path = os.path.join(workdir, 'watch_target.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('import time\ntime.sleep(60)\n')
+    window.currentFile = path
+    window.toggleWatchMode(True)
+    if not waitFor(app, lambda: window.watchSession is not None and window.watchSession.isRunning(), 10.0):
+        window.toggleWatchMode(False)
+        return {'skipped': 'watch target did not start'}
+    previous = window.watchSession.process
+    start = time.perf_counter()
+    window.rerunWatchTarget()
+    restarted = waitFor(app, lambda: window.watchSession.process is not previous and window.watchSession.isRunning(), 10.0)
+    rerun = time.perf_counter() - start
+    waitFor(app, lambda: False, main.RUN_KILL_DELAY_MS / 1000 + 1.0)
+    session = window.watchSession
+    survived = session.isRunning()
+    window.toggleWatchMode(False)
+    window.runSessions.stopAll()
+    waitFor(app, lambda: not session.isRunning(), 5.0)
+    window.currentFile = ''
+    return {'rerun_s': rerun, 'restarted': restarted, 'survived_kill_delay': survived}
+
+
+def benchFileSystemModel(app, workdir, repeat, count):
+    directory = os.path.join(workdir, 'large_dir')
+    os.mkdir(directory)
+    extensions = ['.py', '.js', '.java', '.cpp', '.rb', '.png', '.txt', '.md']
+    for i in range(count):
+        open(os.path.join(directory, f'file_{i}{extensions[i % len(extensions)]}'), 'w').close()
+    # Diretórios excluídos (padrão e .gitignore) com o mesmo tamanho: não podem custar nada
+    for ignored in ['node_modules', 'generated']:
+        os.mkdir(os.path.join(directory, ignored))
+        for i in range(count):
+            open(os.path.join(directory, ignored, f'file_{i}.js'), 'w').close()
+    with open(os.path.join(directory, '.gitignore'), 'w') as f:
+        f.write('generated/\n')
+
+    model = main.CustomFileSystemModel()
+    try:
+        return measureFileSystemModel(app, model, directory, repeat, count)
+    finally:
+        # Destrói o modelo (watcher e lister) nesta thread; o coletor poderia fazê-lo a partir do watchdog
+        model.stop()
+        model.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+        shutil.rmtree(directory)
+
+
+def measureFileSystemModel(app, model, directory, repeat, count):
+    start = time.perf_counter()
+    model.setRootPath(directory)
+    root = model.index(directory)
+    if not waitFor(app, lambda: model.rowCount(root) >= count + 1):
+        return {'skipped': 'directory listing did not finish in time'}
+    loaded = time.perf_counter() - start
+
+    def scan():
+        for row in range(model.rowCount(root)):
+            index = model.index(row, 0, root)
+            model.data(index, Qt.DecorationRole)
+            model.data(index, Qt.DisplayRole)
+
+    stats = measure(scan, repeat)
+    stats['rows'] = model.rowCount(root)
+    stats['us_per_row'] = stats['median_s'] / stats['rows'] * 1e6
+    stats['load_s'] = loaded
+    stats['ignored_visible'] = sum(1 for row in range(stats['rows'])
+                                   if model.data(model.index(row, 0, root)) in ('node_modules', 'generated'))
+    stats['watched_dirs'] = len(model.watched)
+    return stats
+
+
+def benchEditJournal(workdir, repeat, keystrokes, size):
+    # Custo por tecla do diário de recuperação contra regravar o arquivo inteiro (como o autosave faz)
+    path = os.path.join(workdir, 'journal_buffer.py')
+    line = 'linha de código com acentuação: ação, coração\n'
+    text = line * (size // len(line.encode('utf-8')))
+    directory = os.path.join(workdir, 'journal')
+    written = {}
+
+    def journaled():
+        journal = main.EditJournal(directory)
+        journal.begin(path, text)
+        for i in range(keystrokes):
+            journal.insert(i, b'x')
+            if i % 100 == 99:
+                journal.sync()
+        journal.sync()
+        written['journal'] = os.path.getsize(journal.path)
+        journal.discard()
+
+    def rewrite():
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(keystrokes):
+                f.seek(0)
+                f.write(text)
+                f.truncate()
+                if i % 100 == 99:
+                    f.flush()
+                    os.fsync(f.fileno())
+        written['rewrite'] = len(text.encode('utf-8')) * keystrokes
+        os.remove(path)
+
+    results = {'buffer_bytes': len(text.encode('utf-8')), 'keystrokes': keystrokes}
+    for name, func in [('journal', journaled), ('rewrite', rewrite)]:
+        stats = measure(func, repeat)
+        stats['us_per_keystroke'] = stats['median_s'] / keystrokes * 1e6
+        stats['bytes_per_keystroke'] = written[name] / keystrokes
+        results[name] = stats
+    return results
+
+
+def gitRevision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except FileNotFoundError:
+        return ''
+
+
+def runBenchmarks():
+    parser = argparse.ArgumentParser(description='Headless benchmarks for the ScriptBliss hot paths.')
+    parser.add_argument('--output', '-o', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (default: 3)')
+    parser.add_argument('--quick', action='store_true', help='skip the 50 MB fixtures and use smaller inputs')
+    args = parser.parse_args()
+
+    # Os caminhos de imagem do main.py são relativos ao diretório do projeto
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    # Diálogos modais travariam a execução sem usuário
+    QMessageBox.question = staticmethod(lambda *a, **k: QMessageBox.No)
+    QMessageBox.critical = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+
+    app = QApplication(sys.argv)
+    sizes = ['1KB', '1MB'] if args.quick else list(SIZES)
+
+    results = {
+        'meta': {
+            'commit': gitRevision(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick,
+        },
+        'benchmarks': {},
+    }
+    benchmarks = results['benchmarks']
+
+    with tempfile.TemporaryDirectory(prefix='scriptbliss-bench-') as workdir:
+        benchmarks['startup'] = benchStartup(app, args.repeat)
+        window = main.MainWindow()
+        app.processEvents()
+        benchmarks['loadFile'] = benchLoadFile(app, window, workdir, sizes, args.repeat)
+        benchmarks['checkSyntax'] = benchCheckSyntax(app, window, workdir, args.repeat, 200 if args.quick else 2000)
+        benchmarks['javaScriptBackends'] = benchJavaScriptBackends(args.repeat, 500 if args.quick else 5000)
+        benchmarks['RunSession.readStdout'] = benchRunOutput(app, workdir, args.repeat, 50 if args.quick else 500)
+        benchmarks['watchRerun'] = benchWatchRerun(app, window, workdir)
+        benchmarks['editJournal'] = benchEditJournal(workdir, args.repeat, 500 if args.quick else 2000, SIZES['1MB'])
+        benchmarks['CustomFileSystemModel.data'] = benchFileSystemModel(app, workdir, args.repeat, 1000 if args.quick else 10000)
+        window.close()
+        window.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if benchmarks['watchRerun'].get('survived_kill_delay') is False:
+        print('watch mode rerun was killed by the previous run\'s delayed SIGKILL', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    runBenchmarks()
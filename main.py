@@ -5,15 +5,965 @@ import tempfile
 import subprocess
 import webbrowser
 import codecs
+import html
 import shutil
-from PyQt5.QtWidgets import (QApplication, QScrollArea, QMainWindow, QTreeView, QAbstractItemView, QFileSystemModel, QSplitter, QTextEdit,
-                             QTabWidget, QMenu, QAction, QInputDialog, QMessageBox, QLabel, QFileDialog, QVBoxLayout, QWidget)
-from PyQt5.QtGui import (QIcon, QColor, QDesktopServices, QPalette, QFont, QFontMetrics, QPixmap, QDesktopServices, QDrag, QCursor)
-from PyQt5.QtCore import (Qt, QDir, QProcess, QTimer, QUrl, QPoint, QMimeData, QFileInfo, pyqtSignal)
+import signal
+import textwrap
+import time
+import json
+import inspect
+import functools
+import threading
+import traceback
+import collections
+import contextlib
+import array
+import mmap
+import struct
+import atexit
+import bisect
+import hashlib
+import stat
+import ast
+import keyword
+import builtins
+import importlib
+import importlib.util
+import sqlite3
+import argparse
+import concurrent.futures
+import multiprocessing
+import queue
+import http.server
+import urllib.parse
+from PyQt5.QtWidgets import (QApplication, QScrollArea, QMainWindow, QTreeView, QAbstractItemView, QFileIconProvider, QSplitter, QTextEdit,
+                             QTabWidget, QMenu, QAction, QInputDialog, QMessageBox, QLabel, QFileDialog, QVBoxLayout, QWidget,
+                             QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QTableView, QLineEdit, QPlainTextEdit, QDialog,
+                             QDialogButtonBox, QFormLayout, QSpinBox, QCheckBox, QProgressBar, QListView, QComboBox,
+                             QAbstractScrollArea)
+from PyQt5.QtGui import (QIcon, QColor, QDesktopServices, QPalette, QFont, QFontMetrics, QPixmap, QDesktopServices, QDrag, QCursor,
+                         QTextCharFormat, QTextCursor, QImage, QImageReader, QPainter, QPen)
+from PyQt5.QtCore import (Qt, QDir, QProcess, QTimer, QUrl, QPoint, QMimeData, QFileInfo, QObject, QThread, QFileSystemWatcher,
+                          QAbstractTableModel, QAbstractItemModel, QAbstractListModel, QSortFilterProxyModel, QModelIndex, pyqtSignal,
+                          QThreadPool, QRunnable, QSize, QEvent, QProcessEnvironment)
 from PyQt5.Qsci import (QsciScintilla, QsciLexerPython, QsciLexerJava, QsciLexerHTML, QsciLexerJavaScript,
-                        QsciLexerCSS, QsciLexerCPP, QsciLexerRuby)
+                        QsciLexerCSS, QsciLexerCPP, QsciLexerRuby, QsciAPIs, QsciAbstractAPIs, QsciStyle)
 from PyQt5.QtWidgets import QToolBar, QAction
 
+CACHE_DIR = os.environ.get('SCRIPTBLISS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.scriptbliss'))
+
+# Diretórios que nunca contêm código do projeto
+IGNORED_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', 'build', 'target', '.build'}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+LANGUAGE_NAMES = {
+    '.py': 'Python',
+    '.java': 'Java',
+    '.html': 'HTML',
+    '.js': 'JavaScript',
+    '.css': 'CSS',
+    '.cpp': 'C++',
+    '.rb': 'Ruby'
+}
+
+# Marcadores da margem de alterações (gutter) e da visão de diff
+DIFF_ADDED_MARKER = 10
+DIFF_MODIFIED_MARKER = 11
+# Margem de texto com o blame ao lado dos números de linha
+BLAME_MARGIN = 3
+DIFF_REMOVED_MARKER = 12
+
+# Limite de diretórios observados pelo QFileSystemWatcher (cada um consome um watch do inotify)
+MAX_WATCHED_DIRS = 256
+
+def cachePath(*parts):
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def pythonSyntaxErrors(code):
+    try:
+        compile(code, '<string>', 'exec')
+    except SyntaxError as e:
+        return [e]
+    except ValueError as e:  # ex.: bytes nulos no código-fonte
+        return [SyntaxError(str(e), ('<string>', 1, 0, ''))]
+    return []
+
+def cppSyntaxErrors(code):
+    errors = []
+    try:
+        process = subprocess.Popen(['g++', '-fsyntax-only', '-x', 'c++', '-'], stdin=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except FileNotFoundError:
+        return errors
+    _, stderr = process.communicate(input=code)
+
+    if stderr:
+        code_lines = code.splitlines()
+        for line in stderr.splitlines():
+            if ': error:' in line:
+                parts = line.split(':')
+                try:
+                    line_num = int(parts[1])
+                except ValueError:
+                    continue
+                error_msg = ':'.join(parts[3:]).strip()
+                error_line = code_lines[line_num-1] if 1 <= line_num <= len(code_lines) else ''
+                errors.append(SyntaxError(error_msg, ('<string>', line_num, 0, error_line)))
+    return errors
+
+# Serviço de parse em Node: lê requisições JSON (uma por linha) no stdin e devolve os erros de sintaxe.
+# Depois de cada erro a linha é apagada e o código é reanalisado, para reportar vários erros por passada.
+NODE_PARSE_SERVICE = r'''
+const vm = require('vm');
+const readline = require('readline');
+let acorn = null;
+try { acorn = require('acorn'); } catch (e) {}
+
+function firstError(code) {
+    try {
+        if (acorn) {
+            acorn.parse(code, {ecmaVersion: 'latest', allowHashBang: true});
+        } else {
+            new vm.Script(code, {filename: 'buffer.js'});
+        }
+        return null;
+    } catch (e) {
+        if (!(e instanceof SyntaxError)) {
+            return null;
+        }
+        if (e.loc) {
+            return {line: e.loc.line, column: e.loc.column + 1, message: e.message};
+        }
+        const stack = (e.stack || '').split('\n');
+        const match = /^buffer\.js:(\d+)/.exec(stack[0]);
+        const caret = stack.length > 2 ? stack[2].indexOf('^') : -1;
+        return {line: match ? parseInt(match[1], 10) : 1, column: caret + 1 || 1, message: e.name + ': ' + e.message};
+    }
+}
+
+readline.createInterface({input: process.stdin}).on('line', (line) => {
+    const request = JSON.parse(line);
+    const lines = request.code.split('\n');
+    const errors = [];
+    const seen = new Set();
+    while (errors.length < request.maxErrors) {
+        const error = firstError(lines.join('\n'));
+        if (!error || seen.has(error.line) || error.line > lines.length) {
+            break;
+        }
+        seen.add(error.line);
+        errors.push(error);
+        lines[error.line - 1] = '';
+    }
+    process.stdout.write(JSON.stringify({id: request.id, errors: errors}) + '\n');
+});
+'''
+
+class JavaScriptChecker:
+    MAX_ERRORS = 10
+
+    def __init__(self, backend='auto'):
+        self.backend = backend
+        self.process = None
+        self.requestId = 0
+        self.lock = threading.Lock()
+        self.nodeAvailable = backend in ('auto', 'node') and shutil.which('node') is not None
+        self.esprima = None
+        atexit.register(self.close)
+
+    def errors(self, code):
+        if self.nodeAvailable:
+            errors = self.nodeErrors(code)
+            if errors is not None:
+                return errors
+        if self.backend == 'node':
+            return []
+        return self.esprimaErrors(code)
+
+    def nodeErrors(self, code):
+        with self.lock:
+            # Uma nova tentativa caso o processo tenha morrido entre verificações
+            for attempt in range(2):
+                if self.process is None or self.process.poll() is not None:
+                    try:
+                        self.process = subprocess.Popen(['node', '-e', NODE_PARSE_SERVICE], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                        stderr=subprocess.DEVNULL, encoding='utf-8', bufsize=1)
+                    except OSError:
+                        break
+                self.requestId += 1
+                try:
+                    self.process.stdin.write(json.dumps({'id': self.requestId, 'code': code, 'maxErrors': self.MAX_ERRORS}) + '\n')
+                    self.process.stdin.flush()
+                    response = json.loads(self.process.stdout.readline())
+                except (OSError, ValueError):
+                    self.process = None
+                    continue
+                lines = code.splitlines()
+                return [SyntaxError(e['message'], ('<string>', e['line'], e['column'], lines[e['line'] - 1] if e['line'] <= len(lines) else ''))
+                        for e in response['errors']]
+            self.nodeAvailable = False
+            return None
+
+    def esprimaModule(self):
+        # Importado uma única vez; False indica que o esprima não está instalado
+        if self.esprima is None:
+            try:
+                import esprima
+                self.esprima = esprima
+            except ImportError:
+                self.esprima = False
+        return self.esprima or None
+
+    def esprimaErrors(self, code):
+        esprima = self.esprimaModule()
+        if esprima is None:
+            return []
+
+        lines = code.splitlines()
+        errors = []
+        seen = set()
+        while len(errors) < self.MAX_ERRORS:
+            try:
+                tree = esprima.parseScript('\n'.join(lines), {'tolerant': True})
+                for e in getattr(tree, 'errors', None) or []:
+                    if e.lineNumber not in seen:
+                        seen.add(e.lineNumber)
+                        errors.append(SyntaxError(str(e), ('<string>', e.lineNumber, e.column, '')))
+                break
+            except esprima.Error as e:
+                if e.lineNumber in seen or not 1 <= e.lineNumber <= len(lines):
+                    break
+                seen.add(e.lineNumber)
+                errors.append(SyntaxError(str(e), ('<string>', e.lineNumber, e.column, lines[e.lineNumber - 1])))
+                lines[e.lineNumber - 1] = ''
+        return errors[:self.MAX_ERRORS]
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+JAVASCRIPT_CHECKER = JavaScriptChecker()
+
+def javaScriptSyntaxErrors(code):
+    return JAVASCRIPT_CHECKER.errors(code)
+
+def javaSyntaxErrors(code):
+    errors = []
+    # Extrair o nome da classe pública (se existir)
+    class_match = re.search(r'public\s+class\s+(\w+)', code)
+    class_name = class_match.group(1) if class_match else 'Main'
+
+    # Criar um arquivo temporário com o nome correto
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, f"{class_name}.java")
+        with open(file_path, 'w') as temp_file:
+            temp_file.write(code)
+
+        # Compilar o arquivo Java
+        try:
+            process = subprocess.Popen(['javac', file_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        except FileNotFoundError:
+            return errors
+        _, stderr = process.communicate()
+
+        if stderr:
+            for error in stderr.splitlines():
+                # Ignorar avisos sobre o nome do arquivo
+                if "should be declared in a file named" in error:
+                    continue
+
+                # Procurar por padrões de erro
+                match = re.search(r'(.+\.java):(\d+): error: (.*)', error)
+                if match:
+                    _, reported_line_num, error_msg = match.groups()
+                    try:
+                        actual_line_num = int(reported_line_num)
+                        code_lines = code.splitlines()
+
+                        if 1 <= actual_line_num <= len(code_lines):
+                            error_line = code_lines[actual_line_num-1]
+                        else:
+                            error_line = ''
+
+                        errors.append(SyntaxError(error_msg, ('<string>', actual_line_num, 0, error_line)))
+                    except ValueError:
+                        errors.append(SyntaxError(error_msg, ('<string>', 1, 0, '')))
+                else:
+                    # Se não conseguirmos extrair as informações do erro, mostramos a mensagem completa
+                    errors.append(SyntaxError(error.strip(), ('<string>', 1, 0, '')))
+    return errors
+
+def rubySyntaxErrors(code):
+    errors = []
+    try:
+        process = subprocess.Popen(['ruby', '-c'], stdin=subprocess.PIPE, stderr=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+    except FileNotFoundError:
+        return errors
+    _, stderr = process.communicate(input=code)
+
+    if stderr:
+        for line in stderr.splitlines():
+            if ':' in line:
+                parts = line.split(':')
+                if len(parts) >= 3:
+                    try:
+                        line_num = int(parts[1])
+                        error_msg = ':'.join(parts[2:]).strip()
+                        code_lines = code.splitlines()
+                        if 1 <= line_num <= len(code_lines):
+                            error_line = code_lines[line_num-1]
+                        else:
+                            error_line = ''
+                        errors.append(SyntaxError(error_msg, ('<string>', line_num, 0, error_line)))
+                    except ValueError:
+                        # Se não conseguirmos converter o número da linha para inteiro, apenas mostramos o erro sem a linha específica
+                        errors.append(SyntaxError(line.strip(), ('<string>', 1, 0, '')))
+                else:
+                    # Se não conseguirmos separar a linha em partes suficientes, mostramos o erro completo
+                    errors.append(SyntaxError(line.strip(), ('<string>', 1, 0, '')))
+    return errors
+
+SYNTAX_CHECKERS = {
+    '.py': pythonSyntaxErrors,
+    '.cpp': cppSyntaxErrors,
+    '.js': javaScriptSyntaxErrors,
+    '.java': javaSyntaxErrors,
+    '.rb': rubySyntaxErrors,
+}
+
+# Padrões de símbolos por linguagem: (tipo, regex aplicada linha a linha com os grupos indent e name)
+SYMBOL_PATTERNS = {
+    '.py': [
+        ('class', re.compile(r'(?P<indent>[ \t]*)class\s+(?P<name>\w+)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)(?:async\s+)?def\s+(?P<name>\w+)')),
+    ],
+    '.rb': [
+        ('class', re.compile(r'(?P<indent>[ \t]*)(?:class|module)\s+(?P<name>[\w:]+)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)def\s+(?P<name>[\w.?!=]+)')),
+    ],
+    '.js': [
+        ('class', re.compile(r'(?P<indent>[ \t]*)(?:export\s+)?(?:default\s+)?class\s+(?P<name>[\w$]+)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>[\w$]+)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)(?:export\s+)?(?:const|let|var)\s+(?P<name>[\w$]+)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[\w$]+\s*=>)')),
+    ],
+    '.java': [
+        ('class', re.compile(r'(?P<indent>[ \t]*)(?:(?:public|private|protected|static|final|abstract|sealed)\s+)*(?:class|interface|enum|record)\s+(?P<name>\w+)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)(?:(?:public|private|protected|static|final|abstract|synchronized|native|default)\s+)+(?:<[^>]+>\s+)?[\w<>\[\],.? ]+\s+(?P<name>\w+)\s*\(')),
+    ],
+    '.cpp': [
+        ('class', re.compile(r'(?P<indent>[ \t]*)(?:template\s*<[^>]*>\s*)?(?:class|struct|namespace)\s+(?P<name>\w+)\s*(?:[:{]|$)')),
+        ('function', re.compile(r'(?P<indent>[ \t]*)(?=\S)(?!(?:if|for|while|switch|return|else|do|case|sizeof|new|delete)\b)[\w:][\w:<>,*&~ ]*?[ *&](?P<name>~?[\w:]+)\s*\([^;]*\)\s*(?:const\s*)?(?:override\s*)?(?:\{.*)?$')),
+    ],
+}
+
+def scanLineSymbols(line, patterns):
+    for kind, pattern in patterns:
+        match = pattern.match(line)
+        if match:
+            return kind, match.group('name'), len(match.group('indent').expandtabs(4))
+    return None
+
+def scanSymbols(text, ext):
+    # Lista de (linha, tipo, nome, indentação), com linhas começando em 0
+    patterns = SYMBOL_PATTERNS.get(ext)
+    if not patterns:
+        return []
+    symbols = []
+    for number, line in enumerate(text.splitlines()):
+        symbol = scanLineSymbols(line, patterns)
+        if symbol:
+            symbols.append((number,) + symbol)
+    return symbols
+
+def diffSplitPoint(a, alo, ahi, b, blo, bhi):
+    # "Middle snake" do Myers em espaço linear: devolve um ponto (x, y) de um caminho mínimo
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    size = 2 * max_d + 3
+    forward = [0] * size
+    backward = [0] * size
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[delta - k] >= n:
+                return x, y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[k - 1] < backward[k + 1]):
+                x = backward[k + 1]
+            else:
+                x = backward[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[k] = x
+            if not odd and -d <= delta - k <= d and x + forward[delta - k] >= n:
+                return n - x, m - y
+    return n, m
+
+def diffLines(a, b):
+    # Diff de Myers em espaço linear; devolve opcodes no formato do difflib
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in a]
+    b = [ids.setdefault(line, len(ids)) for line in b]
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # Prefixo e sufixo comuns resolvem a maior parte das edições sem busca
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        x, y = diffSplitPoint(a, alo, ahi, b, blo, bhi)
+        if (x, y) in ((0, 0), (ahi - alo, bhi - blo)):
+            continue  # nada em comum: o trecho inteiro é uma substituição
+        stack.append((alo + x, ahi, blo + y, bhi))
+        stack.append((alo, alo + x, blo, blo + y))
+
+    matches.sort()
+    opcodes = []
+    i = j = 0
+    for ai, bj in matches + [(len(a), len(b))]:
+        if ai > i and bj > j:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif ai > i:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif bj > j:
+            opcodes.append(('insert', i, ai, j, bj))
+        if ai < len(a):
+            if opcodes and opcodes[-1][0] == 'equal' and opcodes[-1][2] == ai:
+                tag, i1, i2, j1, j2 = opcodes.pop()
+                opcodes.append(('equal', i1, ai + 1, j1, bj + 1))
+            else:
+                opcodes.append(('equal', ai, ai + 1, bj, bj + 1))
+        i, j = ai + 1, bj + 1
+    return opcodes
+
+def readSource(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in ['utf-8', 'iso-8859-1', 'windows-1252', 'ascii']:
+        try:
+            return data, data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data, None
+
+def lintFile(path, knownHash=None):
+    # Executado nos processos do pool: devolve (hash, diagnósticos ou None se o hash não mudou)
+    data, code = readSource(path)
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == knownHash:
+        return digest, None
+    if code is None:
+        return digest, []
+    checker = SYNTAX_CHECKERS[os.path.splitext(path)[1].lower()]
+    diagnostics = []
+    for e in checker(code):
+        diagnostics.append({'line': e.lineno or 1, 'column': e.offset or 1, 'message': e.msg})
+    return digest, diagnostics
+
+def iterSourceFiles(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in SYNTAX_CHECKERS:
+                yield os.path.join(dirpath, name)
+
+class LintCache:
+    VERSION = 1
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        key = hashlib.sha1(self.root.encode('utf-8')).hexdigest()
+        self.path = cachePath('lint', f'{key}.json')
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, path, stat):
+        entry = self.entries.get(path)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return entry['diagnostics']
+        return None
+
+    def knownHash(self, path):
+        entry = self.entries.get(path)
+        return entry['hash'] if entry else None
+
+    def store(self, path, stat, digest, diagnostics):
+        self.entries[path] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': digest, 'diagnostics': diagnostics}
+
+    def remove(self, path):
+        self.entries.pop(path, None)
+
+    def prune(self, paths):
+        for path in set(self.entries) - set(paths):
+            del self.entries[path]
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'root': self.root, 'entries': self.entries}, f)
+        os.replace(tmp, self.path)
+
+def lintProject(root, jobs=None, useCache=True):
+    cache = LintCache(root) if useCache else None
+    results = {}
+    pending = []
+    stats = {'files': 0, 'cached': 0, 'linted': 0, 'unreadable': 0}
+
+    def skip(path, error):
+        # Um arquivo que não pode ser lido não derruba a verificação nem o cache
+        stats['unreadable'] += 1
+        print(f"Skipped {path}: {error}", file=sys.stderr)
+
+    for path in iterSourceFiles(root):
+        stats['files'] += 1
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if not stat.S_ISREG(st.st_mode):  # sockets e FIFOs bloqueariam ou falhariam no open
+            skip(path, 'not a regular file')
+            continue
+        diagnostics = cache.lookup(path, st) if cache else None
+        if diagnostics is not None:
+            results[path] = diagnostics
+            stats['cached'] += 1
+        else:
+            pending.append((path, st, cache.knownHash(path) if cache else None))
+
+    def collect(path, st, knownHash, digest, diagnostics):
+        if diagnostics is None:  # conteúdo idêntico ao já verificado, só o mtime mudou
+            diagnostics = cache.entries[path]['diagnostics']
+            stats['cached'] += 1
+        else:
+            stats['linted'] += 1
+        results[path] = diagnostics
+        if cache:
+            cache.store(path, st, digest, diagnostics)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(pending) < 2:
+        for path, st, knownHash in pending:
+            try:
+                collect(path, st, knownHash, *lintFile(path, knownHash))
+            except OSError as e:
+                skip(path, e)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(lintFile, path, knownHash): (path, st, knownHash) for path, st, knownHash in pending}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    collect(*futures[future], *future.result())
+                except OSError as e:
+                    skip(futures[future][0], e)
+
+    if cache:
+        cache.prune(results)
+        cache.save()
+    return results, stats
+
+def formatLintResults(root, results, stats, outputFormat):
+    root = os.path.abspath(root)
+    diagnostics = []
+    for path in sorted(results):
+        for d in results[path]:
+            diagnostics.append(dict(d, path=os.path.relpath(path, root)))
+
+    if outputFormat == 'sarif':
+        rules = {}
+        sarif_results = []
+        for d in diagnostics:
+            language = LANGUAGE_NAMES.get(os.path.splitext(d['path'])[1].lower(), 'Plain Text')
+            rule_id = f"{language.lower().replace('+', 'p')}-syntax"
+            rules[rule_id] = {'id': rule_id, 'shortDescription': {'text': f'{language} syntax error'}}
+            sarif_results.append({
+                'ruleId': rule_id,
+                'level': 'error',
+                'message': {'text': d['message']},
+                'locations': [{'physicalLocation': {
+                    'artifactLocation': {'uri': d['path'].replace(os.sep, '/'), 'uriBaseId': 'SRCROOT'},
+                    'region': {'startLine': d['line'], 'startColumn': max(1, d['column'])},
+                }}],
+            })
+        document = {
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {'name': 'ScriptBliss', 'informationUri': 'https://github.com/Luirafa2022/ScriptBliss-IDE',
+                                    'rules': list(rules.values())}},
+                'originalUriBaseIds': {'SRCROOT': {'uri': QUrl.fromLocalFile(root + os.sep).toString()}},
+                'results': sarif_results,
+            }],
+        }
+    else:
+        document = {'root': root, 'stats': stats, 'diagnostics': diagnostics}
+    return json.dumps(document, indent=2)
+
+def runLint(args):
+    if not os.path.isdir(args.lint):
+        print(f"Not a directory: {args.lint}", file=sys.stderr)
+        return 2
+    results, stats = lintProject(args.lint, jobs=args.jobs, useCache=not args.no_cache)
+    output = formatLintResults(args.lint, results, stats, args.format)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 1 if any(results.values()) else 0
+
+ENCODING_SAMPLE_BYTES = 64 * 1024
+TRANSCODE_CHUNK_BYTES = 256 * 1024
+# Nunca são texto; o resto é decidido pelo conteúdo (bytes NUL = binário)
+BINARY_EXTENSIONS = IMAGE_EXTENSIONS + ('.class', '.exe', '.zip', '.jar', '.pdf', '.ico', '.o', '.so', '.dll', '.pyc', '.sqlite3')
+
+@contextlib.contextmanager
+def atomicWrite(path, mode='wb'):
+    # Grava ao lado do destino e troca com os.replace: quem lê nunca vê o arquivo pela metade
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+def encodingSamples(path, size):
+    # Início, meio e fim do arquivo: a memória não cresce com o tamanho
+    with open(path, 'rb') as f:
+        if size <= 3 * ENCODING_SAMPLE_BYTES:
+            yield f.read(), True
+            return
+        yield f.read(ENCODING_SAMPLE_BYTES), False
+        for offset in (size // 2, size - ENCODING_SAMPLE_BYTES):
+            f.seek(offset)
+            sample = f.read(ENCODING_SAMPLE_BYTES)
+            # Pula os bytes de continuação de um caractere UTF-8 cortado no meio
+            skip = 0
+            while skip < 3 and skip < len(sample) and 0x80 <= sample[skip] <= 0xBF:
+                skip += 1
+            yield sample[skip:], offset + len(sample) >= size
+
+def sniffEncoding(path):
+    # None para binários; 'utf-8'/'ascii' não precisam de conversão
+    if path.lower().endswith(BINARY_EXTENSIONS):
+        return None
+    size = os.path.getsize(path)
+    utf8 = True
+    ascii_only = True
+    c1_controls = False
+    for sample, final in encodingSamples(path, size):
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        if b'\x00' in sample:
+            return None
+        if ascii_only and not sample.isascii():
+            ascii_only = False
+        if utf8:
+            try:
+                codecs.getincrementaldecoder('utf-8')().decode(sample, final)
+            except UnicodeDecodeError:
+                utf8 = False
+        # 0x80-0x9F são controles no latin-1 e quase sempre indicam cp1252
+        if any(0x80 <= b <= 0x9F for b in sample):
+            c1_controls = True
+    if ascii_only:
+        return 'ascii'
+    if utf8:
+        return 'utf-8'
+    return 'windows-1252' if c1_controls else 'iso-8859-1'
+
+def sniffEncodingTask(path):
+    try:
+        st = os.stat(path)
+        return {'path': path, 'encoding': sniffEncoding(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    except OSError as e:
+        return {'path': path, 'encoding': None, 'error': str(e)}
+
+def transcodeFile(path, encoding):
+    # Decodifica e regrava em blocos; um byte inválido no meio aborta sem tocar no original
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(path, 'rb') as source, atomicWrite(path) as target:
+        while True:
+            chunk = source.read(TRANSCODE_CHUNK_BYTES)
+            text = decoder.decode(chunk, not chunk)
+            if text:
+                target.write(text.encode('utf-8'))
+            if not chunk:
+                break
+
+def transcodeTask(entry):
+    path = entry['path']
+    try:
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+            return {'path': path, 'status': 'changed since the report, skipped'}
+        try:
+            transcodeFile(path, entry['encoding'])
+        except UnicodeDecodeError:
+            if entry['encoding'] != 'windows-1252':
+                raise
+            # Bytes que o cp1252 não define (0x81, 0x8D...) só existem no latin-1
+            transcodeFile(path, 'iso-8859-1')
+        return {'path': path, 'status': 'converted'}
+    except (OSError, UnicodeError) as e:
+        return {'path': path, 'status': f'failed: {e}'}
+
+def iterTextFiles(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for name in filenames:
+            if not name.lower().endswith(BINARY_EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+def mapInProcessPool(func, items, jobs=None):
+    # 'spawn' evita herdar as threads do Qt em um fork; blocos grandes diluem o custo do IPC
+    items = list(items)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(items) < 2:
+        return [func(item) for item in items]
+    chunksize = max(1, min(256, len(items) // (jobs * 4)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
+
+def scanProjectEncodings(root, jobs=None):
+    return [entry for entry in mapInProcessPool(sniffEncodingTask, iterTextFiles(root), jobs)
+            if entry['encoding'] not in (None, 'ascii', 'utf-8')]
+
+def convertProjectEncodings(entries, jobs=None):
+    return mapInProcessPool(transcodeTask, entries, jobs)
+
+# Formatadores por extensão, em ordem de preferência; todos leem o código no stdin e devolvem no stdout
+FORMATTERS = {
+    '.py': ['black'],
+    '.cpp': ['clang-format'], '.cc': ['clang-format'], '.cxx': ['clang-format'], '.c': ['clang-format'],
+    '.h': ['clang-format'], '.hpp': ['clang-format'], '.java': ['clang-format'],
+    '.js': ['prettier', 'clang-format'], '.ts': ['prettier', 'clang-format'], '.json': ['prettier'],
+    '.css': ['prettier'], '.html': ['prettier'],
+}
+FORMATTER_ARGUMENTS = {
+    'black': ['-q', '--stdin-filename', '{path}', '-'],
+    'clang-format': ['--assume-filename={path}'],
+    'prettier': ['--stdin-filepath', '{path}'],
+}
+# Mudou a configuração na raiz do projeto, o cache de formatação deixa de valer
+FORMATTER_CONFIGS = ('pyproject.toml', '.clang-format', '_clang-format', '.prettierrc', '.prettierrc.json', '.prettierrc.js',
+                     'prettier.config.js', '.editorconfig', 'package.json')
+FORMAT_TIMEOUT = 60
+
+def findFormatters(root):
+    # Instalações locais do projeto (node_modules, venv) têm prioridade sobre o PATH
+    local = [os.path.join(root, 'node_modules', '.bin'), os.path.join(root, '.venv', 'bin'), os.path.join(root, 'venv', 'bin'),
+             os.path.join(root, '.venv', 'Scripts'), os.path.join(root, 'venv', 'Scripts')]
+    search = os.pathsep.join(local + [os.environ.get('PATH', '')])
+    found = {}
+    for tool in FORMATTER_ARGUMENTS:
+        executable = shutil.which(tool, path=search)
+        if executable:
+            found[tool] = executable
+    return found
+
+def formatterFor(path, formatters):
+    for tool in FORMATTERS.get(os.path.splitext(path)[1].lower(), []):
+        if tool in formatters:
+            return tool
+    return None
+
+def formatterCommand(path, tool, formatters):
+    return [formatters[tool]] + [argument.format(path=path) for argument in FORMATTER_ARGUMENTS[tool]]
+
+def formatterSignature(root, formatters):
+    parts = []
+    for name in sorted(formatters) + list(FORMATTER_CONFIGS):
+        path = formatters.get(name) or os.path.join(root, name)
+        try:
+            parts.append(f'{path}:{os.stat(path).st_mtime_ns}')
+        except OSError:
+            pass
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+def runFormatter(command, path, data):
+    # (True, saída) ou (False, mensagem); roda no diretório do arquivo para achar a configuração mais próxima
+    try:
+        process = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 cwd=os.path.dirname(os.path.abspath(path)), timeout=FORMAT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return False, f'{os.path.basename(command[0])} timed out after {FORMAT_TIMEOUT}s'
+    except OSError as e:
+        return False, str(e)
+    if process.returncode != 0:
+        message = process.stderr.decode('utf-8', errors='replace').strip().splitlines()
+        return False, message[0] if message else f'{os.path.basename(command[0])} exited with {process.returncode}'
+    return True, process.stdout
+
+def formatTask(entry):
+    # Executado nos processos do pool; grava com atomicWrite só se o arquivo não mudou desde a leitura
+    path = entry['path']
+    try:
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if digest == entry['knownHash']:
+            status = 'cached'
+        else:
+            ok, output = runFormatter(entry['command'], path, data)
+            if not ok:
+                return {'path': path, 'status': f'failed: {output}'}
+            if output == data:
+                status = 'unchanged'
+            else:
+                current = os.stat(path)
+                if (current.st_mtime_ns, current.st_size) != (st.st_mtime_ns, st.st_size):
+                    return {'path': path, 'status': 'changed while formatting, skipped'}
+                with atomicWrite(path) as f:
+                    f.write(output)
+                digest = hashlib.sha1(output).hexdigest()
+                st = os.stat(path)
+                status = 'formatted'
+        return {'path': path, 'status': status, 'hash': digest, 'mtime': st.st_mtime_ns, 'size': st.st_size}
+    except OSError as e:
+        return {'path': path, 'status': f'failed: {e}'}
+
+def iterFormatTargets(root):
+    # Mesmas regras da árvore: nada ignorado pelo git ou pelo .scriptblissignore é reformatado
+    rules = IgnoreRules(root)
+    pending = [os.path.abspath(root)]
+    while pending:
+        directory = pending.pop()
+        for name, isDir in listDirectory(directory, rules):
+            path = os.path.join(directory, name)
+            if isDir:
+                if not os.path.islink(path):
+                    pending.append(path)
+            elif os.path.splitext(name)[1].lower() in FORMATTERS:
+                yield path
+
+class FormatCache:
+    # Hash da última saída do formatador por arquivo; conteúdo igual a ela não volta para o formatador
+    VERSION = 1
+
+    def __init__(self, root, signature):
+        self.root = os.path.abspath(root)
+        key = hashlib.sha1(self.root.encode('utf-8')).hexdigest()
+        self.path = cachePath('format', f'{key}.json')
+        self.signature = signature
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION and data.get('signature') == signature:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def fresh(self, path, stat):
+        entry = self.entries.get(path)
+        return bool(entry) and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+
+    def knownHash(self, path):
+        entry = self.entries.get(path)
+        return entry['hash'] if entry else None
+
+    def store(self, result):
+        self.entries[result['path']] = {'mtime': result['mtime'], 'size': result['size'], 'hash': result['hash']}
+
+    def prune(self, paths):
+        for path in set(self.entries) - set(paths):
+            del self.entries[path]
+
+    def save(self):
+        with atomicWrite(self.path, 'w') as f:
+            json.dump({'version': self.VERSION, 'root': self.root, 'signature': self.signature, 'entries': self.entries}, f)
+
+def formatProject(root, jobs=None, useCache=True, skip=()):
+    formatters = findFormatters(root)
+    cache = FormatCache(root, formatterSignature(root, formatters)) if useCache else None
+    results = []
+    pending = []
+    seen = []
+    skip = {os.path.abspath(path) for path in skip}
+    for path in iterFormatTargets(root):
+        tool = formatterFor(path, formatters)
+        if tool is None:
+            continue
+        seen.append(path)
+        if path in skip:
+            results.append({'path': path, 'status': 'unsaved changes, skipped'})
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if cache and cache.fresh(path, st):
+            results.append({'path': path, 'status': 'cached'})
+            continue
+        pending.append({'path': path, 'command': formatterCommand(path, tool, formatters),
+                        'knownHash': cache.knownHash(path) if cache else None})
+
+    for result in mapInProcessPool(formatTask, pending, jobs):
+        results.append(result)
+        if cache and 'hash' in result:
+            cache.store(result)
+    if cache:
+        cache.prune(seen)
+        cache.save()
+    stats = collections.Counter(result['status'].split(':')[0] for result in results)
+    stats['files'] = len(seen)
+    stats['formatters'] = sorted(formatters)
+    return results, dict(stats)
+
+def runReformat(args):
+    if not os.path.isdir(args.reformat):
+        print(f"Not a directory: {args.reformat}", file=sys.stderr)
+        return 2
+    results, stats = formatProject(args.reformat, jobs=args.jobs, useCache=not args.no_cache)
+    root = os.path.abspath(args.reformat)
+    files = [{'path': os.path.relpath(result['path'], root), 'status': result['status']}
+             for result in sorted(results, key=lambda result: result['path']) if result['status'] not in ('cached', 'unchanged')]
+    print(json.dumps({'root': root, 'stats': stats, 'files': files}, indent=2))
+    return 1 if stats.get('failed') else 0
+
 class DraggableTreeView(QTreeView):
     dropped = pyqtSignal(list)
 
@@ -65,55 +1015,4933 @@ class DraggableTreeView(QTreeView):
         else:
             super().dropEvent(event)
 
-    def mouseMoveEvent(self, event):
-        if event.buttons() & Qt.LeftButton:
-            index = self.indexAt(event.pos())
-            if index.isValid():
-                drag = QDrag(self)
-                mime = QMimeData()
-                urls = [QUrl.fromLocalFile(self.model().filePath(index))]
-                mime.setUrls(urls)
-                drag.setMimeData(mime)
-                drag.exec_(Qt.MoveAction)
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            index = self.indexAt(event.pos())
+            if index.isValid():
+                drag = QDrag(self)
+                mime = QMimeData()
+                urls = [QUrl.fromLocalFile(self.model().filePath(index))]
+                mime.setUrls(urls)
+                drag.setMimeData(mime)
+                drag.exec_(Qt.MoveAction)
+        else:
+            super().mouseMoveEvent(event)
+
+THUMBNAIL_SIZE = 128
+# Mesmo cache dos gerenciadores de arquivos (especificação de miniaturas do freedesktop)
+THUMBNAIL_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'thumbnails', 'normal')
+
+def thumbnailPath(path):
+    uri = QUrl.fromLocalFile(os.path.abspath(path)).toString(QUrl.FullyEncoded)
+    return uri, os.path.join(THUMBNAIL_DIR, hashlib.md5(uri.encode('utf-8')).hexdigest() + '.png')
+
+def scaledImage(path, size):
+    # Decodifica já no tamanho final; o JPEG reduz dentro do próprio decodificador
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size.width() or original.height() > size.height()):
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read()
+
+def loadThumbnail(path):
+    # Válida enquanto Thumb::URI e Thumb::MTime baterem com o arquivo original
+    try:
+        mtime = str(int(os.stat(path).st_mtime))
+    except OSError:
+        return QImage()
+    uri, cached = thumbnailPath(path)
+    reader = QImageReader(cached)
+    if reader.canRead() and reader.text('Thumb::MTime') == mtime and reader.text('Thumb::URI') == uri:
+        image = reader.read()
+        if not image.isNull():
+            return image
+
+    image = scaledImage(path, QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    if image.isNull() or max(image.width(), image.height()) < THUMBNAIL_SIZE:
+        # Imagens menores que a miniatura não são gravadas no cache
+        return image
+    image.setText('Thumb::URI', uri)
+    image.setText('Thumb::MTime', mtime)
+    image.setText('Software', 'ScriptBliss')
+    try:
+        os.makedirs(THUMBNAIL_DIR, mode=0o700, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if image.save(temporary, 'PNG'):
+            os.chmod(temporary, 0o600)
+            os.replace(temporary, cached)
+    except OSError:
+        pass
+    return image
+
+class ThumbnailTask(QRunnable):
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+
+    def run(self):
+        path = self.loader.next()
+        while path is not None:
+            image = loadThumbnail(path)
+            if not image.isNull():
+                self.loader.thumbnailReady.emit(path, image)
+            path = self.loader.next()
+
+class ThumbnailLoader(QObject):
+    thumbnailReady = pyqtSignal(str, QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, min(8, os.cpu_count() or 2)))
+        self.lock = threading.Lock()
+        self.queue = []
+        self.active = 0
+
+    def request(self, paths, replace=True):
+        # Com replace, pedidos de telas que já saíram da vista são descartados
+        with self.lock:
+            if replace:
+                self.queue = list(reversed(paths))
+            else:
+                self.queue[:0] = reversed(paths)
+            workers = max(0, min(self.pool.maxThreadCount() - self.active, len(self.queue)))
+            self.active += workers
+        for _ in range(workers):
+            self.pool.start(ThumbnailTask(self))
+
+    def next(self):
+        with self.lock:
+            if self.queue:
+                return self.queue.pop()
+            self.active -= 1
+            return None
+
+    def stop(self):
+        with self.lock:
+            self.queue = []
+        self.pool.waitForDone(2000)
+
+# Regras de exclusão da árvore: .gitignore, .git/info/exclude e este arquivo na raiz do projeto
+TREE_IGNORE_FILE = '.scriptblissignore'
+# Entradas por lote ao popular um diretório grande
+TREE_BATCH_SIZE = 1000
+
+def gitignoreRegex(pattern):
+    # Subconjunto do .gitignore: *, ?, [...], ** e \ como escape; devolve o corpo da regex
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and pattern.find(']', i + 2) > 0:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end]
+            out.append('[' + ('^' + body[1:] if body.startswith('!') else body).replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+def parseIgnoreFile(path):
+    rules = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dirOnly = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        # Com uma barra no meio o padrão é relativo ao diretório do arquivo; sem ela vale em qualquer nível
+        prefix = '' if '/' in line else '(?:.*/)?'
+        rules.append((re.compile(prefix + gitignoreRegex(line.lstrip('/')) + r'\Z'), negate, dirOnly))
+    return rules
+
+class IgnoreRules:
+    # Compartilhado entre a thread da interface e o DirectoryLister; os arquivos lidos ficam em cache por mtime
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def rulesFrom(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        with self.lock:
+            cached = self.cache.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, parseIgnoreFile(path))
+                self.cache[path] = cached
+            return cached[1]
+
+    def chain(self, directory):
+        # Regras que valem dentro do diretório, das mais gerais (raiz) para as mais específicas
+        chain = [(self.root, self.rulesFrom(os.path.join(self.root, '.git', 'info', 'exclude'))),
+                 (self.root, self.rulesFrom(os.path.join(self.root, TREE_IGNORE_FILE)))]
+        relative = os.path.relpath(directory, self.root)
+        current = self.root
+        for part in [] if relative == '.' else relative.split(os.sep):
+            chain.append((current, self.rulesFrom(os.path.join(current, '.gitignore'))))
+            current = os.path.join(current, part)
+        chain.append((current, self.rulesFrom(os.path.join(current, '.gitignore'))))
+        return [(base, rules) for base, rules in chain if rules]
+
+    def changed(self, path):
+        with self.lock:
+            cached = self.cache.get(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (cached[0] if cached else None) != mtime
+
+    def filter(self, directory, entries):
+        chain = self.chain(directory)
+        kept = []
+        for name, isDir in entries:
+            ignored = isDir and name in IGNORED_DIRS
+            path = os.path.join(directory, name)
+            for base, rules in chain:
+                relative = os.path.relpath(path, base).replace(os.sep, '/')
+                for regex, negate, dirOnly in rules:
+                    if (isDir or not dirOnly) and regex.match(relative):
+                        ignored = not negate
+            if not ignored:
+                kept.append((name, isDir))
+        return kept
+
+def listDirectory(directory, rules, descending=False):
+    try:
+        with os.scandir(directory) as iterator:
+            entries = []
+            for entry in iterator:
+                try:
+                    entries.append((entry.name, entry.is_dir()))
+                except OSError:
+                    entries.append((entry.name, False))
+    except OSError:
+        return []
+    return arrangeEntries(directory, entries, rules, descending)
+
+def arrangeEntries(directory, entries, rules, descending=False):
+    entries = rules.filter(directory, entries)
+    # Diretórios primeiro, nomes sem diferenciar maiúsculas (como o QFileSystemModel); o nome exato desempata
+    entries.sort(key=lambda entry: (entry[0].lower(), entry[0]), reverse=descending)
+    entries.sort(key=lambda entry: not entry[1])
+    return entries
+
+class DirectoryLister(QThread):
+    listed = pyqtSignal(int, list, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.requests = collections.deque()
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def submit(self, token, directory, rules, descending, batched):
+        with self.condition:
+            self.requests.append((token, directory, rules, descending, batched))
+            self.condition.notify()
+
+    def clear(self):
+        with self.condition:
+            self.requests.clear()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.requests and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                token, directory, rules, descending, batched = self.requests.popleft()
+            entries = listDirectory(directory, rules, descending)
+            if not batched:
+                self.listed.emit(token, entries, True)
+                continue
+            for start in range(0, len(entries), TREE_BATCH_SIZE):
+                self.listed.emit(token, entries[start:start + TREE_BATCH_SIZE], start + TREE_BATCH_SIZE >= len(entries))
+            if not entries:
+                self.listed.emit(token, [], True)
+
+class TreeNode:
+    __slots__ = ('path', 'name', 'isDir', 'parent', 'row', 'children', 'byName', 'pending', 'stale')
+
+    def __init__(self, path, isDir, parent=None, row=0):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.isDir = isDir
+        self.parent = parent
+        self.row = row
+        self.children = None  # None = ainda não listado
+        self.byName = {}
+        self.pending = None
+        self.stale = False
+
+class CustomFileSystemModel(QAbstractItemModel):
+    # Árvore do projeto populada sob demanda: diretórios excluídos nunca são listados nem observados
+    directoryLoaded = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon_map = {
+            '.cpp': QIcon('img/cpp.png'),
+            '.css': QIcon('img/css.png'),
+            '.java': QIcon('img/java.png'),
+            '.class': QIcon('img/classe.png'),
+            '.html': QIcon('img/html.png'),
+            '.js': QIcon('img/javascript.png'),
+            '.png': QIcon('img/image.png'),
+            '.jpg': QIcon('img/image.png'),
+            '.jpeg': QIcon('img/image.png'),
+            '.bmp': QIcon('img/image.png'),
+            '.gif': QIcon('img/image.png'),
+            '.py': QIcon('img/python.png'),
+            '.rb': QIcon('img/ruby.png')
+        }
+        provider = QFileIconProvider()
+        self.folderIcon = provider.icon(QFileIconProvider.Folder)
+        self.fileIcon = provider.icon(QFileIconProvider.File)
+        # Miniaturas reais no lugar do ícone genérico de imagem (opcional)
+        self.thumbnailLoader = None
+        self.thumbnails = {}
+
+        self.descending = False
+        self.tokens = 0
+        self.requests = {}
+        self.root = None
+        self.rules = None
+        self.lister = DirectoryLister(self)
+        self.lister.listed.connect(self.onListed)
+        self.lister.start()
+        # Só os diretórios abertos mais recentemente ficam com watch do inotify
+        self.watcher = FileWatcherService(self)
+        self.watcher.directoriesChanged.connect(self.onDirectoriesChanged)
+        self.watched = collections.OrderedDict()
+
+    def stop(self):
+        self.lister.stop()
+
+    def rootPath(self):
+        return self.root.path if self.root else ''
+
+    def setRootPath(self, path):
+        path = os.path.abspath(path)
+        if self.root and self.root.path == path:
+            self.refreshAll()
+            return QModelIndex()
+        self.beginResetModel()
+        self.lister.clear()
+        self.requests.clear()
+        self.watcher.clearDirectories()
+        self.watched.clear()
+        self.rules = IgnoreRules(path)
+        self.root = TreeNode(path, True)
+        self.endResetModel()
+        self.load(self.root)
+        return QModelIndex()
+
+    def nodeFor(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def indexFor(self, node):
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def index(self, *args):
+        # index(path) como no QFileSystemModel; a raiz do projeto é o índice inválido (a raiz da view)
+        if args and isinstance(args[0], str):
+            node = self.nodeForPath(args[0])
+            return self.indexFor(node) if node is not None else QModelIndex()
+        row, column, parent = (list(args) + [QModelIndex()])[:3]
+        node = self.nodeFor(parent)
+        if node is None or node.children is None or not 0 <= row < len(node.children) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=None):
+        if index is None:
+            return QObject.parent(self)
+        if not index.isValid():
+            return QModelIndex()
+        return self.indexFor(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self.nodeFor(parent)
+        return len(node.children) if node is not None and node.children is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.nodeFor(parent)
+        return node is not None and node.isDir and (node.children is None or bool(node.children))
+
+    def canFetchMore(self, parent):
+        node = self.nodeFor(parent)
+        return node is not None and node.isDir and node.children is None and node.pending is None
+
+    def fetchMore(self, parent):
+        node = self.nodeFor(parent)
+        if node is not None and node.isDir and node.children is None:
+            self.load(node)
+
+
+    def load(self, node):
+        # A listagem roda no DirectoryLister e chega em lotes; a view mostra o que já chegou
+        node.children = []
+        node.byName = {}
+        self.request(node, refresh=False)
+
+    def refresh(self, node):
+        if node.children is not None and node.pending is None:
+            self.request(node, refresh=True)
+
+    def request(self, node, refresh):
+        self.tokens += 1
+        node.pending = self.tokens
+        self.requests[self.tokens] = (node, refresh)
+        self.lister.submit(self.tokens, node.path, self.rules, self.descending, not refresh)
+
+    def onListed(self, token, entries, done):
+        node, refresh = self.requests.get(token, (None, False))
+        if node is None or node.pending != token:
+            return
+        if done:
+            del self.requests[token]
+            node.pending = None
+        if refresh:
+            self.applyListing(node, entries)
+        elif entries:
+            first = len(node.children)
+            self.beginInsertRows(self.indexFor(node), first, first + len(entries) - 1)
+            self.appendChildren(node, entries)
+            self.endInsertRows()
+        if done:
+            self.watchNode(node)
+            self.directoryLoaded.emit(node.path)
+
+    def appendChildren(self, node, entries):
+        for name, isDir in entries:
+            child = TreeNode(os.path.join(node.path, name), isDir, node, len(node.children))
+            node.children.append(child)
+            node.byName[name] = child
+
+    def applyListing(self, node, entries):
+        # Aplica uma listagem nova como remoções e inserções, preservando a seleção e a expansão do resto
+        parent = self.indexFor(node)
+        wanted = dict(entries)
+        row = len(node.children) - 1
+        while row >= 0:
+            child = node.children[row]
+            if wanted.get(child.name) == child.isDir:
+                row -= 1
+                continue
+            last = row
+            while row - 1 >= 0 and wanted.get(node.children[row - 1].name) != node.children[row - 1].isDir:
+                row -= 1
+            self.beginRemoveRows(parent, row, last)
+            for removed in node.children[row:last + 1]:
+                del node.byName[removed.name]
+                self.forget(removed)
+            del node.children[row:last + 1]
+            self.endRemoveRows()
+            row -= 1
+        self.renumber(node)
+
+        # Os filhos que sobraram precisam estar na ordem da listagem antes das inserções
+        order = {name: position for position, (name, isDir) in enumerate(entries)}
+        if any(order[a.name] > order[b.name] for a, b in zip(node.children, node.children[1:])):
+            self.layoutAboutToBeChanged.emit()
+            node.children.sort(key=lambda child: order[child.name])
+            self.renumber(node)
+            old = self.persistentIndexList()
+            self.changePersistentIndexList(old, [self.createIndex(index.internalPointer().row, index.column(), index.internalPointer())
+                                                 for index in old])
+            self.layoutChanged.emit()
+
+        row = 0
+        while row < len(entries):
+            if row < len(node.children) and node.children[row].name == entries[row][0]:
+                row += 1
+                continue
+            end = row
+            while end < len(entries) and entries[end][0] not in node.byName:
+                end += 1
+            self.beginInsertRows(parent, row, end - 1)
+            new = [TreeNode(os.path.join(node.path, name), isDir, node) for name, isDir in entries[row:end]]
+            node.children[row:row] = new
+            node.byName.update((child.name, child) for child in new)
+            self.renumber(node)
+            self.endInsertRows()
+            row = end
+
+    def forget(self, node):
+        # Nós removidos não podem mais receber listagens nem ocupar watches
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            current.pending = None
+            if self.watched.pop(current.path, None) is not None:
+                self.watcher.unwatchDirectories([current.path])
+            pending.extend(current.children or [])
+
+    def renumber(self, node):
+        for row, child in enumerate(node.children):
+            child.row = row
+
+    def seed(self, path, entries):
+        # Listagem em cache da sessão anterior: a árvore aparece sem ir ao disco e o WorkspaceValidator confere depois
+        node = self.nodeForPath(path, load=False)
+        if node is None or not node.isDir or (node.children is not None and node.pending is None):
+            return
+        if node.pending is not None:
+            self.requests.pop(node.pending, None)
+            node.pending = None
+        if node.children is None:
+            node.children = []
+        self.applyListing(node, arrangeEntries(node.path, [tuple(entry) for entry in entries], self.rules, self.descending))
+        self.watchNode(node)
+        self.directoryLoaded.emit(node.path)
+
+    def refreshPath(self, path):
+        node = self.nodeForPath(path, load=False)
+        if node is not None and node.isDir:
+            self.refresh(node)
+
+    def ensureLoaded(self, node):
+        # index(path) precisa da resposta agora: lista na própria thread e descarta o pedido em andamento
+        if node.children is not None and node.pending is None:
+            return
+        if node.pending is not None:
+            self.requests.pop(node.pending, None)
+            node.pending = None
+        if node.children is None:
+            node.children = []
+        self.applyListing(node, listDirectory(node.path, self.rules, self.descending))
+        self.watchNode(node)
+        self.directoryLoaded.emit(node.path)
+
+    def nodeForPath(self, path, load=True):
+        if self.root is None:
+            return None
+        path = os.path.abspath(path)
+        if path == self.root.path:
+            return self.root
+        if not path.startswith(os.path.join(self.root.path, '')):
+            return None
+        node = self.root
+        for part in os.path.relpath(path, self.root.path).split(os.sep):
+            if load:
+                self.ensureLoaded(node)
+            elif node.children is None:
+                return None
+            child = node.byName.get(part)
+            full = os.path.join(node.path, part)
+            if child is None and load and os.path.exists(full) and self.rules.filter(node.path, [(part, os.path.isdir(full))]):
+                # Criado há pouco e o watch ainda não avisou
+                self.applyListing(node, listDirectory(node.path, self.rules, self.descending))
+                child = node.byName.get(part)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def watchNode(self, node):
+        if node.path in self.watched:
+            self.watched.move_to_end(node.path)
+            return
+        while len(self.watched) >= MAX_WATCHED_DIRS:
+            # Sem watch a listagem pode ficar velha; é refeita quando o diretório for aberto de novo
+            path, evicted = self.watched.popitem(last=False)
+            self.watcher.unwatchDirectories([path])
+            evicted.stale = True
+        self.watched[node.path] = node
+        self.watcher.watchDirectories([node.path])
+
+    def touch(self, index):
+        # Chamado quando a view expande um diretório já carregado
+        node = self.nodeFor(index)
+        if node is None or node.children is None:
+            return
+        if node.stale:
+            node.stale = False
+            self.refresh(node)
+        self.watchNode(node)
+
+    def onDirectoriesChanged(self, directories):
+        for directory in directories:
+            node = self.watched.get(directory)
+            if node is None:
+                continue
+            if self.rules.changed(os.path.join(directory, '.gitignore')):
+                self.refreshAll(node)
+            else:
+                self.refresh(node)
+
+    def refreshAll(self, node=None):
+        pending = [node or self.root]
+        while pending:
+            current = pending.pop()
+            if current is None or current.children is None:
+                continue
+            self.refresh(current)
+            pending.extend(child for child in current.children if child.isDir)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        descending = order == Qt.DescendingOrder
+        if descending == self.descending or self.root is None:
+            return
+        self.descending = descending
+        self.layoutAboutToBeChanged.emit()
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            if node.children is None:
+                continue
+            node.children.sort(key=lambda child: (child.name.lower(), child.name), reverse=descending)
+            node.children.sort(key=lambda child: not child.isDir)
+            self.renumber(node)
+            pending.extend(node.children)
+        old = self.persistentIndexList()
+        self.changePersistentIndexList(old, [self.createIndex(index.internalPointer().row, index.column(), index.internalPointer())
+                                             for index in old])
+        self.layoutChanged.emit()
+
+    def filePath(self, index):
+        node = self.nodeFor(index)
+        return node.path if node is not None else ''
+
+    def isDir(self, index):
+        node = self.nodeFor(index)
+        return node is not None and node.isDir
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+        return flags | Qt.ItemIsDropEnabled if index.internalPointer().isDir else flags
+
+    def mimeTypes(self):
+        return ['text/uri-list']
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        data.setUrls([QUrl.fromLocalFile(self.filePath(index)) for index in indexes if index.column() == 0])
+        return data
+
+    def supportedDragActions(self):
+        return Qt.CopyAction | Qt.MoveAction
+
+    def supportedDropActions(self):
+        return Qt.CopyAction | Qt.MoveAction
+
+    def setThumbnailLoader(self, loader):
+        if self.thumbnailLoader is not None:
+            self.thumbnailLoader.thumbnailReady.disconnect(self.onThumbnailReady)
+        self.thumbnailLoader = loader
+        self.thumbnails = {}
+        if loader is not None:
+            loader.thumbnailReady.connect(self.onThumbnailReady)
+
+    def requestThumbnails(self, paths):
+        if self.thumbnailLoader is not None:
+            self.thumbnailLoader.request([path for path in paths if path not in self.thumbnails])
+
+    def onThumbnailReady(self, path, image):
+        # Ícones da árvore são pequenos; guardar a miniatura inteira só gastaria memória
+        self.thumbnails[path] = QIcon(QPixmap.fromImage(image.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation)))
+        node = self.nodeForPath(path, load=False)
+        if node is not None and node is not self.root:
+            index = self.indexFor(node)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.DecorationRole:
+            if node.isDir:
+                return self.folderIcon
+            if self.thumbnailLoader is not None and node.path in self.thumbnails:
+                return self.thumbnails[node.path]
+            return self.icon_map.get(os.path.splitext(node.name)[1], self.fileIcon)
+        if role == Qt.ToolTipRole:
+            return node.path
+        return None
+
+class GalleryModel(QAbstractListModel):
+    MAX_PIXMAPS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self.rows = {}
+        # LRU: miniaturas longe da tela são descartadas e recarregadas do cache em disco
+        self.pixmaps = collections.OrderedDict()
+        self.placeholder = QIcon('img/image.png')
+
+    def setPaths(self, paths):
+        self.beginResetModel()
+        self.paths = paths
+        self.rows = {path: row for row, path in enumerate(paths)}
+        self.pixmaps.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.paths[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.DecorationRole:
+            pixmap = self.pixmaps.get(path)
+            if pixmap is None:
+                return self.placeholder
+            self.pixmaps.move_to_end(path)
+            return pixmap
+        if role == Qt.ToolTipRole:
+            return path
+        return None
+
+    def hasThumbnail(self, path):
+        return path in self.pixmaps
+
+    def setThumbnail(self, path, pixmap):
+        row = self.rows.get(path)
+        if row is None:
+            return
+        self.pixmaps[path] = pixmap
+        self.pixmaps.move_to_end(path)
+        while len(self.pixmaps) > self.MAX_PIXMAPS:
+            self.pixmaps.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class ImageGallery(QWidget):
+    openImage = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.directory = ''
+        self.model = GalleryModel(self)
+        self.loader = ThumbnailLoader(self)
+        self.loader.thumbnailReady.connect(self.onThumbnailReady)
+
+        self.header = QLabel()
+        self.header.setStyleSheet("color: #e0e0ff; padding: 4px;")
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setWordWrap(True)
+        self.view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.view.setGridSize(QSize(THUMBNAIL_SIZE + 24, THUMBNAIL_SIZE + 40))
+        self.view.setStyleSheet("background-color: #1e1e3e; color: #e0e0ff;")
+        self.view.activated.connect(lambda index: self.openImage.emit(self.model.paths[index.row()]))
+
+        # Só as miniaturas da área visível são pedidas, depois que a rolagem assenta
+        self.visibleTimer = QTimer(self)
+        self.visibleTimer.setSingleShot(True)
+        self.visibleTimer.timeout.connect(self.requestVisible)
+        self.view.verticalScrollBar().valueChanged.connect(lambda: self.visibleTimer.start(50))
+        self.view.viewport().installEventFilter(self)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.header)
+        layout.addWidget(self.view)
+
+    def setDirectory(self, directory):
+        self.directory = directory
+        try:
+            with os.scandir(directory) as entries:
+                paths = [entry.path for entry in entries if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()]
+        except OSError:
+            paths = []
+        paths.sort(key=lambda path: os.path.basename(path).lower())
+        self.model.setPaths(paths)
+        self.header.setText(f"{len(paths)} images in {directory}")
+        self.visibleTimer.start(0)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Resize, QEvent.Show):
+            self.visibleTimer.start(50)
+        return super().eventFilter(obj, event)
+
+    def visibleRows(self):
+        # Com itens de tamanho uniforme o layout é monotônico, então a busca binária basta
+        rect = self.view.viewport().rect()
+        count = self.model.rowCount()
+        rowRect = lambda row: self.view.visualRect(self.model.index(row))
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if rowRect(middle).bottom() < rect.top():
+                low = middle + 1
+            else:
+                high = middle
+        first = low
+        high = count
+        while low < high:
+            middle = (low + high) // 2
+            if rowRect(middle).top() <= rect.bottom():
+                low = middle + 1
+            else:
+                high = middle
+        return range(first, low)
+
+    def requestVisible(self):
+        rows = self.visibleRows()
+        # Uma linha extra de cada lado deixa a rolagem curta já pronta
+        columns = max(1, self.view.viewport().width() // self.view.gridSize().width())
+        rows = range(max(0, rows.start - columns), min(self.model.rowCount(), rows.stop + columns))
+        self.loader.request([self.model.paths[row] for row in rows if not self.model.hasThumbnail(self.model.paths[row])])
+
+    def onThumbnailReady(self, path, image):
+        self.model.setThumbnail(path, QPixmap.fromImage(image))
+
+    def stop(self):
+        self.loader.stop()
+
+HEX_BYTES_PER_ROW = 16
+
+class HexView(QAbstractScrollArea):
+    # Pinta só as linhas visíveis direto do mmap: a memória não depende do tamanho do arquivo
+    offsetSelected = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = None
+        self.size = 0
+        self.rows = 0
+        self.scale = 1
+        self.selection = (0, 0)
+        self.setFont(QFont('Consolas', 10))
+        self.viewport().setStyleSheet("background-color: #00091a;")
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def setData(self, data, size):
+        self.data = data
+        self.size = size
+        self.rows = (size + HEX_BYTES_PER_ROW - 1) // HEX_BYTES_PER_ROW
+        # A barra de rolagem é int32: acima de 2^30 linhas cada passo vale várias linhas
+        self.scale = self.rows // 0x40000000 + 1
+        start, end = self.selection
+        self.selection = (min(start, size), min(end, size))
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def setFont(self, font):
+        font.setStyleHint(QFont.Monospace)
+        super().setFont(font)
+        metrics = QFontMetrics(font)
+        self.charWidth = metrics.horizontalAdvance('0')
+        self.lineHeight = metrics.height()
+        self.ascent = metrics.ascent()
+
+    def offsetDigits(self):
+        return max(8, len(f'{max(self.size - 1, 0):X}'))
+
+    def hexColumn(self):
+        return self.offsetDigits() + 2
+
+    def asciiColumn(self):
+        return self.hexColumn() + HEX_BYTES_PER_ROW * 3 + 2
+
+    def byteColumn(self, byte):
+        # Espaço extra entre as duas metades da linha
+        return self.hexColumn() + byte * 3 + (1 if byte >= HEX_BYTES_PER_ROW // 2 else 0)
+
+    def visibleRows(self):
+        return max(1, self.viewport().height() // self.lineHeight)
+
+    def topRow(self):
+        return self.verticalScrollBar().value() * self.scale
+
+    def updateScrollBars(self):
+        visible = self.visibleRows()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.rows - visible) // self.scale + (1 if self.scale > 1 else 0))
+        vertical.setPageStep(max(1, visible // self.scale))
+        vertical.setSingleStep(1)
+        width = (self.asciiColumn() + HEX_BYTES_PER_ROW + 1) * self.charWidth
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, width - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateScrollBars()
+
+    def scrollToOffset(self, offset):
+        row = offset // HEX_BYTES_PER_ROW
+        top = self.topRow()
+        visible = self.visibleRows()
+        if not top <= row < top + visible:
+            self.verticalScrollBar().setValue(max(0, row - visible // 2) // self.scale)
+
+    def select(self, start, end):
+        self.selection = (start, end)
+        self.scrollToOffset(start)
+        self.viewport().update()
+        self.offsetSelected.emit(start)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), QColor('#00091a'))
+        if self.data is None:
+            return
+        painter.setFont(self.font())
+        cw = self.charWidth
+        left = -self.horizontalScrollBar().value()
+        digits = self.offsetDigits()
+        half = HEX_BYTES_PER_ROW // 2
+        selectionStart, selectionEnd = self.selection
+        top = self.topRow()
+        for line in range(self.visibleRows() + 1):
+            row = top + line
+            if row >= self.rows:
+                break
+            start = row * HEX_BYTES_PER_ROW
+            chunk = self.data[start:start + HEX_BYTES_PER_ROW]
+            y = line * self.lineHeight
+            # Seleção (ocorrência da busca) pintada por baixo do texto, nas duas colunas
+            low, high = max(selectionStart, start), min(selectionEnd, start + len(chunk))
+            if low < high:
+                first, last = low - start, high - start - 1
+                painter.fillRect(left + self.byteColumn(first) * cw, y, (self.byteColumn(last) - self.byteColumn(first) + 2) * cw,
+                                 self.lineHeight, QColor('#2a4a7a'))
+                painter.fillRect(left + (self.asciiColumn() + first) * cw, y, (last - first + 1) * cw, self.lineHeight, QColor('#2a4a7a'))
+            baseline = y + self.ascent
+            painter.setPen(QColor('#6a7fa8'))
+            painter.drawText(left, baseline, f'{start:0{digits}X}')
+            painter.setPen(QColor('#c9dcff'))
+            hexText = chunk[:half].hex(' ').upper()
+            if len(chunk) > half:
+                hexText += '  ' + chunk[half:].hex(' ').upper()
+            painter.drawText(left + self.hexColumn() * cw, baseline, hexText)
+            painter.setPen(QColor('#9ece6a'))
+            painter.drawText(left + self.asciiColumn() * cw, baseline,
+                             ''.join(chr(b) if 0x20 <= b < 0x7F else '.' for b in chunk))
+
+    def offsetAt(self, pos):
+        row = self.topRow() + pos.y() // self.lineHeight
+        column = (pos.x() + self.horizontalScrollBar().value()) // self.charWidth
+        if column >= self.asciiColumn():
+            byte = column - self.asciiColumn()
+        else:
+            byte = next((b for b in reversed(range(HEX_BYTES_PER_ROW)) if column >= self.byteColumn(b)), 0)
+        if byte >= HEX_BYTES_PER_ROW:
+            return None
+        offset = row * HEX_BYTES_PER_ROW + byte
+        return offset if offset < self.size else None
+
+    def mousePressEvent(self, event):
+        offset = self.offsetAt(event.pos())
+        if offset is not None:
+            self.select(offset, offset + 1)
+
+    def keyPressEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier and event.key() == Qt.Key_Home:
+            self.verticalScrollBar().setValue(0)
+        elif event.modifiers() & Qt.ControlModifier and event.key() == Qt.Key_End:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        else:
+            super().keyPressEvent(event)
+
+class HexViewer(QWidget):
+    SEARCH_WINDOW = 32 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.mapped = None
+        self.searching = None
+        # A busca avança uma janela por vez para não travar a interface em arquivos de vários GB
+        self.searchTimer = QTimer(self)
+        self.searchTimer.timeout.connect(self.searchStep)
+
+        self.offsetEdit = QLineEdit()
+        self.offsetEdit.setPlaceholderText('Go to offset (0x1F40, 8000, +16, -0x10)')
+        self.offsetEdit.returnPressed.connect(self.jump)
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText('Search bytes (Enter = next, Shift+Enter = previous)')
+        self.searchEdit.returnPressed.connect(lambda: self.search(not QApplication.keyboardModifiers() & Qt.ShiftModifier))
+        self.searchMode = QComboBox()
+        self.searchMode.addItems(['Hex', 'Text'])
+        self.statusLabel = QLabel()
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+
+        bar = QHBoxLayout()
+        bar.addWidget(self.offsetEdit, 1)
+        bar.addWidget(self.searchEdit, 2)
+        bar.addWidget(self.searchMode)
+        bar.addWidget(self.statusLabel)
+
+        self.view = HexView()
+        self.view.offsetSelected.connect(self.showOffset)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(bar)
+        layout.addWidget(self.view)
+
+    def open(self, path):
+        self.close()
+        self.path = path
+        self.view.selection = (0, 0)
+        self.view.verticalScrollBar().setValue(0)
+        self.reload()
+
+    def reload(self):
+        # Arquivo alterado em disco: remapeia mantendo a posição (truncar um arquivo mapeado gera SIGBUS)
+        self.stopSearch()
+        if self.mapped is not None:
+            self.view.data = None
+            self.mapped.close()
+            self.mapped = None
+        size = 0
+        try:
+            with open(self.path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size:
+                    self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self.statusLabel.setText(f'Cannot map file: {e}')
+            return
+        self.view.setData(self.mapped, size)
+        self.statusLabel.setText(f'{size:,} bytes')
+
+    def close(self):
+        self.stopSearch()
+        self.view.setData(None, 0)
+        if self.mapped is not None:
+            self.mapped.close()
+        self.mapped = None
+        self.path = None
+
+    def showOffset(self, offset):
+        self.statusLabel.setText(f'Offset 0x{offset:X} ({offset:,}) of {self.view.size:,} bytes')
+
+    def jump(self):
+        text = self.offsetEdit.text().strip().replace('_', '')
+        relative = text[:1] in ('+', '-')
+        try:
+            offset = int(text, 0)
+        except ValueError:
+            try:
+                offset = int(text, 16)
+            except ValueError:
+                self.statusLabel.setText(f"Invalid offset '{text}'")
+                return
+        if relative:
+            offset += self.view.selection[0]
+        if not 0 <= offset < self.view.size:
+            self.statusLabel.setText(f'Offset out of range (0-0x{max(self.view.size - 1, 0):X})')
+            return
+        self.view.select(offset, offset + 1)
+        self.view.setFocus()
+
+    def pattern(self):
+        text = self.searchEdit.text()
+        if self.searchMode.currentText() == 'Text':
+            return text.encode('utf-8')
+        return bytes.fromhex(text.replace('0x', '').replace(',', ' '))
+
+    def search(self, forward=True):
+        if self.mapped is None or not self.searchEdit.text():
+            return
+        try:
+            pattern = self.pattern()
+        except ValueError:
+            self.statusLabel.setText('Hex patterns are byte pairs, e.g. 7F 45 4C 46')
+            return
+        self.stopSearch()
+        self.searching = (pattern, self.searchWindows(pattern, forward, self.view.selection[0]))
+        self.searchTimer.start(0)
+
+    def searchWindows(self, pattern, forward, cursor):
+        # Da seleção até o fim (ou o começo) e depois dá a volta; rende None a cada janela varrida
+        size = len(self.mapped)
+        window = self.SEARCH_WINDOW
+        overlap = len(pattern) - 1
+        if forward:
+            ranges = [(cursor + 1, size), (0, min(size, cursor + len(pattern)))]
+        else:
+            ranges = [(0, min(size, cursor + overlap)), (cursor, size)]
+        for start, end in ranges:
+            while start < end:
+                if forward:
+                    low, high = start, min(end, start + window + overlap)
+                    found = self.mapped.find(pattern, low, high)
+                    start += window
+                else:
+                    low, high = max(start, end - window), end
+                    found = self.mapped.rfind(pattern, low, high)
+                    end = low + overlap if low > start else low
+                self.releasePages(low, high)
+                if found >= 0:
+                    yield found
+                    return
+                yield None
+
+    def releasePages(self, start, end):
+        # Páginas já varridas saem do processo (continuam no cache do SO): o RSS não cresce com o arquivo
+        if not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        start -= start % mmap.PAGESIZE
+        try:
+            self.mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+        except (OSError, ValueError):
+            pass
+
+    def searchStep(self):
+        pattern, windows = self.searching
+        found = next(windows, -1)
+        if found is None:
+            self.statusLabel.setText(f"Searching '{self.searchEdit.text()}'...")
+            return
+        self.stopSearch()
+        if found < 0:
+            self.statusLabel.setText(f"'{self.searchEdit.text()}' not found")
+        else:
+            self.view.select(found, found + len(pattern))
+
+    def stopSearch(self):
+        self.searchTimer.stop()
+        self.searching = None
+
+# Tempos acumulados por slot: nome -> [chamadas, tempo total, tempo máximo]
+SLOT_TIMINGS = {}
+
+def timedSlot(func):
+    name = func.__name__
+    code = func.__code__
+    # O PyQt entrega todos os argumentos do sinal ao wrapper, então cortamos
+    # para a quantidade que o slot original aceita (ex.: triggered(bool) -> runCode(self))
+    max_args = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if max_args is not None:
+            args = args[:max_args]
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = SLOT_TIMINGS.get(name)
+            if stats is None:
+                stats = SLOT_TIMINGS[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+    return wrapper
+
+def lowerProcessPriority():
+    # Inicializador dos processos de verificação em segundo plano
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+class ProjectProblemsScanner(QThread):
+    problemsFound = pyqtSignal(dict)
+    progressChanged = pyqtSignal(int, int)
+    directoriesScanned = pyqtSignal(list)
+
+    FULL_SCAN = 'full'
+    STOP = 'stop'
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.requests = queue.Queue()
+        self.stopped = False
+        self.requests.put(self.FULL_SCAN)
+
+    def rescan(self):
+        self.requests.put(self.FULL_SCAN)
+
+    def enqueue(self, paths):
+        self.requests.put(set(paths))
+
+    def enqueueDirectory(self, directory):
+        # Expandido na thread de varredura, que conhece os arquivos já indexados
+        self.requests.put({directory})
+
+    def stop(self):
+        self.stopped = True
+        self.requests.put(self.STOP)
+        self.wait()
+
+    def run(self):
+        self.cache = LintCache(self.root)
+        pool = self.createPool()
+        try:
+            while not self.stopped:
+                request = self.requests.get()
+                full = request == self.FULL_SCAN
+                paths = set() if full or request == self.STOP else set(request)
+                # Junta as requisições acumuladas em uma única passada
+                while True:
+                    try:
+                        extra = self.requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if extra == self.STOP:
+                        request = extra
+                    elif extra == self.FULL_SCAN:
+                        full = True
+                    else:
+                        paths.update(extra)
+                if request == self.STOP or self.stopped:
+                    break
+                if full:
+                    paths = self.scanTree()
+                else:
+                    paths = self.expandDirectories(paths)
+                try:
+                    self.lintPaths(pool, paths)
+                except concurrent.futures.process.BrokenProcessPool:
+                    # Um worker morreu; os arquivos pendentes serão verificados na próxima passada
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.createPool()
+                self.cache.save()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def createPool(self):
+        # 'spawn' evita herdar as threads do Qt em um fork
+        workers = max(1, (os.cpu_count() or 2) // 2)
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                      initializer=lowerProcessPriority)
+
+    def expandDirectories(self, paths):
+        expanded = set()
+        for path in paths:
+            if os.path.isdir(path):
+                try:
+                    expanded.update(os.path.join(path, name) for name in os.listdir(path))
+                except OSError:
+                    pass
+                # Arquivos removidos do diretório também precisam sair do modelo
+                expanded.update(known for known in self.cache.entries if os.path.dirname(known) == path)
+            else:
+                expanded.add(path)
+        return expanded
+
+    def scanTree(self):
+        paths = set()
+        directories = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if self.stopped:
+                break
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            found = False
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() in SYNTAX_CHECKERS:
+                    paths.add(os.path.join(dirpath, name))
+                    found = True
+            if found:
+                directories.append(dirpath)
+        self.directoriesScanned.emit(directories)
+        # Arquivos que estavam no cache mas não existem mais
+        paths.update(self.cache.entries)
+        return paths
+
+    def lintPaths(self, pool, paths):
+        batch = {}
+        lastEmit = time.perf_counter()
+        total = len(paths)
+        done = 0
+        futures = {}
+
+        for path in paths:
+            if self.stopped:
+                return
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            if st is None:
+                self.cache.remove(path)
+                batch[path] = []
+                done += 1
+                continue
+            if os.path.splitext(path)[1].lower() not in SYNTAX_CHECKERS:
+                done += 1
+                continue
+            diagnostics = self.cache.lookup(path, st)
+            if diagnostics is not None:
+                batch[path] = diagnostics
+                done += 1
+            else:
+                futures[pool.submit(lintFile, path, self.cache.knownHash(path))] = (path, st)
+
+        for future in concurrent.futures.as_completed(futures):
+            if self.stopped:
+                return
+            path, st = futures[future]
+            done += 1
+            try:
+                digest, diagnostics = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                raise
+            except Exception as e:
+                digest, diagnostics = None, [{'line': 1, 'column': 1, 'message': f'Checker failed: {e}'}]
+            if diagnostics is None:
+                diagnostics = self.cache.entries[path]['diagnostics']
+            if digest:
+                self.cache.store(path, st, digest, diagnostics)
+            batch[path] = diagnostics
+
+            now = time.perf_counter()
+            if now - lastEmit > 0.25:
+                self.problemsFound.emit(batch)
+                self.progressChanged.emit(done, total)
+                batch = {}
+                lastEmit = now
+
+        if batch:
+            self.problemsFound.emit(batch)
+        self.progressChanged.emit(total, total)
+
+class ProjectProblemsModel(QAbstractTableModel):
+    HEADERS = ['File', 'Line', 'Message']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = ''
+        self.byPath = {}
+        self.rows = []
+        # Caminho de cada linha, em ordem: a faixa de um arquivo sai de uma busca binária
+        self.rowPaths = []
+
+    def setRoot(self, root):
+        self.beginResetModel()
+        self.root = root
+        self.byPath = {}
+        self.rows = []
+        self.rowPaths = []
+        self.endResetModel()
+
+    def updateFiles(self, batch):
+        # Só as linhas dos arquivos do lote mudam: seleção e rolagem da view (e do filtro) continuam onde estavam
+        for path, diagnostics in batch.items():
+            first = bisect.bisect_left(self.rowPaths, path)
+            last = bisect.bisect_right(self.rowPaths, path)
+            rows = [(path, d['line'], d['message']) for d in diagnostics or []]
+            if rows == self.rows[first:last]:
+                continue
+            if last > first:
+                self.beginRemoveRows(QModelIndex(), first, last - 1)
+                del self.rows[first:last]
+                del self.rowPaths[first:last]
+                self.endRemoveRows()
+            if rows:
+                self.byPath[path] = diagnostics
+                self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+                self.rows[first:first] = rows
+                self.rowPaths[first:first] = [path] * len(rows)
+                self.endInsertRows()
+            else:
+                self.byPath.pop(path, None)
+
+    def fileCount(self):
+        return len(self.byPath)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, line, message = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return os.path.relpath(path, self.root) if self.root else path
+            if index.column() == 1:
+                return line
+            return message
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.UserRole:
+            return path, line
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+class ProjectProblemsPanel(QWidget):
+    openLocation = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = ProjectProblemsModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(-1)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.filterEdit = QLineEdit()
+        self.filterEdit.setPlaceholderText('Filter by file or message...')
+        self.filterEdit.textChanged.connect(self.proxy.setFilterFixedString)
+        self.statusLabel = QLabel()
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+
+        header = QHBoxLayout()
+        header.addWidget(self.filterEdit, 1)
+        header.addWidget(self.statusLabel)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.setStyleSheet("background-color: #00093a; color: #ff8c8c;")
+        self.table.doubleClicked.connect(self.onDoubleClicked)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(header)
+        layout.addWidget(self.table)
+
+    def onProgress(self, done, total):
+        state = 'Scanning' if done < total else 'Scanned'
+        self.statusLabel.setText(f"{state} {done}/{total} files | {len(self.model.rows)} problems in {self.model.fileCount()} files")
+
+    def onDoubleClicked(self, index):
+        path, line = self.proxy.data(index, Qt.UserRole)
+        self.openLocation.emit(path, line)
+
+# Executado com "python -c": roda o alvo num filho com os rlimits e grava o rusage dele (wait4) em JSON
+PROCESS_LAUNCHER = '''
+import os, sys, json, time, signal, resource
+memory_mb, cpu_seconds, metrics_path = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+parent = os.getpid()
+started = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    if sys.platform.startswith('linux'):
+        import ctypes
+        ctypes.CDLL(None).prctl(1, signal.SIGKILL)  # PR_SET_PDEATHSIG: morre junto se o launcher levar SIGKILL
+        if os.getppid() != parent:
+            os._exit(1)
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds > 0:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    try:
+        os.execvp(sys.argv[4], sys.argv[4:])
+    except OSError as error:
+        sys.stderr.write(sys.argv[4] + ": " + error.strerror + "\\n")
+        os._exit(127)
+for number in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+    signal.signal(number, lambda number, frame: os.kill(pid, number))
+_, status, usage = os.wait4(pid, 0)
+peak_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+with open(metrics_path, 'w') as f:
+    json.dump({'wall': time.perf_counter() - started, 'user': usage.ru_utime, 'sys': usage.ru_stime, 'peak_kb': peak_kb}, f)
+if os.WIFSIGNALED(status):
+    signal.signal(os.WTERMSIG(status), signal.SIG_DFL)
+    os.kill(os.getpid(), os.WTERMSIG(status))
+sys.exit(os.WEXITSTATUS(status))
+'''
+
+# Executado com "python -c": sessão persistente que roda células enviadas pela IDE no mesmo namespace.
+# Cada bloco chega no stdin como um cabeçalho JSON (path, line, size) seguido do código; o fim de cada
+# execução é sinalizado com "\x1e<token> <estado>" no stdout.
+PYTHON_KERNEL = '''
+import ast, io, os, sys, json, signal, traceback
+token = sys.argv[1]
+control = os.fdopen(os.dup(0), 'rb')
+sys.stdin = io.StringIO()
+namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+
+def finish(status):
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.__stdout__.write('\\x1e' + token + ' ' + status + '\\n')
+    sys.__stdout__.flush()
+
+finish('ready')
+while True:
+    try:
+        header = control.readline()
+        if not header:
+            break
+        request = json.loads(header)
+        code = control.read(request['size']).decode('utf-8')
+    except KeyboardInterrupt:
+        continue
+    filename = request['path'] or '<cell>'
+    try:
+        if request['path']:
+            namespace['__file__'] = request['path']
+        # Linhas em branco antes do código: os tracebacks apontam a linha certa do editor
+        tree = ast.parse('\\n' * request['line'] + code, filename)
+        last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+        exec(compile(tree, filename, 'exec'), namespace)
+        if last is not None:
+            value = eval(compile(ast.Expression(last.value), filename, 'eval'), namespace)
+            if value is not None:
+                namespace['_'] = value
+                print(repr(value))
+        finish('ok')
+    except SyntaxError as error:
+        sys.stderr.write(''.join(traceback.format_exception_only(type(error), error)))
+        finish('error')
+    except BaseException as error:
+        # O primeiro quadro é o próprio kernel
+        traceback.print_exception(type(error), error, error.__traceback__.tb_next)
+        finish('interrupted' if isinstance(error, KeyboardInterrupt) else 'error')
+'''
+
+# Linhas mantidas em cada aba de saída das execuções
+RUN_BUFFER_LINES = 5000
+# Tempo que um programa tem para tratar o SIGTERM antes do SIGKILL
+RUN_KILL_DELAY_MS = 2000
+
+class StreamDecoder:
+    # Decodifica a saída incrementalmente; cai para cp1252 se o programa não emitir UTF-8
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def decode(self, data, final=False):
+        try:
+            return self.decoder.decode(data, final)
+        except UnicodeDecodeError:
+            self.decoder = codecs.getincrementaldecoder('cp1252')(errors='replace')
+            return self.decoder.decode(data, final)
+
+# Logs completos das execuções em disco; as abas guardam só o final da saída
+RUN_LOGS_DIR = os.path.join(CACHE_DIR, 'runs')
+RUN_LOG_KEEP = 30
+RUN_LOG_MAX_BYTES = 4 * 1024 * 1024 * 1024
+RUN_LOG_STDERR = 1 << 63
+# Uma linha sem \n (barra de progresso com \r, saída binária) vai para o disco ao passar deste tamanho
+RUN_LOG_MAX_LINE = 64 * 1024
+
+class RunLog:
+    # <id>.log guarda as linhas; <id>.idx o offset de início de cada linha (uint64, bit alto = stderr); <id>.json os metadados
+    counter = 0
+
+    def __init__(self, name, command, directory=None):
+        self.directory = directory or RUN_LOGS_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        RunLog.counter += 1
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{RunLog.counter}"
+        self.path = os.path.join(self.directory, self.id + '.log')
+        self.indexPath = os.path.join(self.directory, self.id + '.idx')
+        self.metaPath = os.path.join(self.directory, self.id + '.json')
+        self.file = open(self.path, 'wb')
+        self.index = open(self.indexPath, 'wb')
+        self.offset = 0
+        self.lines = 0
+        self.partial = [bytearray(), bytearray()]
+        self.meta = {'id': self.id, 'name': name, 'command': command, 'started': time.time(), 'finished': None,
+                     'status': 'Running', 'lines': 0, 'bytes': 0, 'truncated': False}
+        self.writeMeta()
+        RunLog.prune(self.directory)
+
+    def write(self, data, stderr=False):
+        # Linhas incompletas esperam o resto para que stdout e stderr não se misturem no meio de uma linha
+        if self.file is None or not data:
+            return
+        channel = int(stderr)
+        partial = self.partial[channel]
+        end = data.rfind(b'\n') + 1
+        if end:
+            partial += data[:end]
+            self.writeLines(partial, channel)
+            del partial[:]
+        partial += data[end:]
+        if len(partial) >= RUN_LOG_MAX_LINE:
+            partial += b'\n'
+            self.writeLines(partial, channel)
+            del partial[:]
+        if end or not partial:
+            self.file.flush()
+            self.index.flush()
+
+    def writeLines(self, block, channel):
+        if self.offset + len(block) > RUN_LOG_MAX_BYTES:
+            self.meta['truncated'] = True
+            return
+        flag = RUN_LOG_STDERR if channel else 0
+        starts = [0]
+        starts += [match.end() for match in re.finditer(b'\n', block)][:-1]
+        # Dados antes do índice: um leitor nunca vê uma linha cujo conteúdo ainda não está no log
+        self.file.write(block)
+        self.index.write(array.array('Q', [(self.offset + start) | flag for start in starts]).tobytes())
+        self.offset += len(block)
+        self.lines += len(starts)
+
+    def close(self, status):
+        if self.file is None:
+            return
+        for channel, rest in enumerate(self.partial):
+            if rest:
+                rest += b'\n'
+                self.writeLines(rest, channel)
+        self.file.close()
+        self.index.close()
+        self.file = None
+        self.meta.update(finished=time.time(), status=status, lines=self.lines, bytes=self.offset)
+        self.writeMeta()
+
+    def writeMeta(self):
+        with atomicWrite(self.metaPath, 'w') as f:
+            json.dump(self.meta, f)
+
+    @staticmethod
+    def history(directory=None):
+        directory = directory or RUN_LOGS_DIR
+        runs = []
+        try:
+            names = [name for name in os.listdir(directory) if name.endswith('.json')]
+        except OSError:
+            return runs
+        for name in names:
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta['path'] = os.path.join(directory, meta['id'] + '.log')
+            runs.append(meta)
+        runs.sort(key=lambda meta: meta['started'], reverse=True)
+        return runs
+
+    @staticmethod
+    def prune(directory=None, keep=RUN_LOG_KEEP):
+        # Rotação: só as execuções mais recentes ficam no disco
+        for meta in RunLog.history(directory)[keep:]:
+            for ext in ('.log', '.idx', '.json', '.rusage'):
+                try:
+                    os.remove(os.path.join(directory or RUN_LOGS_DIR, meta['id'] + ext))
+                except OSError:
+                    pass
+
+class RunSession(QObject):
+    statusChanged = pyqtSignal(object)
+    runFinished = pyqtSignal(object)
+
+    def __init__(self, name, program, arguments, workingDirectory, limits=(0, 0), parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.title = name
+        self.program = program
+        self.arguments = list(arguments)
+        self.workingDirectory = workingDirectory
+        self.limits = limits
+        self.status = 'Idle'
+        self.restartPending = False
+        self.process = None
+        self.log = None
+        self.source = None
+        self.compileSeconds = None
+        self.metrics = None
+        self.metricsPath = None
+        self.startedAt = 0.0
+
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(RUN_BUFFER_LINES)
+        self.output.setStyleSheet("background-color: #00091a; color: #c9dcff;")
+        self.stdoutFormat = QTextCharFormat()
+        self.stdoutFormat.setForeground(QColor('#c9dcff'))
+        self.stderrFormat = QTextCharFormat()
+        self.stderrFormat.setForeground(QColor('#ff8c8c'))
+
+    def commandLine(self):
+        return ' '.join([self.program] + self.arguments)
+
+    def isRunning(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def start(self):
+        if self.isRunning():
+            return
+        self.stdoutDecoder = StreamDecoder()
+        self.stderrDecoder = StreamDecoder()
+        if self.process is not None:
+            self.process.deleteLater()
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.SeparateChannels)
+        if self.workingDirectory:
+            self.process.setWorkingDirectory(self.workingDirectory)
+        self.process.readyReadStandardOutput.connect(self.readStdout)
+        self.process.readyReadStandardError.connect(self.readStderr)
+        self.process.finished.connect(self.onFinished)
+        self.process.errorOccurred.connect(self.onError)
+
+        memory_mb, cpu_seconds = self.limits
+        self.log = RunLog(self.name, self.commandLine())
+        self.compileSeconds = None
+        self.metrics = None
+        self.appendText(f"$ {self.commandLine()}\n", self.stdoutFormat)
+        self.startedAt = time.perf_counter()
+        if os.name == 'posix':
+            # O launcher esconderia o "command not found" do QProcess
+            if not shutil.which(self.program):
+                self.onError(QProcess.FailedToStart)
+                return
+            if sys.platform.startswith('linux') and (memory_mb or cpu_seconds):
+                self.appendText(f"(limits: memory {memory_mb or '-'} MB, CPU {cpu_seconds or '-'} s)\n", self.stdoutFormat)
+            else:
+                memory_mb = cpu_seconds = 0
+            self.metricsPath = os.path.join(self.log.directory, self.log.id + '.rusage')
+            self.process.start(sys.executable, ['-c', PROCESS_LAUNCHER, str(memory_mb), str(cpu_seconds), self.metricsPath,
+                                                self.program] + self.arguments)
+        else:
+            self.metricsPath = None
+            self.process.start(self.program, self.arguments)
+        self.setStatus('Running')
+
+    def stop(self):
+        if self.isRunning():
+            self.process.terminate()
+            # Se o programa ignorar o SIGTERM, força o encerramento. O timer pertence a este QProcess:
+            # um restart cria outro processo, que não pode ser morto pelo timer do anterior
+            killTimer = QTimer(self.process)
+            killTimer.setSingleShot(True)
+            killTimer.timeout.connect(self.process.kill)
+            self.process.finished.connect(killTimer.stop)
+            killTimer.start(RUN_KILL_DELAY_MS)
+
+    def discard(self):
+        # Fecha a aba sem bloquear: mata o processo e só apaga os objetos quando ele terminar
+        # (o destrutor do QProcess esperaria o processo sair)
+        if self.isRunning():
+            self.process.finished.connect(self.discard)
+            self.process.kill()
+            return
+        self.output.deleteLater()
+        self.deleteLater()
+
+    def restart(self):
+        if self.isRunning():
+            self.restartPending = True
+            self.stop()
+        else:
+            self.output.clear()
+            self.start()
+
+    def write(self, text):
+        if self.isRunning():
+            self.process.write(text.encode('utf-8'))
+            self.appendText(text, self.stdoutFormat)
+
+    def appendText(self, text, fmt):
+        cursor = self.output.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text, fmt)
+        self.output.setTextCursor(cursor)
+        self.output.ensureCursorVisible()
+
+    def readStdout(self):
+        data = self.process.readAllStandardOutput().data()
+        self.log.write(data)
+        self.appendText(self.stdoutDecoder.decode(data), self.stdoutFormat)
+
+    def readStderr(self):
+        data = self.process.readAllStandardError().data()
+        self.log.write(data, stderr=True)
+        self.appendText(self.stderrDecoder.decode(data), self.stderrFormat)
+
+    def onError(self, error):
+        if error == QProcess.FailedToStart:
+            self.appendText(f"Failed to start {self.program}.\n", self.stderrFormat)
+            self.setStatus('Failed')
+            self.log.close('Failed')
+
+    def onFinished(self, exit_code, exit_status):
+        self.readStdout()
+        self.readStderr()
+        if self.restartPending:
+            status = 'Restarting'
+        elif exit_status == QProcess.CrashExit:
+            status = 'Crashed'
+            self.appendText("\nProcess crashed.\n", self.stderrFormat)
+        elif exit_code != 0:
+            status = f'Exit {exit_code}'
+            self.appendText(f"\nProcess finished with exit code {exit_code}.\n", self.stderrFormat)
+        else:
+            status = 'Finished'
+            self.appendText("\nProcess finished successfully.\n", self.stdoutFormat)
+        self.metrics = self.collectMetrics()
+        self.log.meta['metrics'] = self.metrics
+        self.log.close(status)
+        self.setStatus(status)
+        self.runFinished.emit(self)
+
+        if self.restartPending:
+            self.restartPending = False
+            self.output.clear()
+            self.start()
+
+    def collectMetrics(self):
+        # Sem o launcher (Windows) só o tempo de parede medido aqui é conhecido
+        metrics = {'wall': time.perf_counter() - self.startedAt, 'user': None, 'sys': None, 'peak_kb': None}
+        if self.metricsPath:
+            try:
+                with open(self.metricsPath, 'r') as f:
+                    metrics.update(json.load(f))
+                os.remove(self.metricsPath)
+            except (OSError, ValueError):
+                pass
+        metrics['compile'] = self.compileSeconds
+        return metrics
+
+    def setStatus(self, status):
+        self.status = status
+        self.statusChanged.emit(self)
+
+class RunSessionManager(QWidget):
+    openLog = pyqtSignal(str)
+    runFinished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sessions = []
+        self.memoryLimitMB = 0
+        self.cpuLimitSeconds = 0
+
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.tabCloseRequested.connect(self.closeSession)
+        self.tabs.currentChanged.connect(self.updateControls)
+
+        self.statusLabel = QLabel('No runs yet.')
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+        self.stopButton = QPushButton('Stop')
+        self.stopButton.clicked.connect(lambda: self.currentSession() and self.currentSession().stop())
+        self.restartButton = QPushButton('Restart')
+        self.restartButton.clicked.connect(lambda: self.currentSession() and self.currentSession().restart())
+        self.logButton = QPushButton('Full Log')
+        self.logButton.clicked.connect(lambda: self.currentSession() and self.currentSession().log and
+                                       self.openLog.emit(self.currentSession().log.path))
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.statusLabel, 1)
+        controls.addWidget(self.stopButton)
+        controls.addWidget(self.restartButton)
+        controls.addWidget(self.logButton)
+
+        self.inputEdit = QLineEdit()
+        self.inputEdit.setPlaceholderText('Send input to the selected run (Enter)')
+        self.inputEdit.returnPressed.connect(self.sendInput)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(controls)
+        layout.addWidget(self.tabs)
+        layout.addWidget(self.inputEdit)
+        self.updateControls()
+
+    def limits(self):
+        return (self.memoryLimitMB, self.cpuLimitSeconds)
+
+    def startSession(self, name, program, arguments, workingDirectory=''):
+        # Reaproveita a aba de uma execução terminada do mesmo comando
+        for session in self.sessions:
+            if (session.name, session.program, session.arguments) == (name, program, list(arguments)) and not session.isRunning():
+                session.limits = self.limits()
+                session.output.clear()
+                session.start()
+                self.tabs.setCurrentWidget(session.output)
+                return session
+
+        title = name
+        titles = [s.title for s in self.sessions]
+        count = 2
+        while title in titles:
+            title = f"{name} ({count})"
+            count += 1
+
+        session = RunSession(name, program, arguments, workingDirectory, self.limits(), self)
+        session.title = title
+        session.statusChanged.connect(self.onStatusChanged)
+        session.runFinished.connect(self.runFinished)
+        self.sessions.append(session)
+        self.tabs.addTab(session.output, title)
+        self.tabs.setCurrentWidget(session.output)
+        session.start()
+        return session
+
+    def currentSession(self):
+        widget = self.tabs.currentWidget()
+        for session in self.sessions:
+            if session.output is widget:
+                return session
+        return None
+
+    def onStatusChanged(self, session):
+        index = self.tabs.indexOf(session.output)
+        if index >= 0:
+            marker = '● ' if session.status == 'Running' else ''
+            self.tabs.setTabText(index, f"{marker}{session.title}")
+            self.tabs.setTabToolTip(index, f"{session.commandLine()}\n{session.status}")
+        self.updateControls()
+
+    def updateControls(self, *args):
+        session = self.currentSession()
+        self.stopButton.setEnabled(bool(session and session.isRunning()))
+        self.restartButton.setEnabled(session is not None)
+        self.logButton.setEnabled(bool(session and session.log))
+        self.inputEdit.setEnabled(bool(session and session.isRunning()))
+        if session:
+            running = sum(1 for s in self.sessions if s.isRunning())
+            self.statusLabel.setText(f"{session.title}: {session.status} | {running} running")
+        else:
+            self.statusLabel.setText('No runs yet.')
+
+    def sendInput(self):
+        session = self.currentSession()
+        if session:
+            session.write(self.inputEdit.text() + '\n')
+            self.inputEdit.clear()
+
+    def closeSession(self, index):
+        widget = self.tabs.widget(index)
+        for session in list(self.sessions):
+            if session.output is widget:
+                self.sessions.remove(session)
+                self.tabs.removeTab(index)
+                session.discard()
+                break
+        self.updateControls()
+
+    def stopAll(self):
+        # Sem esperar: o SIGKILL é imediato e o launcher leva o programa junto (PR_SET_PDEATHSIG)
+        for session in self.sessions:
+            if session.isRunning():
+                session.process.kill()
+
+class RunLogModel(QAbstractListModel):
+    # Linhas lidas sob demanda de um mmap do log; só as que a view pinta são decodificadas
+    MAX_LINE_CHARS = 4000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.log = None
+        self.offsets = None
+        self.count = 0
+        self.stderrBrush = QColor('#ff8c8c')
+
+    def open(self, path):
+        self.beginResetModel()
+        self.close()
+        self.path = path
+        self.mapFiles()
+        self.endResetModel()
+
+    def mapFiles(self):
+        self.log = self.mapFile(self.path)
+        self.offsets = self.mapFile(os.path.splitext(self.path)[0] + '.idx')
+        self.count = len(self.offsets) // 8 if self.offsets is not None else 0
+
+    def mapFile(self, path):
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    def refresh(self):
+        # Log de uma execução em andamento: remapeia e anuncia só as linhas novas
+        if not self.path:
+            return
+        previous = self.count
+        self.closeMaps()
+        self.mapFiles()
+        if self.count > previous:
+            self.beginInsertRows(QModelIndex(), previous, self.count - 1)
+            self.endInsertRows()
+
+    def closeMaps(self):
+        for mapped in (self.log, self.offsets):
+            if mapped is not None:
+                mapped.close()
+        self.log = self.offsets = None
+
+    def close(self):
+        self.closeMaps()
+        self.count = 0
+        self.path = None
+
+    def offset(self, row):
+        return struct.unpack_from('Q', self.offsets, row * 8)[0]
+
+    def lineRange(self, row):
+        start = self.offset(row) & ~RUN_LOG_STDERR
+        end = self.offset(row + 1) & ~RUN_LOG_STDERR if row + 1 < self.count else len(self.log)
+        return start, end
+
+    def lineAt(self, position):
+        # Busca binária no índice mapeado: linha que contém o byte
+        low, high = 0, self.count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.offset(middle) & ~RUN_LOG_STDERR <= position:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.log is None:
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            start, end = self.lineRange(row)
+            end = min(end, start + self.MAX_LINE_CHARS)
+            return self.log[start:end].rstrip(b'\r\n').decode('utf-8', errors='replace')
+        if role == Qt.ForegroundRole and self.offset(row) & RUN_LOG_STDERR:
+            return self.stderrBrush
+        return None
+
+class RunLogViewer(QWidget):
+    compareRequested = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.runs = []
+        self.model = RunLogModel(self)
+
+        self.historyCombo = QComboBox()
+        self.historyCombo.activated.connect(lambda row: self.openLog(self.runs[row]['path']))
+        refreshButton = QPushButton('Refresh')
+        refreshButton.clicked.connect(self.refreshHistory)
+        self.compareCombo = QComboBox()
+        compareButton = QPushButton('Compare')
+        compareButton.clicked.connect(self.compare)
+
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText('Search the log (Enter = next, Shift+Enter = previous)')
+        self.searchEdit.returnPressed.connect(lambda: self.search(not QApplication.keyboardModifiers() & Qt.ShiftModifier))
+        self.caseCheck = QCheckBox('Match case')
+        self.statusLabel = QLabel()
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel('Run:'))
+        top.addWidget(self.historyCombo, 2)
+        top.addWidget(refreshButton)
+        top.addWidget(QLabel('with'))
+        top.addWidget(self.compareCombo, 1)
+        top.addWidget(compareButton)
+        searchBar = QHBoxLayout()
+        searchBar.addWidget(self.searchEdit, 1)
+        searchBar.addWidget(self.caseCheck)
+        searchBar.addWidget(self.statusLabel)
+
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFont('Consolas', 10))
+        self.view.setStyleSheet("background-color: #00091a; color: #c9dcff;")
+
+        # Acompanha o log enquanto a execução ainda escreve nele
+        self.followTimer = QTimer(self)
+        self.followTimer.timeout.connect(self.follow)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addLayout(searchBar)
+        layout.addWidget(self.view)
+
+    def refreshHistory(self):
+        current = self.model.path
+        self.runs = RunLog.history()
+        labels = [f"{run['name']}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))}  {run['status']}"
+                  for run in self.runs]
+        for combo in (self.historyCombo, self.compareCombo):
+            combo.clear()
+            combo.addItems(labels)
+        paths = [run['path'] for run in self.runs]
+        if current in paths:
+            self.historyCombo.setCurrentIndex(paths.index(current))
+            self.compareCombo.setCurrentIndex(min(paths.index(current) + 1, len(paths) - 1))
+
+    def openLog(self, path):
+        self.model.open(path)
+        self.refreshHistory()
+        run = next((run for run in self.runs if run['path'] == path), None)
+        size = len(self.model.log) if self.model.log is not None else 0
+        self.statusLabel.setText(f"{self.model.count} lines, {size / (1024 * 1024):.1f} MB")
+        if run and run['finished'] is None:
+            self.followTimer.start(500)
+        else:
+            self.followTimer.stop()
+        self.view.scrollToBottom()
+
+    def follow(self):
+        atBottom = self.view.verticalScrollBar().value() == self.view.verticalScrollBar().maximum()
+        self.model.refresh()
+        if atBottom:
+            self.view.scrollToBottom()
+        meta = os.path.splitext(self.model.path)[0] + '.json' if self.model.path else None
+        try:
+            with open(meta, 'r', encoding='utf-8') as f:
+                if json.load(f)['finished'] is not None:
+                    self.followTimer.stop()
+                    self.refreshHistory()
+        except (OSError, ValueError, TypeError):
+            self.followTimer.stop()
+
+    def search(self, forward=True):
+        text = self.searchEdit.text()
+        if not text or self.model.log is None:
+            return
+        pattern = re.compile(re.escape(text.encode('utf-8')), 0 if self.caseCheck.isChecked() else re.IGNORECASE)
+        row = self.view.currentIndex().row()
+        log = self.model.log
+        if forward:
+            start = self.model.lineRange(row)[1] if row >= 0 else 0
+            match = pattern.search(log, start) or pattern.search(log, 0, start)
+        else:
+            end = self.model.lineRange(row)[0] if row >= 0 else len(log)
+            match = self.searchBackward(pattern, log, end) or self.searchBackward(pattern, log, len(log), end)
+        if not match:
+            self.statusLabel.setText(f"'{text}' not found")
+            return
+        index = self.model.index(self.model.lineAt(match.start()))
+        self.view.setCurrentIndex(index)
+        self.view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.statusLabel.setText(f"Line {index.row() + 1} of {self.model.count}")
+
+    def searchBackward(self, pattern, log, end, stop=0):
+        # Janelas de 4 MB do fim para o começo; dentro da janela vale a última ocorrência
+        window = 4 * 1024 * 1024
+        while end > stop:
+            start = max(stop, end - window)
+            last = None
+            for last in pattern.finditer(log, start, end):
+                pass
+            if last:
+                return last
+            # Sobreposição para não perder ocorrências cortadas entre duas janelas
+            end = start + len(pattern.pattern) if start > stop else start
+        return None
+
+    def compare(self):
+        row = self.compareCombo.currentIndex()
+        if self.model.path and 0 <= row < len(self.runs):
+            self.compareRequested.emit(self.runs[row]['path'], self.model.path)
+
+def formatRunMetrics(metrics):
+    parts = [f"{metrics['wall']:.3f} s"]
+    if metrics.get('user') is not None:
+        parts.append(f"user {metrics['user']:.3f} s, sys {metrics['sys']:.3f} s")
+    if metrics.get('peak_kb') is not None:
+        parts.append(f"peak {metrics['peak_kb'] / 1024:.1f} MB")
+    if metrics.get('compile') is not None:
+        parts.append(f"compile {metrics['compile']:.3f} s")
+    return ', '.join(parts)
+
+class RunMetricsStore:
+    # Histórico local de tempo/memória por arquivo executado, para comparar uma execução com as anteriores
+    VERSION = 1
+    COLUMNS = ['started', 'status', 'wall', 'user', 'sys', 'peak_kb', 'compile', 'log']
+
+    def __init__(self, path=None):
+        self.path = path or cachePath('run-metrics.sqlite3')
+        self.db = sqlite3.connect(self.path, timeout=5)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != self.VERSION:
+            self.db.executescript('''
+                DROP TABLE IF EXISTS runs;
+                CREATE TABLE runs (source TEXT, command TEXT, started REAL, status TEXT, wall REAL, user REAL, sys REAL,
+                                   peak_kb INTEGER, compile REAL, log TEXT);
+                CREATE INDEX runs_source ON runs (source, started);
+            ''')
+            self.db.execute(f'PRAGMA user_version = {self.VERSION}')
+            self.db.commit()
+
+    def add(self, session):
+        metrics = session.metrics
+        with self.db:
+            self.db.execute('INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            (session.source, session.commandLine(), session.log.meta['started'], session.status, metrics['wall'],
+                             metrics['user'], metrics['sys'], metrics['peak_kb'], metrics['compile'], session.log.path))
+
+    def sources(self):
+        return [path for path, in self.db.execute('SELECT source FROM runs GROUP BY source ORDER BY max(started) DESC')]
+
+    def history(self, source, limit=500):
+        rows = self.db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM runs WHERE source = ? ORDER BY started DESC LIMIT ?",
+                               (source, limit)).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in reversed(rows)]
+
+    def close(self):
+        self.db.close()
+
+class TrendChart(QWidget):
+    # Linha simples de uma métrica ao longo das execuções; o ponto destacado é a execução selecionada
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values = []
+        self.unit = ''
+        self.selected = -1
+        self.setMinimumHeight(120)
+
+    def setValues(self, values, unit):
+        self.values = values
+        self.unit = unit
+        self.selected = len(values) - 1
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor('#00091a'))
+        points = [(i, value) for i, value in enumerate(self.values) if value is not None]
+        if not points:
+            painter.setPen(QColor('#8080a0'))
+            painter.drawText(self.rect(), Qt.AlignCenter, 'No runs recorded for this metric.')
+            return
+        margin = 40
+        width = max(1, self.width() - 2 * margin)
+        height = max(1, self.height() - 2 * 20)
+        top = max(value for _, value in points) * 1.1 or 1.0
+        step = width / max(1, len(self.values) - 1)
+        position = lambda i, value: QPoint(int(margin + i * step), int(20 + height - value / top * height))
+
+        painter.setPen(QColor('#404060'))
+        painter.drawLine(margin, 20 + height, margin + width, 20 + height)
+        painter.setPen(QColor('#8080a0'))
+        painter.drawText(4, 14, f"{top:.3g} {self.unit}")
+        painter.drawText(4, 20 + height, "0")
+
+        painter.setPen(QPen(QColor('#6fa8ff'), 2))
+        for (i, a), (j, b) in zip(points, points[1:]):
+            painter.drawLine(position(i, a), position(j, b))
+        painter.setBrush(QColor('#6fa8ff'))
+        for i, value in points:
+            painter.drawEllipse(position(i, value), 3, 3)
+        if 0 <= self.selected < len(self.values) and self.values[self.selected] is not None:
+            painter.setBrush(QColor('#ffd166'))
+            painter.drawEllipse(position(self.selected, self.values[self.selected]), 5, 5)
+
+class RunMetricsPanel(QWidget):
+    openLog = pyqtSignal(str)
+
+    METRICS = [('Wall time', 'wall', 's'), ('CPU time', 'cpu', 's'), ('Peak RSS', 'peak_mb', 'MB'), ('Compile time', 'compile', 's')]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.runs = []
+
+        self.fileCombo = QComboBox()
+        self.fileCombo.activated.connect(lambda: self.showSource(self.fileCombo.currentData()))
+        self.metricCombo = QComboBox()
+        self.metricCombo.addItems([label for label, _, _ in self.METRICS])
+        self.metricCombo.activated.connect(self.updateChart)
+        self.summaryLabel = QLabel()
+        self.summaryLabel.setStyleSheet("color: #e0e0ff;")
+
+        header = QHBoxLayout()
+        header.addWidget(QLabel('File:'))
+        header.addWidget(self.fileCombo, 1)
+        header.addWidget(self.metricCombo)
+        header.addWidget(self.summaryLabel, 1)
+
+        self.chart = TrendChart()
+        self.table = QTableWidget(0, 8)
+        self.table.setHorizontalHeaderLabels(['Started', 'Status', 'Wall (s)', 'User (s)', 'Sys (s)', 'Peak RSS (MB)', 'Compile (s)',
+                                              'Wall vs previous'])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setStyleSheet("background-color: #00091a; color: #c9dcff;")
+        self.table.currentCellChanged.connect(self.onRowChanged)
+        self.table.cellDoubleClicked.connect(lambda row, column: self.openLog.emit(self.runs[row]['log']))
+
+        body = QSplitter(Qt.Horizontal)
+        body.addWidget(self.chart)
+        body.addWidget(self.table)
+        body.setSizes([400, 600])
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(header)
+        layout.addWidget(body)
+
+    def showSource(self, source):
+        sources = self.store.sources()
+        self.fileCombo.clear()
+        for path in sources:
+            self.fileCombo.addItem(os.path.basename(path), path)
+            self.fileCombo.setItemData(self.fileCombo.count() - 1, path, Qt.ToolTipRole)
+        if source not in sources:
+            source = sources[0] if sources else None
+        if source is None:
+            self.runs = []
+        else:
+            self.fileCombo.setCurrentIndex(sources.index(source))
+            self.runs = self.store.history(source)
+        for run in self.runs:
+            run['cpu'] = run['user'] + run['sys'] if run['user'] is not None else None
+            run['peak_mb'] = run['peak_kb'] / 1024 if run['peak_kb'] is not None else None
+
+        cell = lambda value, fmt='{:.3f}': '' if value is None else fmt.format(value)
+        self.table.setRowCount(len(self.runs))
+        for row, run in enumerate(self.runs):
+            previous = self.runs[row - 1]['wall'] if row else None
+            change = f"{(run['wall'] - previous) / previous * 100:+.1f}%" if previous else ''
+            values = [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started'])), run['status'], cell(run['wall']),
+                      cell(run['user']), cell(run['sys']), cell(run['peak_mb'], '{:.1f}'), cell(run['compile']), change]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.updateChart()
+        if self.runs:
+            self.table.selectRow(len(self.runs) - 1)
+            self.table.scrollToBottom()
+
+    def updateChart(self):
+        _, key, unit = self.METRICS[self.metricCombo.currentIndex()]
+        values = [run[key] for run in self.runs]
+        self.chart.setValues(values, unit)
+        known = sorted(value for value in values if value is not None)
+        if not known:
+            self.summaryLabel.setText('')
+            return
+        median = known[len(known) // 2]
+        last = values[-1]
+        versus = f", {(last - median) / median * 100:+.1f}% vs median" if last is not None and median else ''
+        self.summaryLabel.setText(f"{len(known)} runs | best {known[0]:.3f} {unit}, median {median:.3f} {unit}{versus}")
+
+    def onRowChanged(self, row, *args):
+        self.chart.selected = row
+        self.chart.update()
+
+CELL_MARKER = re.compile(r'^\s*#\s*%%')
+
+def cellRange(lines, line):
+    # Célula delimitada por "# %%" que contém a linha; sem marcadores, só a própria linha
+    markers = [i for i, text in enumerate(lines) if CELL_MARKER.match(text)]
+    if not markers:
+        return line, line + 1
+    start = max([i for i in markers if i <= line], default=0)
+    end = min([i for i in markers if i > line], default=len(lines))
+    return start, end
+
+class PythonKernel(QObject):
+    output = pyqtSignal(str, bool)
+    stateChanged = pyqtSignal(str)
+    executionFinished = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.state = 'Stopped'
+        self.directory = ''
+        self.pending = collections.deque()
+        self.current = None
+        self.executionCount = 0
+        self.buffer = b''
+
+    def start(self, directory=''):
+        self.directory = directory or self.directory
+        self.token = hashlib.sha1(os.urandom(16)).hexdigest()[:16]
+        self.buffer = b''
+        self.stdoutDecoder = StreamDecoder()
+        self.stderrDecoder = StreamDecoder()
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.SeparateChannels)
+        environment = QProcessEnvironment.systemEnvironment()
+        environment.insert('PYTHONIOENCODING', 'utf-8')
+        environment.insert('PYTHONUNBUFFERED', '1')
+        self.process.setProcessEnvironment(environment)
+        if self.directory:
+            self.process.setWorkingDirectory(self.directory)
+        self.process.readyReadStandardOutput.connect(self.readStdout)
+        self.process.readyReadStandardError.connect(self.readStderr)
+        self.process.finished.connect(self.onFinished)
+        self.process.errorOccurred.connect(self.onError)
+        self.setState('Starting')
+        self.process.start('python', ['-c', PYTHON_KERNEL, self.token])
+
+    def isAlive(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def execute(self, code, path='', line=0):
+        # Células enviadas durante uma execução esperam a vez; o kernel só lê do stdin entre execuções
+        if not self.isAlive():
+            self.start(os.path.dirname(path))
+        self.executionCount += 1
+        self.pending.append((self.executionCount, code, path, line))
+        self.sendNext()
+        self.stateChanged.emit(self.state)
+        return self.executionCount
+
+    def sendNext(self):
+        if self.state != 'Idle' or not self.pending:
+            return
+        self.current = self.pending.popleft()
+        count, code, path, line = self.current
+        data = code.encode('utf-8')
+        header = json.dumps({'path': path, 'line': line, 'size': len(data)}) + '\n'
+        self.process.write(header.encode('utf-8') + data)
+        self.setState('Busy')
+
+    def interrupt(self):
+        # SIGINT vira KeyboardInterrupt na célula em execução; as variáveis continuam na sessão
+        self.pending.clear()
+        if self.state != 'Busy':
+            return
+        if os.name == 'posix':
+            os.kill(self.process.processId(), signal.SIGINT)
+        else:
+            self.output.emit('Interrupting is not supported on this platform; restarting the session.\n', True)
+            self.restart()
+
+    def restart(self):
+        self.stop()
+        self.executionCount = 0
+        self.start()
+
+    def stop(self):
+        self.pending.clear()
+        if self.isAlive():
+            self.process.finished.disconnect(self.onFinished)
+            self.process.kill()
+            self.process.waitForFinished(1000)
+        self.process = None
+        self.current = None
+        self.setState('Stopped')
+
+    def readStdout(self):
+        self.buffer += self.process.readAllStandardOutput().data()
+        # Tudo antes de um \x1e pode ser exibido; o marcador só é analisado quando a linha dele chega inteira
+        while True:
+            marker = self.buffer.find(b'\x1e')
+            if marker < 0:
+                text, self.buffer = self.buffer, b''
+                self.emitOutput(text)
+                return
+            self.emitOutput(self.buffer[:marker])
+            self.buffer = self.buffer[marker:]
+            end = self.buffer.find(b'\n')
+            if end < 0:
+                return
+            line, self.buffer = self.buffer[1:end].decode('utf-8', errors='replace'), self.buffer[end + 1:]
+            token, _, status = line.partition(' ')
+            if token == self.token:
+                self.onStatus(status)
+            else:
+                self.emitOutput(b'\x1e' + line.encode('utf-8') + b'\n')
+
+    def emitOutput(self, data):
+        if data:
+            self.output.emit(self.stdoutDecoder.decode(data), False)
+
+    def readStderr(self):
+        text = self.stderrDecoder.decode(self.process.readAllStandardError().data())
+        if text:
+            self.output.emit(text, True)
+
+    def onStatus(self, status):
+        if status != 'ready' and self.current:
+            self.executionFinished.emit(self.current[0], status)
+        self.current = None
+        self.setState('Idle')
+        self.sendNext()
+
+    def onError(self, error):
+        if error == QProcess.FailedToStart:
+            self.output.emit('Failed to start python for the interactive session.\n', True)
+            self.process = None
+            self.pending.clear()
+            self.setState('Stopped')
+
+    def onFinished(self, exit_code, exit_status):
+        self.readStdout()
+        self.readStderr()
+        self.output.emit(f"\nPython session ended (exit code {exit_code}). The next cell starts a new one.\n", True)
+        self.process = None
+        self.pending.clear()
+        self.current = None
+        self.setState('Stopped')
+
+    def setState(self, state):
+        self.state = state
+        self.stateChanged.emit(state)
+
+class PythonSessionPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.kernel = PythonKernel(self)
+        self.kernel.output.connect(self.appendOutput)
+        self.kernel.stateChanged.connect(self.onStateChanged)
+        self.kernel.executionFinished.connect(self.onExecutionFinished)
+        self.lastStatus = ''
+
+        self.statusLabel = QLabel()
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+        self.interruptButton = QPushButton('Interrupt')
+        self.interruptButton.clicked.connect(self.kernel.interrupt)
+        restartButton = QPushButton('Restart')
+        restartButton.clicked.connect(self.restart)
+        clearButton = QPushButton('Clear')
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.statusLabel, 1)
+        controls.addWidget(self.interruptButton)
+        controls.addWidget(restartButton)
+        controls.addWidget(clearButton)
+
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(RUN_BUFFER_LINES)
+        self.output.setFont(QFont('Consolas', 10))
+        self.output.setStyleSheet("background-color: #00091a; color: #c9dcff;")
+        clearButton.clicked.connect(self.output.clear)
+        self.formats = {}
+        for name, color in [('stdout', '#c9dcff'), ('stderr', '#ff8c8c'), ('input', '#7f8fbf')]:
+            self.formats[name] = QTextCharFormat()
+            self.formats[name].setForeground(QColor(color))
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(controls)
+        layout.addWidget(self.output)
+        self.onStateChanged(self.kernel.state)
+
+    def execute(self, code, path='', line=0):
+        count = self.kernel.executionCount + 1
+        lines = code.strip('\n').splitlines() or ['']
+        preview = lines[0] + (f"  ... (+{len(lines) - 1} lines)" if len(lines) > 1 else '')
+        self.appendText(f"In [{count}]: {preview}\n", self.formats['input'])
+        self.kernel.execute(code, path, line)
+
+    def restart(self):
+        self.appendText("Restarting the Python session...\n", self.formats['input'])
+        self.lastStatus = ''
+        self.kernel.restart()
+
+    def appendOutput(self, text, isError):
+        self.appendText(text, self.formats['stderr' if isError else 'stdout'])
+
+    def appendText(self, text, fmt):
+        cursor = self.output.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text, fmt)
+        self.output.setTextCursor(cursor)
+        self.output.ensureCursorVisible()
+
+    def onExecutionFinished(self, count, status):
+        self.lastStatus = {'ok': '', 'error': f" | In [{count}] raised an exception",
+                           'interrupted': f" | In [{count}] interrupted, variables kept"}.get(status, '')
+        self.onStateChanged(self.kernel.state)
+
+    def onStateChanged(self, state):
+        queued = f", {len(self.kernel.pending)} queued" if self.kernel.pending else ''
+        self.statusLabel.setText(f"Python session: {state}{queued}{self.lastStatus if state == 'Idle' else ''}")
+        self.interruptButton.setEnabled(state == 'Busy')
+
+# Injetado nas páginas HTML servidas pelo preview; recebe eventos via SSE
+LIVE_RELOAD_SCRIPT = '''<script>
+(function () {
+    var source = new EventSource('/__livereload');
+    source.onmessage = function (event) {
+        var change = JSON.parse(event.data);
+        if (change.type === 'css') {
+            var swapped = false;
+            document.querySelectorAll('link[rel="stylesheet"]').forEach(function (link) {
+                var url = new URL(link.href);
+                if (url.pathname === change.path) {
+                    url.searchParams.set('v', Date.now());
+                    link.href = url.toString();
+                    swapped = true;
+                }
+            });
+            if (swapped) {
+                return;
+            }
+        }
+        location.reload();
+    };
+})();
+</script>
+'''
+
+class LivePreviewHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, preview=None, **kwargs):
+        self.preview = preview
+        self.etag = None
+        super().__init__(*args, directory=preview.root, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        # Sempre revalida, mas com ETag o navegador recebe 304 para arquivos inalterados
+        self.send_header('Cache-Control', 'no-cache')
+        if self.etag:
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/__livereload':
+            self.serveEvents()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            if not os.path.isfile(index):
+                super().do_GET()
+                return
+            path = index
+        try:
+            st = os.stat(path)
+        except OSError:
+            super().do_GET()
+            return
+
+        self.etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        if path.lower().endswith(('.html', '.htm')):
+            with open(path, 'rb') as f:
+                body = f.read()
+            marker = body.lower().rfind(b'</body>')
+            script = LIVE_RELOAD_SCRIPT.encode('utf-8')
+            body = body[:marker] + script + body[marker:] if marker >= 0 else body + script
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            super().do_GET()
+
+    def serveEvents(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        events = self.preview.addClient()
+        try:
+            while not self.preview.stopped:
+                try:
+                    event = events.get(timeout=15)
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.preview.removeClient(events)
+
+class LivePreviewServer:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.clients = []
+        self.lock = threading.Lock()
+        self.hashes = {}
+        self.stopped = False
+        handler = functools.partial(LivePreviewHandler, preview=self)
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='live-preview', daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def contains(self, path):
+        path = os.path.abspath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def urlFor(self, path):
+        relative = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        return f"http://127.0.0.1:{self.port}/{urllib.parse.quote(relative)}"
+
+    def addClient(self):
+        events = queue.Queue()
+        with self.lock:
+            self.clients.append(events)
+        return events
+
+    def removeClient(self, events):
+        with self.lock:
+            if events in self.clients:
+                self.clients.remove(events)
+
+    def hasClients(self):
+        with self.lock:
+            return bool(self.clients)
+
+    def notifyChanged(self, path, force=False):
+        if not self.contains(path):
+            return False
+        # O autosave regrava o arquivo a cada segundo; só avisa se o conteúdo mudou
+        try:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return False
+        if not force and self.hashes.get(path) == digest:
+            return False
+        self.hashes[path] = digest
+
+        relative = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        event = {'type': 'css' if path.lower().endswith('.css') else 'reload', 'path': '/' + urllib.parse.quote(relative)}
+        with self.lock:
+            for events in self.clients:
+                events.put(event)
+        return True
+
+    def stop(self):
+        self.stopped = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class ProjectIndex(QThread):
+    indexReady = pyqtSignal(list, dict)
+
+    MAX_FILE_SIZE = 1024 * 1024
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+        self.wait()
+
+    def run(self):
+        files = []
+        symbols = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if self.stopped:
+                return
+            dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS)
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                files.append(path)
+                ext = os.path.splitext(name)[1].lower()
+                if ext not in SYMBOL_PATTERNS:
+                    continue
+                try:
+                    if os.path.getsize(path) > self.MAX_FILE_SIZE:
+                        continue
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        text = f.read()
+                except OSError:
+                    continue
+                for line, kind, symbol, _ in scanSymbols(text, ext):
+                    symbols.setdefault(symbol, []).append((path, line, kind))
+        self.indexReady.emit(files, symbols)
+
+def pythonOutlineSymbols(text):
+    # Símbolos por linha a partir do ast (ignora "def" dentro de strings); None se o código não compila
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    symbols = {}
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, ast.ClassDef):
+            symbols[node.lineno - 1] = ('class', node.name, node.col_offset)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols[node.lineno - 1] = ('function', node.name, node.col_offset)
+        nodes.extend(ast.iter_child_nodes(node))
+    return symbols
+
+def outlineEntries(cache):
+    # Converte o cache por linha em (linha, tipo, nome, profundidade, última linha do escopo)
+    entries = []
+    stack = []
+    for line, symbol in enumerate(cache):
+        if symbol is None:
+            continue
+        kind, name, indent = symbol
+        while stack and stack[-1][1] >= indent:
+            index, _ = stack.pop()
+            entries[index][4] = line - 1
+        entries.append([line, kind, name, len(stack), len(cache) - 1])
+        stack.append((len(entries) - 1, indent))
+    return [tuple(entry) for entry in entries]
+
+class OutlineWorker(QThread):
+    outlineReady = pyqtSignal(int, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.requests = []
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.generation = -1
+        self.patterns = None
+        self.cache = []
+
+    def reset(self, generation, ext, text):
+        with self.condition:
+            # Um novo documento invalida tudo o que ainda estava na fila
+            self.requests = [('reset', generation, ext, text)]
+            self.condition.notify()
+
+    def update(self, generation, edits, text):
+        # edits: lista de (linha, linhas adicionadas) na ordem em que aconteceram
+        with self.condition:
+            self.requests.append(('edit', generation, edits, text))
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.requests and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                requests, self.requests = self.requests, []
+
+            for request in requests:
+                if request[0] == 'reset':
+                    _, self.generation, ext, text = request
+                    self.patterns = SYMBOL_PATTERNS.get(ext)
+                    self.rebuild(text, ext == '.py')
+                elif request[1] == self.generation:
+                    self.applyEdits(request[2], request[3])
+            if self.patterns is not None:
+                self.outlineReady.emit(self.generation, outlineEntries(self.cache))
+            else:
+                self.outlineReady.emit(self.generation, [])
+
+    def rebuild(self, text, useAst=False):
+        lines = text.split('\n')
+        symbols = pythonOutlineSymbols(text) if useAst else None
+        if symbols is not None:
+            self.cache = [symbols.get(number) for number in range(len(lines))]
+        elif self.patterns:
+            self.cache = [scanLineSymbols(line.rstrip('\r'), self.patterns) for line in lines]
+        else:
+            self.cache = []
+
+    def applyEdits(self, edits, text):
+        if not self.patterns:
+            return
+        dirty = set()
+        for line, added in edits:
+            if added > 0:
+                self.cache[line + 1:line + 1] = [None] * added
+                dirty = {d + added if d > line else d for d in dirty}
+            elif added < 0:
+                del self.cache[line + 1:line + 1 - added]
+                dirty = {d + added if d > line - added else d for d in dirty if not line < d <= line - added}
+            dirty.update(range(line, line + max(added, 0) + 1))
+        lines = text.split('\n')
+        if len(lines) != len(self.cache):
+            # Perdemos a sincronia (ex.: sinal descartado); refaz tudo só com as regex
+            self.rebuild(text)
+            return
+        for number in dirty:
+            if number < len(lines):
+                self.cache[number] = scanLineSymbols(lines[number].rstrip('\r'), self.patterns)
+
+class OutlineModel(QAbstractItemModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.parents = []
+        self.rows = []
+        self.children = {-1: []}
+
+    def setEntries(self, entries):
+        # Devolve True quando a forma da árvore mudou e a view precisa ser refeita
+        shape = [entry[3] for entry in entries]
+        if shape == [entry[3] for entry in self.entries]:
+            changed = [i for i, (old, new) in enumerate(zip(self.entries, entries)) if old[1:3] != new[1:3]]
+            self.entries = entries
+            for i in changed:
+                index = self.indexFor(i)
+                self.dataChanged.emit(index, index)
+            return False
+
+        self.beginResetModel()
+        self.entries = entries
+        self.parents = []
+        self.rows = []
+        self.children = {-1: []}
+        stack = []
+        for i, entry in enumerate(entries):
+            del stack[entry[3]:]
+            parent = stack[-1] if stack else -1
+            siblings = self.children.setdefault(parent, [])
+            self.parents.append(parent)
+            self.rows.append(len(siblings))
+            siblings.append(i)
+            stack.append(i)
+        self.endResetModel()
+        return True
+
+    def indexFor(self, entry):
+        # O id interno do índice é a posição do símbolo em entries
+        return self.createIndex(self.rows[entry], 0, entry)
+
+    def entryFor(self, index):
+        return index.internalId() if index.isValid() else -1
+
+    def index(self, row, column, parent=QModelIndex()):
+        siblings = self.children.get(self.entryFor(parent), [])
+        if column != 0 or not 0 <= row < len(siblings):
+            return QModelIndex()
+        return self.indexFor(siblings[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = self.parents[self.entryFor(index)]
+        return self.indexFor(parent) if parent >= 0 else QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.children.get(self.entryFor(parent), []))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        line, kind, name, depth, end = self.entries[self.entryFor(index)]
+        if role == Qt.DisplayRole:
+            return f'{name}()' if kind == 'function' else name
+        if role == Qt.ToolTipRole:
+            return f'{kind} {name} — line {line + 1}'
+        if role == Qt.ForegroundRole:
+            return QColor('#e0a0ff') if kind == 'class' else QColor('#a0c8ff')
+        return None
+
+class OutlinePanel(QWidget):
+    openLine = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = OutlineModel(self)
+        self.view = QTreeView()
+        self.view.setModel(self.model)
+        self.view.setHeaderHidden(True)
+        self.view.setIndentation(12)
+        self.view.setUniformRowHeights(True)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.clicked.connect(self.onActivated)
+        self.view.activated.connect(self.onActivated)
+        self.view.collapsed.connect(lambda index: self.collapsedNames.add(self.nameFor(index)))
+        self.view.expanded.connect(lambda index: self.collapsedNames.discard(self.nameFor(index)))
+        self.view.setStyleSheet("""
+            QTreeView {
+                background-color: #1e1e3e;
+                color: #e0e0ff;
+                border: none;
+            }
+            QTreeView::item:selected {
+                background-color: #2e2e5e;
+            }
+        """)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view)
+        self.collapsedNames = set()
+        self.starts = []
+
+    def nameFor(self, index):
+        entry = self.model.entries[self.model.entryFor(index)]
+        return entry[3], entry[2]
+
+    def setEntries(self, entries):
+        # Deslocar linhas ou renomear um símbolo não refaz a view; só mudanças de estrutura
+        if self.model.setEntries(entries):
+            self.view.expandAll()
+            for i, entry in enumerate(entries):
+                if (entry[3], entry[2]) in self.collapsedNames:
+                    self.view.collapse(self.model.indexFor(i))
+        self.starts = [entry[0] for entry in entries]
+
+    def highlightLine(self, line):
+        # Escopo mais interno que contém a linha: busca binária e depois sobe pelos ancestrais
+        entries = self.model.entries
+        i = bisect.bisect_right(self.starts, line) - 1
+        while i >= 0 and entries[i][4] < line:
+            i = self.model.parents[i]
+        if i < 0:
+            self.view.clearSelection()
+            self.view.setCurrentIndex(QModelIndex())
+            return
+        index = self.model.indexFor(i)
+        if index != self.view.currentIndex():
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index)
+
+    def onActivated(self, index):
+        self.openLine.emit(self.model.entries[self.model.entryFor(index)][0])
+
+LEXER_CLASSES = {
+    '.py': QsciLexerPython,
+    '.java': QsciLexerJava,
+    '.html': QsciLexerHTML,
+    '.js': QsciLexerJavaScript,
+    '.css': QsciLexerCSS,
+    '.cpp': QsciLexerCPP,
+    '.rb': QsciLexerRuby,
+}
+
+# Identificadores da biblioteca padrão que as listas de palavras-chave dos lexers não trazem
+COMPLETION_WORDS = {
+    '.java': ['System.out.println', 'System.out.print', 'System.currentTimeMillis', 'System.nanoTime', 'String', 'StringBuilder',
+              'Integer.parseInt', 'Math.max', 'Math.min', 'Math.abs', 'Math.sqrt', 'List', 'ArrayList', 'Map', 'HashMap', 'Set',
+              'HashSet', 'Arrays.asList', 'Arrays.sort', 'Collections.sort', 'Optional', 'Scanner', 'Exception', 'RuntimeException'],
+    '.js': ['console.log', 'console.error', 'console.warn', 'Math.max', 'Math.min', 'Math.floor', 'Math.random', 'JSON.parse',
+            'JSON.stringify', 'Object.keys', 'Object.entries', 'Object.assign', 'Array.isArray', 'Array.from', 'Promise.all',
+            'Promise.resolve', 'document.getElementById', 'document.querySelector', 'document.querySelectorAll',
+            'window.addEventListener', 'setTimeout', 'setInterval', 'clearTimeout', 'fetch', 'require', 'module.exports'],
+    '.cpp': ['std::cout', 'std::cin', 'std::cerr', 'std::endl', 'std::string', 'std::vector', 'std::map', 'std::unordered_map',
+             'std::set', 'std::unordered_set', 'std::pair', 'std::make_pair', 'std::unique_ptr', 'std::shared_ptr',
+             'std::make_unique', 'std::make_shared', 'std::sort', 'std::find', 'std::max', 'std::min', 'std::move', 'std::size_t',
+             'printf', 'scanf', 'malloc', 'free', 'memcpy', 'strlen'],
+    '.rb': ['puts', 'print', 'require', 'require_relative', 'attr_accessor', 'attr_reader', 'attr_writer', 'each', 'each_with_index',
+            'map', 'select', 'reject', 'reduce', 'include?', 'empty?', 'nil?', 'length', 'to_s', 'to_i', 'to_a', 'raise'],
+}
+
+def pythonStdlibWords():
+    # Nomes públicos de nível superior da biblioteca padrão, lidos do código-fonte sem importar os módulos
+    words = set(keyword.kwlist) | {name for name in dir(builtins) if not name.startswith('_')}
+    for module in sorted(getattr(sys, 'stdlib_module_names', ())):
+        if module.startswith('_') or module == 'antigravity':
+            continue
+        words.add(module)
+        if module in sys.builtin_module_names:
+            names = [name for name in dir(importlib.import_module(module)) if not name.startswith('_')]
+        else:
+            try:
+                spec = importlib.util.find_spec(module)
+            except (ImportError, ValueError):
+                continue
+            if not spec or not spec.origin or not spec.origin.endswith('.py'):
+                continue
+            try:
+                with open(spec.origin, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError:
+                continue
+            names = [name for _, _, name, indent in scanSymbols(text, '.py') if indent == 0 and not name.startswith('_')]
+        words.update(f'{module}.{name}' for name in names)
+    return sorted(words)
+
+class CompletionWordsWorker(QThread):
+    wordsReady = pyqtSignal(str, str, str)
+    projectWordsReady = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = {}
+        self.symbols = None
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def submit(self, ext, key, keywords):
+        with self.condition:
+            self.pending[ext] = (key, keywords)
+            self.condition.notify()
+
+    def submitProject(self, symbols):
+        # Só o índice mais recente do projeto importa
+        with self.condition:
+            self.symbols = symbols
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and self.symbols is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                symbols, self.symbols = self.symbols, None
+                job = self.pending.popitem() if self.pending else None
+
+            if symbols is not None:
+                names = {}
+                for name, locations in symbols.items():
+                    for path, _, _ in locations:
+                        names.setdefault(os.path.splitext(path)[1].lower(), set()).add(name)
+                self.projectWordsReady.emit({ext: sorted(values, key=str.lower) for ext, values in names.items()})
+            if job is None:
+                continue
+
+            ext, (key, keywords) = job
+            words = set(keywords) | set(COMPLETION_WORDS.get(ext, ()))
+            if ext == '.py':
+                words.update(pythonStdlibWords())
+            # O QsciAPIs carrega o arquivo .api em C++, bem mais rápido que um add() por palavra
+            path = cachePath('apis', f'{ext[1:]}-{key}.api')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(sorted(words)))
+            self.wordsReady.emit(ext, key, path)
+
+class CompletionAPIs(QsciAbstractAPIs):
+    # Junta o QsciAPIs da linguagem com os símbolos do projeto. O QsciAPIs deduplica os
+    # candidatos em tempo quadrático, o que trava o popup com 100k+ símbolos; por isso os
+    # nomes do projeto ficam numa lista ordenada consultada por busca binária.
+    MAX_MATCHES = 150
+
+    def __init__(self, lexer, languageApis):
+        super().__init__(lexer)
+        self.languageApis = languageApis
+        self.names = []
+        self.keys = []
+
+    def setNames(self, names):
+        self.names = names
+        self.keys = [name.lower() for name in names]
+
+    def updateAutoCompletionList(self, context, candidates):
+        candidates = self.languageApis.updateAutoCompletionList(context, candidates)
+        context = list(context)
+        if len(context) == 1 and context[0]:
+            prefix = context[0].lower()
+            start = bisect.bisect_left(self.keys, prefix)
+            seen = set(candidates)
+            # O popup do Scintilla fica lento com milhares de itens; o restante aparece ao digitar mais
+            limit = start + max(0, self.MAX_MATCHES - len(candidates))
+            for i in range(start, min(limit, len(self.keys))):
+                if not self.keys[i].startswith(prefix):
+                    break
+                if self.names[i] not in seen:
+                    candidates.append(self.names[i])
+        return candidates
+
+    def autoCompletionSelected(self, selection):
+        self.languageApis.autoCompletionSelected(selection)
+
+    def callTips(self, context, commas, style, shifts):
+        return self.languageApis.callTips(context, commas, style, shifts)
+
+class CompletionManager(QObject):
+    VERSION = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.apis = {}
+        self.completions = {}
+        self.keys = {}
+        self.preparing = {}
+        self.projectNames = {}
+        self.worker = CompletionWordsWorker(self)
+        self.worker.wordsReady.connect(self.onWordsReady)
+        self.worker.projectWordsReady.connect(self.onProjectWordsReady)
+        self.worker.start(QThread.LowPriority)
+
+    def attach(self, ext, lexer):
+        apis = QsciAPIs(lexer)
+        apis.apiPreparationFinished.connect(lambda: self.onPrepared(ext))
+        self.apis[ext] = apis
+        # Criado depois do QsciAPIs, passa a ser o provedor de APIs do lexer
+        self.completions[ext] = CompletionAPIs(lexer, apis)
+        self.completions[ext].setNames(self.projectNames.get(ext, []))
+
+        key = hashlib.sha1(f'{self.VERSION}\0{ext}\0{sys.version}'.encode('utf-8')).hexdigest()[:16]
+        # Banco já preparado em uma execução anterior: carrega sem reconstruir
+        prepared = cachePath('apis', f'{ext[1:]}-{key}.prep')
+        if os.path.exists(prepared) and apis.loadPrepared(prepared):
+            self.keys[ext] = key
+            return
+        keywords = []
+        for keywordSet in range(1, 10):
+            keywords.extend((lexer.keywords(keywordSet) or '').split())
+        self.worker.submit(ext, key, keywords)
+
+    def setProjectSymbols(self, symbols):
+        self.worker.submitProject(symbols)
+
+    def onProjectWordsReady(self, names):
+        self.projectNames = names
+        for ext, completions in self.completions.items():
+            completions.setNames(names.get(ext, []))
+
+    def onWordsReady(self, ext, key, path):
+        apis = self.apis[ext]
+        apis.clear()
+        apis.load(path)
+        self.preparing[ext] = key
+        apis.prepare()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def onPrepared(self, ext):
+        key = self.preparing.pop(ext, None)
+        if not key:
+            return
+        self.keys[ext] = key
+        directory = os.path.dirname(cachePath('apis', 'x'))
+        self.apis[ext].savePrepared(os.path.join(directory, f'{ext[1:]}-{key}.prep'))
+        for name in os.listdir(directory):
+            if name.startswith(f'{ext[1:]}-') and name.endswith('.prep') and key not in name:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def stop(self):
+        for apis in self.apis.values():
+            apis.cancelPreparation()
+        self.worker.stop()
+
+class WorkspaceSnapshot:
+    # Estado da sessão em SQLite: restaurado na abertura antes de qualquer varredura do projeto
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path or cachePath('workspace.sqlite3')
+        self.db = self.connect(self.path)
+
+    @classmethod
+    def connect(cls, path):
+        db = sqlite3.connect(path, timeout=5)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        version = db.execute('PRAGMA user_version').fetchone()[0]
+        if version != cls.VERSION:
+            db.executescript('''
+                DROP TABLE IF EXISTS projects;
+                DROP TABLE IF EXISTS documents;
+                DROP TABLE IF EXISTS expanded;
+                DROP TABLE IF EXISTS listings;
+                CREATE TABLE projects (path TEXT PRIMARY KEY, current_file TEXT, opened REAL);
+                CREATE TABLE documents (path TEXT PRIMARY KEY, line INTEGER, col INTEGER, first_line INTEGER,
+                                        encoding TEXT, lexer TEXT, mtime_ns INTEGER, size INTEGER);
+                CREATE TABLE expanded (project TEXT, path TEXT, PRIMARY KEY (project, path));
+                CREATE TABLE listings (directory TEXT PRIMARY KEY, mtime_ns INTEGER, entries TEXT);
+            ''')
+            db.execute(f'PRAGMA user_version = {cls.VERSION}')
+            db.commit()
+        return db
+
+    def lastProject(self):
+        row = self.db.execute('SELECT path FROM projects ORDER BY opened DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    def projectState(self, project):
+        row = self.db.execute('SELECT current_file FROM projects WHERE path = ?', (project,)).fetchone()
+        expanded = [path for path, in self.db.execute('SELECT path FROM expanded WHERE project = ? ORDER BY length(path)', (project,))]
+        return (row[0] if row else None), expanded
+
+    def saveProject(self, project, currentFile, expanded):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO projects VALUES (?, ?, ?)', (project, currentFile, time.time()))
+            self.db.execute('DELETE FROM expanded WHERE project = ?', (project,))
+            self.db.executemany('INSERT INTO expanded VALUES (?, ?)', [(project, path) for path in expanded])
+
+    def document(self, path, stat=None):
+        # Encoding e lexer só valem se o arquivo não mudou; cursor e rolagem valem sempre
+        row = self.db.execute('SELECT line, col, first_line, encoding, lexer, mtime_ns, size FROM documents WHERE path = ?',
+                              (path,)).fetchone()
+        if not row:
+            return None
+        line, col, firstLine, encoding, lexer, mtime, size = row
+        if stat is None or (stat.st_mtime_ns, stat.st_size) != (mtime, size):
+            encoding = None
+        return {'line': line, 'col': col, 'firstLine': firstLine, 'encoding': encoding, 'lexer': lexer}
+
+    def saveDocument(self, path, line, col, firstLine, encoding, lexer, stat):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                            (path, line, col, firstLine, encoding, lexer, stat.st_mtime_ns, stat.st_size))
+
+    def cachedListing(self, directory):
+        row = self.db.execute('SELECT mtime_ns, entries FROM listings WHERE directory = ?', (directory,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def close(self):
+        self.db.close()
+
+class WorkspaceValidator(QThread):
+    # Confere o estado restaurado com o disco em segundo plano e atualiza as listagens em cache
+    directoryMissing = pyqtSignal(str)
+    directoryChanged = pyqtSignal(str)
+
+    def __init__(self, snapshotPath, directories, parent=None):
+        super().__init__(parent)
+        self.snapshotPath = snapshotPath
+        self.directories = directories
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+        self.wait()
+
+    def run(self):
+        db = WorkspaceSnapshot.connect(self.snapshotPath)
+        try:
+            for directory in self.directories:
+                if self.stopped:
+                    return
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    with db:
+                        db.execute('DELETE FROM listings WHERE directory = ?', (directory,))
+                    self.directoryMissing.emit(directory)
+                    continue
+                row = db.execute('SELECT mtime_ns FROM listings WHERE directory = ?', (directory,)).fetchone()
+                if row and row[0] == mtime:
+                    continue
+                try:
+                    with os.scandir(directory) as it:
+                        entries = sorted([entry.name, entry.is_dir()] for entry in it)
+                except OSError:
+                    continue
+                with db:
+                    db.execute('INSERT OR REPLACE INTO listings VALUES (?, ?, ?)', (directory, mtime, json.dumps(entries)))
+                if row:
+                    self.directoryChanged.emit(directory)
+        finally:
+            db.close()
+
+class EncodingNormalizer(QThread):
+    # Primeiro gera o relatório (dry run); só converte com a lista aprovada
+    reportReady = pyqtSignal(list)
+    converted = pyqtSignal(list)
+
+    def __init__(self, root, entries=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.entries = entries
+
+    def run(self):
+        if self.entries is None:
+            self.reportReady.emit(scanProjectEncodings(self.root))
+        else:
+            self.converted.emit(convertProjectEncodings(self.entries))
+
+class EncodingReportDialog(QDialog):
+    def __init__(self, root, entries, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Convert Project to UTF-8')
+        self.resize(700, 400)
+        counts = collections.Counter(entry['encoding'] for entry in entries)
+        summary = ', '.join(f"{count} {encoding}" for encoding, count in counts.most_common())
+        label = QLabel(f"{len(entries)} files under {root} are not UTF-8 ({summary}). They will be rewritten as UTF-8:")
+        label.setWordWrap(True)
+
+        report = QPlainTextEdit()
+        report.setReadOnly(True)
+        report.setPlainText('\n'.join(f"{entry['encoding']:<14} {entry['size']:>10}  {os.path.relpath(entry['path'], root)}"
+                                      for entry in sorted(entries, key=lambda entry: entry['path'])))
+        report.setFont(QFont('Courier New', 9))
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        buttons.addButton(f"Convert {len(entries)} files", QDialogButtonBox.AcceptRole)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(label)
+        layout.addWidget(report)
+        layout.addWidget(buttons)
+
+class FormatWorker(QThread):
+    # Projeto inteiro no pool de processos, ou só o texto do editor (sem gravar no disco)
+    projectFormatted = pyqtSignal(list, dict)
+    bufferFormatted = pyqtSignal(str, bool, object)
+
+    def __init__(self, root, path=None, data=None, skip=(), parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.path = path
+        self.data = data
+        self.skip = skip
+
+    def run(self):
+        if self.path is None:
+            self.projectFormatted.emit(*formatProject(self.root, skip=self.skip))
+            return
+        formatters = findFormatters(self.root)
+        tool = formatterFor(self.path, formatters)
+        if tool is None:
+            ext = os.path.splitext(self.path)[1].lower()
+            tools = FORMATTERS.get(ext)
+            message = f"{' or '.join(tools)} is not installed" if tools else f'no formatter supports {ext or "this file"} files'
+            self.bufferFormatted.emit(self.path, False, message)
+            return
+        self.bufferFormatted.emit(self.path, *runFormatter(formatterCommand(self.path, tool, formatters), self.path, self.data))
+
+class CloneDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Clone Repository')
+
+        self.urlEdit = QLineEdit()
+        self.urlEdit.setPlaceholderText('https://github.com/user/repo.git')
+        self.targetEdit = QLineEdit(QDir.currentPath())
+        browseButton = QPushButton('Browse...')
+        browseButton.clicked.connect(self.browse)
+        target = QHBoxLayout()
+        target.addWidget(self.targetEdit, 1)
+        target.addWidget(browseButton)
+
+        self.depthSpin = QSpinBox()
+        self.depthSpin.setRange(0, 1000000)
+        self.depthSpin.setSpecialValueText('Full history')
+        self.blobFilterCheck = QCheckBox('Partial clone (--filter=blob:none)')
+        self.sparseEdit = QLineEdit()
+        self.sparseEdit.setPlaceholderText('src docs (empty = whole tree)')
+
+        form = QFormLayout()
+        form.addRow('Repository URL:', self.urlEdit)
+        form.addRow('Clone into:', target)
+        form.addRow('Depth:', self.depthSpin)
+        form.addRow('', self.blobFilterCheck)
+        form.addRow('Sparse checkout paths:', self.sparseEdit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    def browse(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Directory to Clone Into", self.targetEdit.text())
+        if folder:
+            self.targetEdit.setText(folder)
+
+    def sparsePaths(self):
+        return [path for path in re.split(r'[\s,]+', self.sparseEdit.text()) if path]
+
+    def destination(self):
+        name = self.urlEdit.text().strip().rstrip('/').split('/')[-1].split(':')[-1]
+        if name.endswith('.git'):
+            name = name[:-4]
+        return os.path.join(self.targetEdit.text(), name or 'repository')
+
+    def cloneArguments(self):
+        arguments = ['clone', '--progress']
+        if self.depthSpin.value():
+            arguments += ['--depth', str(self.depthSpin.value())]
+        if self.blobFilterCheck.isChecked():
+            arguments.append('--filter=blob:none')
+        if self.sparsePaths():
+            arguments.append('--sparse')
+        return arguments + [self.urlEdit.text().strip(), self.destination()]
+
+def findGitRoot(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        if os.path.exists(os.path.join(directory, '.git')):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+def gitHeadRevision(repoRoot):
+    # Lê o HEAD direto dos arquivos do .git para não abrir um processo a cada verificação
+    gitDir = os.path.join(repoRoot, '.git')
+    try:
+        if os.path.isfile(gitDir):  # worktrees e submódulos
+            with open(gitDir, 'r') as f:
+                gitDir = os.path.join(repoRoot, f.read().split(':', 1)[1].strip())
+        with open(os.path.join(gitDir, 'HEAD'), 'r') as f:
+            head = f.read().strip()
+        if not head.startswith('ref:'):
+            return head
+        ref = head[4:].strip()
+        refPath = os.path.join(gitDir, ref)
+        if os.path.exists(refPath):
+            with open(refPath, 'r') as f:
+                return f.read().strip()
+        with open(os.path.join(gitDir, 'packed-refs'), 'r') as f:
+            for line in f:
+                if line.rstrip().endswith(' ' + ref):
+                    return line.split()[0]
+    except (OSError, IndexError):
+        pass
+    return None
+
+class DiffBaseCache:
+    # Texto base por revisão: (caminho, mtime, tamanho) no disco ou (caminho, commit) no git
+    def __init__(self, maxEntries=32):
+        self.entries = collections.OrderedDict()
+        self.maxEntries = maxEntries
+
+    def get(self, key, loader):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        value = loader()
+        self.entries[key] = value
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+        return value
+
+    def diskLines(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, 'disk'
+        def load():
+            _, text = readSource(path)
+            return text.splitlines() if text is not None else []
+        return self.get(('disk', path, st.st_mtime_ns, st.st_size), load), 'disk'
+
+    def headLines(self, path):
+        repoRoot = findGitRoot(path)
+        revision = gitHeadRevision(repoRoot) if repoRoot else None
+        if not revision:
+            return None, 'HEAD'
+        def load():
+            relative = os.path.relpath(os.path.abspath(path), repoRoot).replace(os.sep, '/')
+            result = subprocess.run(['git', 'show', f'{revision}:{relative}'], cwd=repoRoot, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            if result.returncode != 0:
+                return None  # arquivo fora do controle de versão
+            data = result.stdout
+            for encoding in ['utf-8', 'iso-8859-1']:
+                try:
+                    return data.decode(encoding).splitlines()
+                except UnicodeDecodeError:
+                    continue
+        return self.get(('HEAD', path, revision), load), f'HEAD ({revision[:7]})'
+
+    def revisionLines(self, path, revision):
+        repoRoot = findGitRoot(path)
+        if not repoRoot:
+            return None, revision
+        def load():
+            relative = os.path.relpath(os.path.abspath(path), repoRoot).replace(os.sep, '/')
+            result = subprocess.run(['git', 'show', f'{revision}:{relative}'], cwd=repoRoot, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            return result.stdout.decode('utf-8', errors='replace').splitlines() if result.returncode == 0 else []
+        return self.get(('rev', path, revision), load), revision[:7]
+
+class DiffWorker(QThread):
+    diffReady = pyqtSignal(str, int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = DiffBaseCache()
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def submit(self, tag, generation, path, base, text):
+        # Por tag só a requisição mais recente importa (ex.: gutter enquanto se digita)
+        with self.condition:
+            self.pending[tag] = (generation, path, base, text)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                tag, (generation, path, base, text) = self.pending.popitem()
+
+            if base == 'auto':
+                baseLines, label = self.cache.headLines(path)
+                if baseLines is None:
+                    baseLines, label = self.cache.diskLines(path)
+            elif base == 'HEAD':
+                baseLines, label = self.cache.headLines(path)
+            elif base == 'disk':
+                baseLines, label = self.cache.diskLines(path)
+            else:
+                baseLines, label = self.cache.revisionLines(path, base)
+            if baseLines is None:
+                self.diffReady.emit(tag, generation, None)
+                continue
+
+            if isinstance(text, tuple) and text[0] == 'disk':  # ('disk', outro): compara dois arquivos, ex.: logs de execução
+                currentLines, _ = self.cache.diskLines(text[1])
+            elif isinstance(text, tuple):  # ('rev', commit): compara duas revisões do histórico
+                currentLines, _ = self.cache.revisionLines(path, text[1])
+            else:
+                currentLines = text.splitlines() if isinstance(text, str) else text
+            opcodes = diffLines(baseLines, currentLines)
+            self.diffReady.emit(tag, generation, (baseLines, currentLines, opcodes, label))
+
+class DiffView(QDialog):
+    def __init__(self, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(1200, 800)
+        self.opcodes = []
+        self.syncing = False
+
+        self.leftLabel = QLabel()
+        self.rightLabel = QLabel()
+        self.summaryLabel = QLabel('Computing diff...')
+        previousButton = QPushButton('Previous Change')
+        previousButton.clicked.connect(lambda: self.jumpToChange(-1))
+        nextButton = QPushButton('Next Change')
+        nextButton.clicked.connect(lambda: self.jumpToChange(1))
+
+        header = QHBoxLayout()
+        header.addWidget(self.summaryLabel, 1)
+        header.addWidget(previousButton)
+        header.addWidget(nextButton)
+
+        self.left = self.createEditor()
+        self.right = self.createEditor()
+        # SC_UPDATE_V_SCROLL (4): o scrollbar do Scintilla não emite valueChanged ao rolar pelo código
+        self.left.SCN_UPDATEUI.connect(lambda updated: updated & 4 and self.syncScroll(self.left, self.right, True))
+        self.right.SCN_UPDATEUI.connect(lambda updated: updated & 4 and self.syncScroll(self.right, self.left, False))
+
+        columns = QSplitter(Qt.Horizontal)
+        for label, editor in ((self.leftLabel, self.left), (self.rightLabel, self.right)):
+            column = QWidget()
+            columnLayout = QVBoxLayout(column)
+            columnLayout.setContentsMargins(0, 0, 0, 0)
+            columnLayout.addWidget(label)
+            columnLayout.addWidget(editor)
+            columns.addWidget(column)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(header)
+        layout.addWidget(columns)
+
+    def createEditor(self):
+        editor = QsciScintilla()
+        editor.setReadOnly(True)
+        editor.setUtf8(True)
+        editor.setFont(QFont('Consolas', 10))
+        editor.setMarginsFont(QFont('Consolas', 10))
+        editor.setMarginWidth(0, QFontMetrics(QFont('Consolas', 10)).width("000000") + 6)
+        editor.setMarginLineNumbers(0, True)
+        editor.markerDefine(QsciScintilla.Background, DIFF_REMOVED_MARKER)
+        editor.setMarkerBackgroundColor(QColor('#5a1e2a'), DIFF_REMOVED_MARKER)
+        editor.markerDefine(QsciScintilla.Background, DIFF_ADDED_MARKER)
+        editor.setMarkerBackgroundColor(QColor('#1e4a2a'), DIFF_ADDED_MARKER)
+        return editor
+
+    def setDiff(self, result, leftTitle, rightTitle):
+        if result is None:
+            self.summaryLabel.setText('No base version is available for this file.')
+            return
+        baseLines, currentLines, opcodes, label = result
+        self.opcodes = [op for op in opcodes if op[0] != 'equal']
+        self.leftLabel.setText(leftTitle or label)
+        self.rightLabel.setText(rightTitle)
+        self.left.setText('\n'.join(baseLines))
+        self.right.setText('\n'.join(currentLines))
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            for line in range(i1, i2):
+                self.left.markerAdd(line, DIFF_REMOVED_MARKER)
+            for line in range(j1, j2):
+                self.right.markerAdd(line, DIFF_ADDED_MARKER)
+        added = sum(j2 - j1 for _, _, _, j1, j2 in self.opcodes)
+        removed = sum(i2 - i1 for _, i1, i2, _, _ in self.opcodes)
+        self.summaryLabel.setText(f"{len(self.opcodes)} changes: +{added} -{removed} lines")
+        self.currentChange = -1
+        self.allOpcodes = opcodes
+
+    def mapLine(self, line, fromLeft):
+        # Converte uma linha de um lado para a linha correspondente do outro usando os opcodes
+        opcodes = getattr(self, 'allOpcodes', [])
+        starts = [op[1] if fromLeft else op[3] for op in opcodes]
+        index = bisect.bisect_right(starts, line) - 1
+        if index < 0:
+            return line
+        tag, i1, i2, j1, j2 = opcodes[index]
+        if fromLeft:
+            return j1 + min(line - i1, max(0, j2 - j1 - 1)) if tag != 'equal' else j1 + (line - i1)
+        return i1 + min(line - j1, max(0, i2 - i1 - 1)) if tag != 'equal' else i1 + (line - j1)
+
+    def syncScroll(self, source, target, fromLeft):
+        if self.syncing:
+            return
+        self.syncing = True
+        target.setFirstVisibleLine(self.mapLine(source.firstVisibleLine(), fromLeft))
+        self.syncing = False
+
+    def jumpToChange(self, step):
+        if not self.opcodes:
+            return
+        self.currentChange = (self.currentChange + step) % len(self.opcodes)
+        tag, i1, i2, j1, j2 = self.opcodes[self.currentChange]
+        self.right.setFirstVisibleLine(max(0, j1 - 3))
+        self.right.setCursorPosition(j1, 0)
+
+def gitTokens(repoRoot, arguments, process=None):
+    # Saída do git separada por NUL (-z), lida aos poucos para não carregar o histórico inteiro na memória
+    process = process or subprocess.Popen(['git', '-c', 'core.quotePath=false'] + arguments, cwd=repoRoot,
+                                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    pending = b''
+    try:
+        while True:
+            chunk = process.stdout.read(1 << 16)
+            if not chunk:
+                break
+            tokens = (pending + chunk).split(b'\0')
+            pending = tokens.pop()
+            for token in tokens:
+                yield token.decode('utf-8', errors='replace')
+        if pending:
+            yield pending.decode('utf-8', errors='replace')
+    finally:
+        process.stdout.close()
+        process.wait()
+
+class GitHistoryIndex:
+    # Histórico do repositório em SQLite (um arquivo por repo); a cada HEAD novo só os commits novos são lidos
+    VERSION = 1
+    LOG_FORMAT = '--format=%x1e%H%x1f%an%x1f%at%x1f%s'
+
+    def __init__(self, repoRoot, path=None):
+        self.repoRoot = os.path.abspath(repoRoot)
+        self.path = path or cachePath('git', hashlib.sha1(self.repoRoot.encode('utf-8')).hexdigest() + '.sqlite3')
+        self.db = self.connect(self.path)
+
+    @classmethod
+    def connect(cls, path):
+        db = sqlite3.connect(path, timeout=5)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        version = db.execute('PRAGMA user_version').fetchone()[0]
+        if version != cls.VERSION:
+            db.executescript('''
+                DROP TABLE IF EXISTS commits;
+                DROP TABLE IF EXISTS changes;
+                DROP TABLE IF EXISTS meta;
+                DROP TABLE IF EXISTS blame;
+                CREATE TABLE commits (hash TEXT PRIMARY KEY, seq INTEGER, author TEXT, time INTEGER, summary TEXT);
+                CREATE TABLE changes (hash TEXT, path TEXT, status TEXT, old_path TEXT, PRIMARY KEY (hash, path));
+                CREATE INDEX changes_path ON changes (path);
+                CREATE INDEX commits_seq ON commits (seq);
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE blame (path TEXT, blob TEXT, commits TEXT, PRIMARY KEY (path, blob));
+            ''')
+            db.execute(f'PRAGMA user_version = {cls.VERSION}')
+            db.commit()
+        return db
+
+    def tip(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'tip'").fetchone()
+        return row[0] if row else None
+
+    def update(self, stopped=lambda: False):
+        head = gitHeadRevision(self.repoRoot)
+        tip = self.tip()
+        if not head or head == tip:
+            return 0
+        arguments = ['log', '-z', '--raw', '-M', '--no-abbrev', self.LOG_FORMAT, head]
+        incremental = tip and subprocess.run(['git', 'merge-base', '--is-ancestor', tip, head], cwd=self.repoRoot,
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+        if incremental:
+            arguments += ['--not', tip]
+
+        # O git log vem do mais novo para o mais antigo; cada atualização ganha uma faixa de seq acima das anteriores
+        base = (self.db.execute('SELECT MAX(seq) FROM commits').fetchone()[0] or 0) + (1 << 32)
+        count = 0
+        commits = []
+        changes = []
+        current = None
+        paths = 0
+        status = None
+        process = subprocess.Popen(['git', '-c', 'core.quotePath=false'] + arguments, cwd=self.repoRoot,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            with self.db:
+                if not incremental:
+                    # Primeira indexação ou histórico reescrito (rebase, reset)
+                    self.db.execute('DELETE FROM commits')
+                    self.db.execute('DELETE FROM changes')
+                    self.db.execute('DELETE FROM blame')
+                for token in gitTokens(self.repoRoot, arguments, process):
+                    token = token.lstrip('\n')
+                    if token.startswith('\x1e'):
+                        if stopped():
+                            raise InterruptedError
+                        fields = token[1:].split('\x1f', 3)
+                        if len(fields) < 4:
+                            continue
+                        current = fields[0]
+                        commits.append((current, base - count, fields[1], int(fields[2] or 0), fields[3].splitlines()[0] if fields[3] else ''))
+                        count += 1
+                    elif token.startswith(':'):
+                        status = token.split()[-1]
+                        paths = 2 if status[:1] in ('R', 'C') else 1
+                        names = []
+                    elif paths and current:
+                        names.append(token)
+                        paths -= 1
+                        if not paths:
+                            old, new = (names[0], names[1]) if len(names) == 2 else (None, names[0])
+                            changes.append((current, new, status[:1], old))
+                    if len(changes) >= 5000 or len(commits) >= 5000:
+                        self.db.executemany('INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?)', commits)
+                        self.db.executemany('INSERT OR IGNORE INTO changes VALUES (?, ?, ?, ?)', changes)
+                        commits, changes = [], []
+                self.db.executemany('INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?)', commits)
+                self.db.executemany('INSERT OR IGNORE INTO changes VALUES (?, ?, ?, ?)', changes)
+                if process.returncode != 0:
+                    raise OSError(f'git log exited with {process.returncode}')
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('tip', ?)", (head,))
+        except InterruptedError:
+            process.kill()
+            return 0
+        return count
+
+    def fileLog(self, relative):
+        # Segue renomeações: antes do commit que renomeou, a busca continua pelo nome antigo
+        entries = []
+        path = relative
+        before = None
+        while path:
+            query = ('SELECT c.hash, c.seq, c.author, c.time, c.summary, ch.status, ch.old_path FROM changes ch '
+                     'JOIN commits c ON c.hash = ch.hash WHERE ch.path = ?')
+            arguments = [path]
+            if before is not None:
+                query += ' AND c.seq < ?'
+                arguments.append(before)
+            following = None
+            for commit, seq, author, timestamp, summary, status, oldPath in self.db.execute(query + ' ORDER BY c.seq DESC', arguments):
+                entries.append({'hash': commit, 'author': author, 'time': timestamp, 'summary': summary, 'status': status, 'path': path})
+                if status == 'R' and oldPath:
+                    following = (oldPath, seq)
+                    break
+            path, before = following or (None, None)
+        return entries
+
+    def blameRevisions(self, relative, stopped=lambda: False):
+        # Arquivo no formato do "git blame -S": cada commit que tocou o arquivo tem como pai o anterior que também tocou
+        if not self.tip():
+            return None
+        if self.tip() != gitHeadRevision(self.repoRoot):
+            self.update(stopped)
+        chain = []
+        for entry in self.fileLog(relative):
+            chain.append(entry['hash'])
+            if entry['status'] == 'A':
+                break  # antes disso o caminho pertencia a outro arquivo
+        if not chain:
+            return None
+        path = self.path + '.revs'
+        with open(path, 'w') as f:
+            for commit, parent in zip(chain, chain[1:] + ['']):
+                f.write(f"{commit} {parent}".rstrip() + '\n')
+        return path
+
+    def cachedBlame(self, relative, blob):
+        row = self.db.execute('SELECT commits FROM blame WHERE path = ? AND blob = ?', (relative, blob)).fetchone()
+        if not row:
+            return None
+        commits = json.loads(row[0])
+        info = {}
+        for unique in set(commits):
+            found = self.commitInfo(unique)
+            info[unique] = (unique, found['author'], found['time'], found['summary']) if found else (unique, '', 0, '')
+        return {line: info[commit] for line, commit in enumerate(commits, 1)}
+
+    def storeBlame(self, relative, blob, lines, lineCount):
+        commits = [lines[line][0] for line in range(1, lineCount + 1) if line in lines]
+        if len(commits) != lineCount or any(commit.strip('0') == '' for commit in commits):
+            return
+        with self.db:
+            self.db.execute('DELETE FROM blame WHERE path = ?', (relative,))
+            self.db.execute('INSERT INTO blame VALUES (?, ?, ?)', (relative, blob, json.dumps(commits)))
+
+    def commitInfo(self, commit):
+        row = self.db.execute('SELECT author, time, summary FROM commits WHERE hash = ?', (commit,)).fetchone()
+        return {'author': row[0], 'time': row[1], 'summary': row[2]} if row else None
+
+    def close(self):
+        self.db.close()
+
+def parseBlameIncremental(tokens):
+    # Formato do --incremental: "<sha> <linha original> <linha final> <n>" seguido dos cabeçalhos do commit
+    # (só na primeira vez que ele aparece) e terminado por "filename"
+    info = {}
+    current = None
+    for line in tokens:
+        if current is None:
+            parts = line.split()
+            if len(parts) == 4 and len(parts[0]) >= 40:
+                current = (parts[0], int(parts[2]), int(parts[3]))
+                info.setdefault(parts[0], {})
+            continue
+        key, _, value = line.partition(' ')
+        if key == 'filename':
+            yield current[0], current[1], current[2], info[current[0]]
+            current = None
+        elif key in ('author', 'author-time', 'summary'):
+            info[current[0]][key] = value
+
+class GitHistoryWorker(QThread):
+    # Mesmo padrão do DiffWorker: fila por tipo de pedido, só o mais recente de cada tipo é atendido
+    historyUpdated = pyqtSignal(str, int)
+    fileLogReady = pyqtSignal(int, str, list)
+    blameReady = pyqtSignal(int, str, dict)
+    failed = pyqtSignal(str)
+
+    MAX_BLAME_FILES = 16
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.indexes = {}
+        self.blames = collections.OrderedDict()
+        self.blobs = {}
+
+    def submitUpdate(self, repoRoot):
+        self.submit('update', (repoRoot,))
+
+    def submitFileLog(self, generation, path):
+        self.submit('log', (generation, path))
+
+    def submitBlame(self, generation, path, firstLine, lastLine):
+        self.submit('blame', (generation, path, firstLine, lastLine))
+
+    def submit(self, kind, request):
+        with self.condition:
+            self.pending[kind] = request
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    while not self.pending and not self.stopped:
+                        self.condition.wait()
+                    if self.stopped:
+                        return
+                    # O blame da área visível tem prioridade sobre a indexação
+                    kind = next(k for k in ('blame', 'log', 'update', 'blameFile') if k in self.pending)
+                    request = self.pending.pop(kind)
+                try:
+                    getattr(self, kind)(*request)
+                except Exception as e:
+                    # Um pedido que falha (git ausente, banco corrompido, saída inesperada do git) não derruba a thread
+                    self.failed.emit(f"{kind} failed: {type(e).__name__}: {e}")
+                    if kind == 'log':
+                        self.fileLogReady.emit(request[0], request[1], [])
+        finally:
+            for index in self.indexes.values():
+                index.close()
+
+    def indexFor(self, repoRoot):
+        if repoRoot not in self.indexes:
+            self.indexes[repoRoot] = GitHistoryIndex(repoRoot)
+        return self.indexes[repoRoot]
+
+    def update(self, repoRoot):
+        count = self.indexFor(repoRoot).update(lambda: self.stopped)
+        if count:
+            self.historyUpdated.emit(repoRoot, count)
+
+    def log(self, generation, path):
+        repoRoot = findGitRoot(path)
+        if not repoRoot:
+            self.fileLogReady.emit(generation, path, [])
+            return
+        index = self.indexFor(repoRoot)
+        index.update(lambda: self.stopped)
+        relative = os.path.relpath(os.path.abspath(path), repoRoot).replace(os.sep, '/')
+        self.fileLogReady.emit(generation, path, index.fileLog(relative))
+
+    def blame(self, generation, path, firstLine, lastLine):
+        repoRoot = findGitRoot(path)
+        if not repoRoot:
+            return
+        try:
+            blob, lineCount = self.blobFor(path)
+        except OSError:
+            return
+        relative = os.path.relpath(os.path.abspath(path), repoRoot).replace(os.sep, '/')
+        lines = self.cachedBlame(repoRoot, relative, path, blob)
+        lastLine = min(lastLine, lineCount)
+        visible = lambda: {line: lines[line] for line in range(firstLine, lastLine + 1) if line in lines}
+
+        missing = [line for line in range(firstLine, lastLine + 1) if line not in lines]
+        if missing:
+            # Primeiro só a área visível, com resultados parciais enquanto o git percorre o histórico
+            self.runBlame(repoRoot, relative, lines, (missing[0], missing[-1]),
+                          lambda: self.blameReady.emit(generation, path, visible()))
+            # Depois o arquivo inteiro em segundo plano, para as próximas rolagens e aberturas
+            if len(lines) < lineCount:
+                self.submit('blameFile', (path,))
+        self.blameReady.emit(generation, path, visible())
+
+    def blameFile(self, path):
+        repoRoot = findGitRoot(path)
+        try:
+            blob, lineCount = self.blobFor(path)
+        except OSError:
+            return
+        relative = os.path.relpath(os.path.abspath(path), repoRoot).replace(os.sep, '/')
+        lines = self.cachedBlame(repoRoot, relative, path, blob)
+        if len(lines) < lineCount and self.runBlame(repoRoot, relative, lines, None, lambda: None):
+            self.indexFor(repoRoot).storeBlame(relative, blob, lines, lineCount)
+
+    def cachedBlame(self, repoRoot, relative, path, blob):
+        # Em memória por conteúdo + HEAD; no disco só blames completos e sem linhas pendentes de commit
+        head = gitHeadRevision(repoRoot)
+        key = (path, blob, head)
+        if key not in self.blames:
+            previous = [k for k in self.blames if k[0] == path]
+            lines = self.indexFor(repoRoot).cachedBlame(relative, blob) or self.derivedBlame(repoRoot, relative, path, head)
+            for stale in previous:
+                del self.blames[stale]
+            self.blames[key] = lines or {}
+        self.blames.move_to_end(key)
+        while len(self.blames) > self.MAX_BLAME_FILES:
+            self.blames.popitem(last=False)
+        return self.blames[key]
+
+    def derivedBlame(self, repoRoot, relative, path, head):
+        # Arquivo salvo com alterações: reaproveita o blame da versão do HEAD e marca só as linhas diferentes
+        result = subprocess.run(['git', 'show', f'HEAD:{relative}'], cwd=repoRoot, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return None
+        headBlob = hashlib.sha1(b'blob %d\0' % len(result.stdout) + result.stdout).hexdigest()
+        base = self.blames.get((path, headBlob, head)) or self.indexFor(repoRoot).cachedBlame(relative, headBlob)
+        if not base:
+            return None
+        with open(path, 'rb') as f:
+            currentLines = f.read().splitlines()
+        uncommitted = ('0' * 40, 'Not Committed Yet', int(time.time()), '')
+        lines = {}
+        for tag, i1, i2, j1, j2 in diffLines(result.stdout.splitlines(), currentLines):
+            for offset in range(j2 - j1):
+                lines[j1 + offset + 1] = base.get(i1 + offset + 1) if tag == 'equal' else uncommitted
+        return {line: entry for line, entry in lines.items() if entry}
+
+    def blobFor(self, path):
+        # Mesmo id que o git daria ao conteúdo atual do arquivo
+        st = os.stat(path)
+        cached = self.blobs.get(path)
+        if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+            return cached[1:]
+        with open(path, 'rb') as f:
+            data = f.read()
+        blob = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+        lineCount = data.count(b'\n') + (not data.endswith(b'\n') and bool(data))
+        self.blobs[path] = ((st.st_mtime_ns, st.st_size), blob, lineCount)
+        return blob, lineCount
+
+    def runBlame(self, repoRoot, relative, lines, lineRange, progress):
+        arguments = ['blame', '--incremental']
+        revisions = self.indexFor(repoRoot).blameRevisions(relative, lambda: self.stopped)
+        if revisions:
+            # Só os commits que tocaram o arquivo (do índice), em vez de o git varrer o repositório inteiro
+            arguments += ['-S', revisions]
+        if lineRange:
+            arguments += ['-L', f'{lineRange[0]},{lineRange[1]}']
+        process = subprocess.Popen(['git', '-c', 'core.quotePath=false'] + arguments + ['--', relative], cwd=repoRoot,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        lastProgress = time.perf_counter()
+        try:
+            output = (line.decode('utf-8', errors='replace').rstrip('\n') for line in process.stdout)
+            for commit, start, count, info in parseBlameIncremental(output):
+                entry = (commit, info.get('author', ''), int(info.get('author-time', 0)), info.get('summary', ''))
+                for line in range(start, start + count):
+                    lines[line] = entry
+                if self.stopped:
+                    process.kill()
+                    return False
+                if time.perf_counter() - lastProgress > 0.05:
+                    lastProgress = time.perf_counter()
+                    progress()
+        finally:
+            process.stdout.close()
+            process.wait()
+        return process.returncode == 0
+
+class FileLogPanel(QWidget):
+    # Histórico do arquivo atual; duplo clique abre o diff do commit
+    showCommit = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.repoRoot = ''
+        self.entries = []
+        self.statusLabel = QLabel('Open a file and use Git > File History.')
+        self.statusLabel.setStyleSheet("color: #e0e0ff;")
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(['Commit', 'Date', 'Author', 'Summary'])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.setStyleSheet("background-color: #00093a; color: #c9dcff;")
+        self.table.doubleClicked.connect(self.onDoubleClicked)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.statusLabel)
+        layout.addWidget(self.table)
+
+    def setLoading(self, path):
+        self.statusLabel.setText(f"Loading the history of {os.path.basename(path)}...")
+
+    def setEntries(self, path, repoRoot, entries):
+        self.repoRoot = repoRoot
+        self.entries = entries
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            date = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['time']))
+            summary = entry['summary'] if entry['path'] == entries[0]['path'] else f"{entry['summary']}  ({entry['path']})"
+            for column, value in enumerate([entry['hash'][:8], date, entry['author'], summary]):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.statusLabel.setText(f"{len(entries)} commits touched {os.path.basename(path)}" if entries
+                                 else f"{os.path.basename(path)} has no git history.")
+
+    def onDoubleClicked(self, index):
+        entry = self.entries[index.row()]
+        self.showCommit.emit(entry['hash'], os.path.join(self.repoRoot, *entry['path'].split('/')))
+
+EDIT_JOURNALS = []
+
+def processAlive(pid):
+    if sys.platform == 'win32':
+        # No Windows, os.kill(pid, 0) encerraria o processo
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if handle:
+            ctypes.windll.kernel32.CloseHandle(handle)
+        return bool(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def syncEditJournals():
+    for journal in EDIT_JOURNALS:
+        journal.sync()
+
+class EditJournal:
+    # Diário de recuperação: uma linha por modificação do editor, em bytes UTF-8 como no Scintilla.
+    #   b <sha1> <caminho> <sufixo>  buffer igual ao arquivo em disco (cujo conteúdo tem esse sha1)
+    #   t <caminho> <texto>  buffer com o conteúdo completo (gerado pela compactação)
+    #   i <pos> <texto>      inserção          d <pos> <tamanho>   remoção
+    #   c                    nada a recuperar
+    COMPACT_BYTES = 1024 * 1024
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.dirname(cachePath('journal', 'session'))
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f'{os.getpid()}-{int(time.time())}.journal')
+        self.file = None
+        self.bufferPath = None
+        self.dirty = False
+        self.deltaBytes = 0
+        self.discarded = False
+        EDIT_JOURNALS.append(self)
+
+    def write(self, record):
+        # Depois do discard() nada mais é gravado: o arquivo não pode reaparecer após o encerramento
+        if self.discarded:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8', newline='\n')
+        self.file.write(record)
+        self.deltaBytes += len(record)
+        self.dirty = True
+
+    def begin(self, path, text):
+        # Novo buffer sem alterações: basta o hash, o conteúdo está no disco. As quebras de linha
+        # finais que o salvamento remove vão junto, para as posições continuarem valendo.
+        self.bufferPath = os.path.abspath(path)
+        stripped = text.rstrip('\n')
+        digest = hashlib.sha1(stripped.encode('utf-8')).hexdigest()
+        self.write(f'b {digest} {json.dumps(self.bufferPath)} {json.dumps(text[len(stripped):])}\n')
+        self.deltaBytes = 0
+
+    def close(self):
+        if self.bufferPath is not None:
+            self.bufferPath = None
+            self.write('c\n')
+
+    def insert(self, position, data):
+        if self.bufferPath is not None:
+            self.write(f'i {position} {json.dumps(data.decode("utf-8", "surrogateescape"), ensure_ascii=False)}\n')
+
+    def delete(self, position, length):
+        if self.bufferPath is not None:
+            self.write(f'd {position} {length}\n')
+
+    def sync(self, currentText=None):
+        # Chamado periodicamente: fsync do que foi escrito e compactação quando os deltas crescem demais
+        if self.discarded:
+            return
+        if currentText is not None and self.bufferPath is not None and self.deltaBytes > self.COMPACT_BYTES:
+            self.compact(currentText())
+        if self.file is not None and self.dirty:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.dirty = False
+
+    def compact(self, text):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(f't {json.dumps(self.bufferPath)} {json.dumps(text, ensure_ascii=False)}\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file is not None:
+            self.file.close()
+        os.replace(tmp, self.path)
+        self.file = open(self.path, 'a', encoding='utf-8', newline='\n')
+        self.deltaBytes = 0
+        self.dirty = False
+
+    def discard(self):
+        # Encerramento normal: não há o que recuperar
+        self.discarded = True
+        self.bufferPath = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        if self in EDIT_JOURNALS:
+            EDIT_JOURNALS.remove(self)
+
+    @staticmethod
+    def orphans(directory):
+        # Diários de sessões cujo processo não existe mais (ex.: travou ou foi morto)
+        found = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return found
+        for name in names:
+            if not name.endswith('.journal'):
+                continue
+            try:
+                pid = int(name.split('-', 1)[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not processAlive(pid):
+                found.append(os.path.join(directory, name))
+        return sorted(found, key=os.path.getmtime)
+
+    @staticmethod
+    def replay(journalPath):
+        # Devolve (caminho, texto) do último buffer com alterações não salvas, ou None
+        path = None
+        data = None
+        try:
+            with open(journalPath, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        for line in lines:
+            if not line.endswith('\n'):
+                break  # última linha incompleta (queda no meio da escrita)
+            try:
+                kind, _, rest = line[:-1].partition(' ')
+                if kind == 'b':
+                    digest, _, rest = rest.partition(' ')
+                    encodedPath, _, encodedSuffix = rest.rpartition(' ')
+                    path = json.loads(encodedPath)
+                    data = None
+                    try:
+                        _, text = readSource(path)
+                    except OSError:
+                        text = None
+                    if text is not None:
+                        disk = text.rstrip('\n').encode('utf-8')
+                        # Se o arquivo mudou desde então, os deltas não se aplicam mais
+                        if hashlib.sha1(disk).hexdigest() == digest:
+                            data = bytearray(disk + json.loads(encodedSuffix).encode('utf-8'))
+                elif kind == 't':
+                    encodedPath, _, encodedText = rest.partition(' ')
+                    path = json.loads(encodedPath)
+                    data = bytearray(json.loads(encodedText).encode('utf-8'))
+                elif kind == 'c':
+                    path = data = None
+                elif data is not None and kind == 'i':
+                    position, _, encodedText = rest.partition(' ')
+                    position = int(position)
+                    data[position:position] = json.loads(encodedText).encode('utf-8', 'surrogateescape')
+                elif data is not None and kind == 'd':
+                    position, length = map(int, rest.split())
+                    del data[position:position + length]
+            except (ValueError, OSError):
+                return None
+        if path is None or data is None:
+            return None
+        text = data.decode('utf-8', 'replace')
+        _, disk = readSource(path) if os.path.exists(path) else (None, None)
+        if disk is not None and disk.rstrip('\n') == text:
+            return None
+        return path, text
+
+def fileFingerprint(path, withHash=True):
+    # (mtime, tamanho, sha1) — o hash só é calculado quando o stat não basta
+    st = os.stat(path)
+    digest = None
+    if withHash:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+    return st.st_mtime_ns, st.st_size, digest
+
+class FileWatcherService(QObject):
+    filesChanged = pyqtSignal(list)
+    directoriesChanged = pyqtSignal(list)
+
+    COALESCE_MS = 200
+    MAX_DELAY = 1.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.onFileChanged)
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self.files = set()
+        self.pendingFiles = set()
+        self.pendingDirectories = set()
+        self.firstPending = None
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.timeout.connect(self.flush)
+
+    def watchFile(self, path):
+        path = os.path.abspath(path)
+        self.files.add(path)
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+
+    def unwatchFile(self, path):
+        path = os.path.abspath(path)
+        self.files.discard(path)
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+
+    def watchDirectories(self, directories):
+        # Limita a quantidade de watches do inotify em projetos grandes
+        watched = set(self.watcher.directories())
+        new = [d for d in directories if d not in watched][:max(0, MAX_WATCHED_DIRS - len(watched))]
+        if new:
+            self.watcher.addPaths(new)
+
+    def unwatchDirectories(self, directories):
+        watched = set(self.watcher.directories())
+        stale = [d for d in directories if d in watched]
+        if stale:
+            self.watcher.removePaths(stale)
+
+    def clearDirectories(self):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def onFileChanged(self, path):
+        # Formatadores e o git substituem o arquivo (rename), o que remove o watch
+        if path in self.files and os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.pendingFiles.add(path)
+        self.schedule()
+
+    def onDirectoryChanged(self, path):
+        self.pendingDirectories.add(path)
+        # Arquivos recriados dentro do diretório voltam a ser observados
+        for file in self.files:
+            if os.path.dirname(file) == path and os.path.exists(file) and file not in self.watcher.files():
+                self.watcher.addPath(file)
+                self.pendingFiles.add(file)
+        self.schedule()
+
+    def schedule(self):
+        # Agrupa rajadas de eventos (ex.: um checkout) em um único lote
+        now = time.perf_counter()
+        if self.firstPending is None:
+            self.firstPending = now
+        if now - self.firstPending >= self.MAX_DELAY:
+            self.flush()
         else:
-            super().mouseMoveEvent(event)
+            self.flushTimer.start(self.COALESCE_MS)
+
+    def flush(self):
+        self.flushTimer.stop()
+        self.firstPending = None
+        files, self.pendingFiles = sorted(self.pendingFiles), set()
+        directories, self.pendingDirectories = sorted(self.pendingDirectories), set()
+        if directories:
+            self.directoriesChanged.emit(directories)
+        if files:
+            self.filesChanged.emit(files)
+
+LOCAL_IMPORT_PATTERNS = {
+    '.py': re.compile(r'^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[\w \t,]+)|import[ \t]+([\w., \t]+))', re.M),
+    '.js': re.compile(r'''(?:require\(\s*|\bfrom\s*|^\s*import\s*)['"](\.\.?/[^'"]+)['"]''', re.M),
+    '.cpp': re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.M),
+    '.h': re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.M),
+    '.hpp': re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.M),
+    '.rb': re.compile(r'''^\s*require_relative\s*\(?\s*['"]([^'"]+)['"]''', re.M),
+}
+MAX_LOCAL_DEPENDENCIES = 200
+
+def localImportCandidates(path, text):
+    ext = os.path.splitext(path)[1].lower()
+    directory = os.path.dirname(path)
+    pattern = LOCAL_IMPORT_PATTERNS.get(ext)
+    if ext == '.java':
+        # O javac resolve as outras classes do mesmo pacote pelo diretório
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.java')]
+    if pattern is None:
+        return []
+
+    candidates = []
+    for match in pattern.finditer(text):
+        if ext == '.py':
+            module, names, modules = match.groups()
+            if modules is not None:
+                targets = [m.strip() for m in modules.split(',')]
+                base = directory
+            else:
+                dots = len(module) - len(module.lstrip('.'))
+                base = directory
+                for _ in range(max(0, dots - 1)):
+                    base = os.path.dirname(base)
+                module = module.lstrip('.')
+                # "from pacote import modulo" pode importar submódulos
+                targets = [module] if module else []
+                targets += [f"{module}.{n.strip()}" if module else n.strip() for n in names.strip('()').split(',') if n.strip()]
+            for target in targets:
+                target = target.split(' as ')[0].strip()
+                if not target:
+                    continue
+                parts = target.split('.')
+                for i in range(len(parts), 0, -1):
+                    stem = os.path.join(base, *parts[:i])
+                    candidates += [stem + '.py', os.path.join(stem, '__init__.py')]
+        elif ext == '.js':
+            stem = os.path.normpath(os.path.join(directory, match.group(1)))
+            candidates += [stem, stem + '.js', os.path.join(stem, 'index.js')]
+        elif ext == '.rb':
+            stem = os.path.normpath(os.path.join(directory, match.group(1)))
+            candidates += [stem if stem.endswith('.rb') else stem + '.rb']
+        else:
+            candidates.append(os.path.normpath(os.path.join(directory, match.group(1))))
+    return candidates
+
+def localDependencies(path):
+    # O arquivo e tudo o que ele importa localmente, de forma transitiva (módulos do sistema ficam de fora)
+    path = os.path.abspath(path)
+    seen = {path}
+    pending = [path]
+    while pending and len(seen) < MAX_LOCAL_DEPENDENCIES:
+        current = pending.pop()
+        try:
+            with open(current, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            candidates = localImportCandidates(current, text)
+        except OSError:
+            continue
+        for candidate in candidates:
+            candidate = os.path.abspath(candidate)
+            if candidate not in seen and os.path.isfile(candidate):
+                seen.add(candidate)
+                pending.append(candidate)
+    return sorted(seen)
+
+# Build incremental de projetos C++/Java; tudo o que é gerado fica em <raiz>/.build (ignorado pela árvore)
+BUILD_DIR = '.build'
+CPP_EXTENSIONS = ('.cpp', '.cc', '.cxx')
+MAIN_FUNCTION = re.compile(rb'\bint\s+main\s*\(')
+JAVA_PACKAGE = re.compile(rb'^\s*package\s+([\w.]+)\s*;', re.M)
+
+def parseDepfile(path):
+    # Formato make gerado pelo -MMD: "alvo.o: fonte.cpp a.h \<quebra> b.h"; espaços nos nomes vêm escapados
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read().replace('\\\n', ' ')
+    rule = text.split('\n', 1)[0]
+    separator = rule.find(': ')
+    if separator < 0:
+        return []
+    return [item.replace('\\ ', ' ') for item in re.findall(r'(?:\\ |\S)+', rule[separator + 2:])]
+
+class BuildEngine:
+    def __init__(self, jobs=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        # Caches por mtime: um rebuild sem mudanças só faz stat nos arquivos
+        self.mainCache = {}
+        self.depCache = {}
+
+    def build(self, path, log=lambda message: None):
+        path = os.path.abspath(path)
+        started = time.perf_counter()
+        if path.endswith('.java'):
+            result = self.buildJava(path, log)
+        else:
+            result = self.buildCpp(path, log)
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def sources(self, root, extensions):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            for name in filenames:
+                if name.endswith(extensions):
+                    yield os.path.join(dirpath, name)
+
+    def mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def definesMain(self, path):
+        mtime = self.mtime(path)
+        cached = self.mainCache.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, bool(MAIN_FUNCTION.search(f.read())))
+            self.mainCache[path] = cached
+        return cached[1]
+
+    def prerequisites(self, depfile):
+        mtime = self.mtime(depfile)
+        if mtime is None:
+            return None
+        cached = self.depCache.get(depfile)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, parseDepfile(depfile))
+            self.depCache[depfile] = cached
+        return cached[1]
+
+    def objectStale(self, obj, depfile):
+        built = self.mtime(obj)
+        prerequisites = self.prerequisites(depfile)
+        if built is None or not prerequisites:
+            return True
+        for prerequisite in prerequisites:
+            mtime = self.mtime(prerequisite)
+            if mtime is None or mtime > built:
+                return True
+        return False
+
+    def compileUnit(self, unit):
+        source, obj, depfile = unit
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        result = subprocess.run(['g++', '-c', source, '-o', obj, '-MMD', '-MF', depfile],
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return result.returncode, result.stdout.decode('utf-8', errors='replace')
+
+    def buildCpp(self, path, log):
+        # As unidades são os .cpp do diretório do alvo (e subdiretórios), menos os que têm o seu próprio main()
+        root = os.path.dirname(path)
+        buildDir = os.path.join(root, BUILD_DIR)
+        sources = sorted(source for source in self.sources(root, CPP_EXTENSIONS) if source == path or not self.definesMain(source))
+        units = []
+        for source in sources:
+            obj = os.path.join(buildDir, 'obj', os.path.relpath(source, root) + '.o')
+            units.append((source, obj, os.path.splitext(obj)[0] + '.d'))
+        stale = [unit for unit in units if self.objectStale(unit[1], unit[2])]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        executable = os.path.join(buildDir, stem + ('.exe' if os.name == 'nt' else ''))
+
+        output = []
+        if stale:
+            log(f"Compiling {len(stale)} of {len(units)} translation units with {min(self.jobs, len(stale))} jobs...")
+            failed = False
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                for unit, (code, text) in zip(stale, pool.map(self.compileUnit, stale)):
+                    if text:
+                        output.append(text)
+                    if code != 0:
+                        failed = True
+                        # Objeto de uma compilação que falhou não pode passar por atualizado
+                        for leftover in (unit[1], unit[2]):
+                            with contextlib.suppress(OSError):
+                                os.remove(leftover)
+            if failed:
+                return {'ok': False, 'output': ''.join(output), 'compiled': len(stale), 'inputs': self.cppInputs(units)}
+
+        # Relinka se algum objeto é mais novo que o executável ou se o conjunto de objetos mudou
+        objects = [unit[1] for unit in units]
+        manifest = executable + '.objects'
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                linked = f.read().splitlines()
+        except OSError:
+            linked = None
+        built = self.mtime(executable)
+        if stale or linked != objects or built is None or any(self.mtime(obj) > built for obj in objects):
+            log(f"Linking {os.path.relpath(executable, root)}...")
+            result = subprocess.run(['g++'] + objects + ['-o', executable], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            if result.stdout:
+                output.append(result.stdout.decode('utf-8', errors='replace'))
+            if result.returncode != 0:
+                return {'ok': False, 'output': ''.join(output), 'compiled': len(stale), 'inputs': self.cppInputs(units)}
+            with atomicWrite(manifest, 'w') as f:
+                f.write('\n'.join(objects))
+        return {'ok': True, 'output': ''.join(output), 'compiled': len(stale), 'program': executable, 'arguments': [],
+                'directory': root, 'inputs': self.cppInputs(units)}
+
+    def cppInputs(self, units):
+        inputs = set()
+        for source, _, depfile in units:
+            inputs.add(source)
+            inputs.update(os.path.abspath(prerequisite) for prerequisite in self.prerequisites(depfile) or [])
+        return sorted(inputs)
+
+    def buildJava(self, path, log):
+        # A raiz das fontes sai do "package" do alvo; as classes vão para .build/classes
+        with open(path, 'rb') as f:
+            match = JAVA_PACKAGE.search(f.read())
+        package = match.group(1).decode() if match else ''
+        root = os.path.dirname(path)
+        for _ in package.split('.') if package else []:
+            root = os.path.dirname(root)
+        classes = os.path.join(root, BUILD_DIR, 'classes')
+        sources = sorted(self.sources(root, ('.java',)))
+        stale = []
+        for source in sources:
+            built = self.mtime(os.path.join(classes, os.path.splitext(os.path.relpath(source, root))[0] + '.class'))
+            if built is None or self.mtime(source) > built:
+                stale.append(source)
+
+        output = ''
+        if stale:
+            # Uma única chamada ao javac: a JVM do compilador sobe uma vez só para todos os arquivos alterados
+            log(f"Compiling {len(stale)} of {len(sources)} Java sources...")
+            os.makedirs(classes, exist_ok=True)
+            result = subprocess.run(['javac', '-d', classes, '-cp', classes, '-sourcepath', root] + stale,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            output = result.stdout.decode('utf-8', errors='replace')
+            if result.returncode != 0:
+                return {'ok': False, 'output': output, 'compiled': len(stale), 'inputs': sources}
+        className = os.path.splitext(os.path.basename(path))[0]
+        return {'ok': True, 'output': output, 'compiled': len(stale), 'program': 'java',
+                'arguments': ['-cp', classes, f"{package}.{className}" if package else className],
+                'directory': os.path.dirname(path), 'inputs': sources}
+
+class BuildWorker(QThread):
+    progress = pyqtSignal(str)
+    buildFinished = pyqtSignal(str, object)
 
-class CustomFileSystemModel(QFileSystemModel):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.icon_map = {
-            '.cpp': QIcon('img/cpp.png'),
-            '.css': QIcon('img/css.png'),
-            '.java': QIcon('img/java.png'),
-            '.class': QIcon('img/classe.png'),
-            '.html': QIcon('img/html.png'),
-            '.js': QIcon('img/javascript.png'),
-            '.png': QIcon('img/image.png'),
-            '.jpg': QIcon('img/image.png'),
-            '.jpeg': QIcon('img/image.png'),
-            '.bmp': QIcon('img/image.png'),
-            '.gif': QIcon('img/image.png'),
-            '.py': QIcon('img/python.png'),
-            '.rb': QIcon('img/ruby.png')
+        self.engine = BuildEngine()
+        self.pending = None
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def submit(self, path):
+        # Um build por vez; pedidos feitos durante um build são reduzidos ao mais recente
+        with self.condition:
+            self.pending = path
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                path, self.pending = self.pending, None
+            try:
+                result = self.engine.build(path, self.progress.emit)
+            except OSError as error:
+                result = {'ok': False, 'output': f"{error}\n", 'compiled': 0, 'inputs': [path], 'seconds': 0.0}
+            self.buildFinished.emit(path, result)
+
+class PerformanceMonitor(QObject):
+    def __init__(self, parent=None, interval=50, stallThreshold=250):
+        super().__init__(parent)
+        self.interval = interval / 1000.0
+        self.stallThreshold = stallThreshold / 1000.0
+        self.lagSamples = collections.deque(maxlen=1200)  # ~1 minuto de amostras
+        self.maxLag = 0.0
+        self.stalls = collections.deque(maxlen=50)
+        self.lastBeat = time.perf_counter()
+        self.mainThreadId = threading.get_ident()
+
+        self.heartbeatTimer = QTimer(self)
+        self.heartbeatTimer.timeout.connect(self.heartbeat)
+        self.heartbeatTimer.start(interval)
+
+        self.running = True
+        self.watchdog = threading.Thread(target=self.watchdogLoop, name='ui-watchdog', daemon=True)
+        self.watchdog.start()
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        previous = self.lastBeat
+        lag = max(0.0, now - previous - self.interval)
+        self.lastBeat = now
+        self.lagSamples.append(lag)
+        if lag > self.maxLag:
+            self.maxLag = lag
+        # Completa a duração do travamento capturado pelo watchdog
+        if self.stalls and self.stalls[-1]['beat'] == previous:
+            self.stalls[-1]['blocked_ms'] = (now - previous) * 1000
+
+    def watchdogLoop(self):
+        reported = None
+        while self.running:
+            time.sleep(self.interval)
+            beat = self.lastBeat
+            blocked = time.perf_counter() - beat
+            if blocked > self.stallThreshold and reported != beat:
+                reported = beat
+                frame = sys._current_frames().get(self.mainThreadId)
+                stack = ''.join(traceback.format_stack(frame)) if frame else ''
+                self.stalls.append({'beat': beat, 'time': time.time(), 'blocked_ms': blocked * 1000, 'stack': stack})
+
+    def stop(self):
+        self.running = False
+        self.heartbeatTimer.stop()
+
+    def reset(self):
+        self.lagSamples.clear()
+        self.maxLag = 0.0
+        self.stalls.clear()
+        SLOT_TIMINGS.clear()
+
+    def snapshot(self):
+        samples = sorted(self.lagSamples)
+        if samples:
+            lag = {
+                'samples': len(samples),
+                'mean_ms': sum(samples) / len(samples) * 1000,
+                'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                'max_ms': self.maxLag * 1000,
+            }
+        else:
+            lag = {'samples': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+
+        slots = {}
+        for name, (calls, total, worst) in SLOT_TIMINGS.items():
+            slots[name] = {
+                'calls': calls,
+                'total_ms': total * 1000,
+                'mean_ms': total / calls * 1000 if calls else 0.0,
+                'max_ms': worst * 1000,
+            }
+
+        stalls = [{'time': s['time'], 'blocked_ms': s['blocked_ms'], 'stack': s['stack']} for s in self.stalls]
+        return {
+            'timestamp': time.time(),
+            'stall_threshold_ms': self.stallThreshold * 1000,
+            'event_loop_lag': lag,
+            'slots': slots,
+            'stalls': stalls,
         }
 
-    def data(self, index, role):
-        if role == Qt.DecorationRole and index.column() == 0:
-            file_path = self.filePath(index)
-            _, ext = os.path.splitext(file_path)
-            if ext in self.icon_map:
-                return self.icon_map[ext]
-        elif role == Qt.DisplayRole and index.column() == 0:
-            return os.path.basename(self.filePath(index))
-        return super().data(index, role)
+    def exportJson(self, fileName):
+        with open(fileName, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+class PerformancePanel(QWidget):
+    def __init__(self, monitor, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+
+        self.summaryLabel = QLabel()
+        self.summaryLabel.setStyleSheet("color: #e0e0ff;")
+
+        resetButton = QPushButton('Reset')
+        resetButton.clicked.connect(self.resetStats)
+        exportButton = QPushButton('Export JSON')
+        exportButton.clicked.connect(self.exportStats)
+
+        header = QHBoxLayout()
+        header.addWidget(self.summaryLabel, 1)
+        header.addWidget(resetButton)
+        header.addWidget(exportButton)
+
+        self.slotTable = QTableWidget(0, 4)
+        self.slotTable.setHorizontalHeaderLabels(['Slot', 'Calls', 'Mean (ms)', 'Max (ms)'])
+        self.slotTable.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.slotTable.verticalHeader().setVisible(False)
+        self.slotTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.slotTable.setStyleSheet("background-color: #00091a; color: #c9dcff;")
+
+        self.stallView = QTextEdit()
+        self.stallView.setReadOnly(True)
+        self.stallView.setStyleSheet("background-color: #00091a; color: #ff8c8c;")
+
+        body = QSplitter(Qt.Horizontal)
+        body.addWidget(self.slotTable)
+        body.addWidget(self.stallView)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(header)
+        layout.addWidget(body)
+
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.timeout.connect(self.refresh)
+        self.refreshTimer.start(1000)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        data = self.monitor.snapshot()
+        lag = data['event_loop_lag']
+        self.summaryLabel.setText(f"Event loop lag: mean {lag['mean_ms']:.1f} ms, p95 {lag['p95_ms']:.1f} ms, "
+                                  f"max {lag['max_ms']:.1f} ms | Stalls: {len(data['stalls'])}")
+
+        slots = sorted(data['slots'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        self.slotTable.setRowCount(len(slots))
+        for row, (name, stats) in enumerate(slots):
+            self.slotTable.setItem(row, 0, QTableWidgetItem(name))
+            self.slotTable.setItem(row, 1, QTableWidgetItem(str(stats['calls'])))
+            self.slotTable.setItem(row, 2, QTableWidgetItem(f"{stats['mean_ms']:.2f}"))
+            self.slotTable.setItem(row, 3, QTableWidgetItem(f"{stats['max_ms']:.2f}"))
+
+        stalls = [f"[{time.strftime('%H:%M:%S', time.localtime(s['time']))}] blocked {s['blocked_ms']:.0f} ms\n{s['stack']}"
+                  for s in reversed(data['stalls'])]
+        self.stallView.setPlainText('\n'.join(stalls))
+
+    def resetStats(self):
+        self.monitor.reset()
+        self.refresh()
+
+    def exportStats(self):
+        fileName, _ = QFileDialog.getSaveFileName(self, "Export Performance Data", "performance.json", "JSON Files (*.json)")
+        if fileName:
+            self.monitor.exportJson(fileName)
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.currentFile = ''
-        self.projectPath = QDir.currentPath()
-        self.process = None
+        # A última sessão define o projeto antes da árvore ser montada
+        self.workspace = WorkspaceSnapshot()
+        lastProject = self.workspace.lastProject()
+        self.projectPath = lastProject if lastProject and os.path.isdir(lastProject) else QDir.currentPath()
+        self.expandedDirs = set()
+        self.workspaceValidator = None
+        self.currentEncoding = None
+        self.debugSession = None
+        self.terminalProcess = None
         self.welcomeWidget = None
+        self.performanceMonitor = PerformanceMonitor(self)
+        self.previewServer = None
+        self.previewPages = set()
+        self.gallery = None
+        self.encodingNormalizer = None
+        self.formatWorker = None
+        self.formatRequest = None
         self.initUI()
         self.debugToolbar = QToolBar("Debug Toolbar")
         self.addToolBar(self.debugToolbar)
@@ -133,6 +5961,183 @@ class MainWindow(QMainWindow):
         self.editor.indicatorDefine(QsciScintilla.SquiggleIndicator, self.ERROR_INDICATOR)
         self.editor.setIndicatorForegroundColor(QColor("red"), self.ERROR_INDICATOR)
 
+        # Verificação de todo o projeto em segundo plano
+        self.projectScanner = None
+        self.fileWatcher = FileWatcherService(self)
+        self.fileWatcher.directoriesChanged.connect(self.onProjectDirectoriesChanged)
+        self.fileWatcher.filesChanged.connect(self.onWatchedFilesChanged)
+        self.diskState = None
+        self.diskConflict = False
+        self.startProjectScan()
+
+        # Marcadores de alteração em relação ao HEAD (ou ao arquivo salvo), calculados fora da thread da interface
+        self.editor.markerDefine(QsciScintilla.LeftRectangle, DIFF_ADDED_MARKER)
+        self.editor.setMarkerBackgroundColor(QColor("#3fb950"), DIFF_ADDED_MARKER)
+        self.editor.markerDefine(QsciScintilla.LeftRectangle, DIFF_MODIFIED_MARKER)
+        self.editor.setMarkerBackgroundColor(QColor("#d29922"), DIFF_MODIFIED_MARKER)
+        self.editor.markerDefine(QsciScintilla.SmallRectangle, DIFF_REMOVED_MARKER)
+        self.editor.setMarkerBackgroundColor(QColor("#f85149"), DIFF_REMOVED_MARKER)
+        self.diffGeneration = 0
+        self.diffView = None
+        self.diffWorker = DiffWorker(self)
+        self.diffWorker.diffReady.connect(self.onDiffReady)
+        self.diffWorker.start()
+
+        # Histórico do git indexado em disco; o blame é pedido só para as linhas visíveis
+        self.historyGeneration = 0
+        self.blameGeneration = 0
+        self.blameEnabled = False
+        self.gitHistory = GitHistoryWorker(self)
+        self.gitHistory.fileLogReady.connect(self.onFileLogReady)
+        self.gitHistory.blameReady.connect(self.onBlameReady)
+        self.gitHistory.failed.connect(self.onGitHistoryFailed)
+        self.gitHistory.start(QThread.LowPriority)
+        self.blameStyle = QsciStyle(-1, 'Blame', QColor('#9aa5ce'), QColor('#1e1e3e'), self.editor.font())
+        if self.editor.margins() <= BLAME_MARGIN:
+            self.editor.setMargins(BLAME_MARGIN + 1)
+        self.editor.setMarginType(BLAME_MARGIN, QsciScintilla.TextMargin)
+        self.editor.setMarginWidth(BLAME_MARGIN, 0)
+        self.blameTimer = QTimer(self)
+        self.blameTimer.setSingleShot(True)
+        self.blameTimer.timeout.connect(self.requestBlame)
+        # SC_UPDATE_V_SCROLL (4): pede o blame das novas linhas visíveis quando a rolagem assenta
+        self.editor.SCN_UPDATEUI.connect(lambda updated: updated & 4 and self.blameEnabled and self.blameTimer.start(30))
+        self.changeMarkerTimer = QTimer(self)
+        self.changeMarkerTimer.setSingleShot(True)
+        self.changeMarkerTimer.timeout.connect(self.updateChangeMarkers)
+        self.editor.textChanged.connect(lambda: self.changeMarkerTimer.start(300))
+
+        # Outline do arquivo atual, atualizado só nas linhas alteradas
+        self.outlineGeneration = 0
+        self.outlineEdits = []
+        self.outlineWorker = OutlineWorker(self)
+        self.outlineWorker.outlineReady.connect(self.onOutlineReady)
+        self.outlineWorker.start()
+        self.outlineTimer = QTimer(self)
+        self.outlineTimer.setSingleShot(True)
+        self.outlineTimer.timeout.connect(self.flushOutlineEdits)
+        self.editor.SCN_MODIFIED.connect(self.onEditorModified)
+        self.editor.cursorPositionChanged.connect(lambda line, index: self.outlinePanel.highlightLine(line))
+        self.outlinePanel.openLine.connect(self.goToLine)
+
+        # Diário de recuperação: cada modificação vira uma linha curta, com fsync periódico
+        self.journal = EditJournal()
+        self.journalTimer = QTimer(self)
+        self.journalTimer.timeout.connect(self.syncJournal)
+        self.journalTimer.start(1000)
+        QTimer.singleShot(0, self.restoreWorkspace)
+        QTimer.singleShot(0, self.recoverUnsavedBuffers)
+
+        # Índice de arquivos e símbolos do projeto (Go to File / Go to Symbol)
+        self.cloneProcess = None
+        self.projectIndex = None
+        self.startProjectIndex()
+
+    def startProjectScan(self):
+        if self.projectScanner:
+            self.projectScanner.stop()
+        self.fileWatcher.clearDirectories()
+
+        self.projectProblemsPanel.model.setRoot(self.projectPath)
+        self.projectScanner = ProjectProblemsScanner(self.projectPath, self)
+        self.projectScanner.problemsFound.connect(self.projectProblemsPanel.model.updateFiles)
+        self.projectScanner.progressChanged.connect(self.projectProblemsPanel.onProgress)
+        self.projectScanner.directoriesScanned.connect(self.fileWatcher.watchDirectories)
+        self.projectScanner.start(QThread.LowestPriority)
+
+    def onProjectDirectoriesChanged(self, directories):
+        if self.projectScanner:
+            for directory in directories:
+                self.projectScanner.enqueueDirectory(directory)
+
+    def onWatchedFilesChanged(self, files):
+        if self.currentFile and os.path.abspath(self.currentFile) in files:
+            if self.splitter1.widget(1) == self.hexViewer:
+                self.hexViewer.reload()
+            elif self.formatWorker and self.formatWorker.isRunning() and not self.formatWorker.path:
+                # O Format Project atualiza o buffer no lugar quando termina
+                return
+            else:
+                self.checkExternalChange()
+
+    def recordDiskState(self, fileName):
+        try:
+            self.diskState = fileFingerprint(fileName)
+        except OSError:
+            self.diskState = None
+        self.diskConflict = False
+
+    def diskChanged(self):
+        # Compara primeiro mtime+tamanho; o hash só é lido quando eles diferem
+        try:
+            mtime, size, _ = fileFingerprint(self.currentFile, withHash=False)
+        except OSError:
+            return self.diskState is not None
+        if self.diskState is None:
+            return True
+        if (mtime, size) == self.diskState[:2]:
+            return False
+        digest = fileFingerprint(self.currentFile)[2]
+        if digest == self.diskState[2]:
+            self.diskState = (mtime, size, digest)
+            return False
+        return True
+
+    def checkExternalChange(self):
+        if not self.currentFile or self.splitter1.widget(1) != self.editor or not self.diskChanged():
+            return
+        if not os.path.exists(self.currentFile):
+            self.editor.setModified(True)
+            self.statusBar.showMessage(f"{self.currentFile} was deleted on disk. Save to recreate it.", 5000)
+            return
+        if not self.editor.isModified():
+            self.reloadCurrentFile()
+            self.statusBar.showMessage(f"Reloaded {os.path.basename(self.currentFile)} (changed on disk).", 3000)
+            return
+        if self.diskConflict:
+            return
+        self.diskConflict = True
+        reply = QMessageBox.question(self, 'File Changed on Disk',
+                                     f"{self.currentFile} was changed by another program and you have unsaved changes.\n\n"
+                                     "Reload it and discard your changes?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.reloadCurrentFile()
+        else:
+            self.statusBar.showMessage('Keeping your version. Autosave is paused until you save explicitly.', 5000)
+
+    def reloadCurrentFile(self):
+        line, index = self.editor.getCursorPosition()
+        firstLine = self.editor.firstVisibleLine()
+        _, code = readSource(self.currentFile)
+        if code is None:
+            return
+        self.journal.close()
+        self.editor.setText(code.rstrip('\n'))
+        self.journal.begin(self.currentFile, self.editor.text())
+        self.resetOutline()
+        self.refreshBlame()
+        self.editor.setCursorPosition(min(line, self.editor.lines() - 1), index)
+        self.editor.setFirstVisibleLine(firstLine)
+        self.editor.setModified(False)
+        self.recordDiskState(self.currentFile)
+
+    def onFileSaved(self, fileName):
+        if self.projectScanner:
+            self.projectScanner.enqueue([fileName])
+        if self.previewServer:
+            self.previewServer.notifyChanged(fileName)
+        self.changeMarkerTimer.start(300)
+        self.refreshBlame()
+        if os.path.basename(fileName) in ('.gitignore', TREE_IGNORE_FILE):
+            self.fileSystemModel.refreshAll()
+
+    def openProblemLocation(self, path, line):
+        if path != self.currentFile:
+            self.loadFile(path)
+        self.editor.setCursorPosition(max(0, line - 1), 0)
+        self.editor.ensureLineVisible(max(0, line - 1))
+        self.editor.setFocus()
+
     def setupSyntaxCheck(self):
         self.syntaxCheckTimer = QTimer()
         self.syntaxCheckTimer.setSingleShot(True)
@@ -159,6 +6164,7 @@ class MainWindow(QMainWindow):
     def startSyntaxCheckTimer(self):
         self.syntaxCheckTimer.start(1000)  # Verifica a sintaxe após 1 segundo de inatividade
 
+    @timedSlot
     def checkSyntax(self):
         if not self.currentFile:
             return
@@ -179,101 +6185,24 @@ class MainWindow(QMainWindow):
             self.checkRubySyntax(code)
 
     def checkPythonSyntax(self, code):
-        try:
-            compile(code, '<string>', 'exec')
-        except SyntaxError as e:
+        for e in pythonSyntaxErrors(code):
             self.showProblem(e)
 
     def checkCppSyntax(self, code):
-        process = subprocess.Popen(['g++', '-fsyntax-only', '-x', 'c++', '-'], stdin=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-        _, stderr = process.communicate(input=code)
-
-        if stderr:
-            for line in stderr.splitlines():
-                if ': error:' in line:
-                    parts = line.split(':')
-                    line_num = int(parts[1])
-                    error_msg = ':'.join(parts[3:]).strip()
-                    self.showProblem(SyntaxError(error_msg, ('<string>', line_num, 0, code.splitlines()[line_num-1])))
+        for e in cppSyntaxErrors(code):
+            self.showProblem(e)
 
     def checkJavaScriptSyntax(self, code):
-        try:
-            import esprima
-            esprima.parseScript(code)
-        except esprima.Error as e:
-            line_num = e.lineNumber
-            error_msg = str(e)
-            self.showProblem(SyntaxError(error_msg, ('<string>', line_num, 0, code.splitlines()[line_num-1])))
+        for e in javaScriptSyntaxErrors(code):
+            self.showProblem(e)
 
     def checkJavaSyntax(self, code):
-        # Extrair o nome da classe pública (se existir)
-        class_match = re.search(r'public\s+class\s+(\w+)', code)
-        class_name = class_match.group(1) if class_match else 'Main'
-
-        # Criar um arquivo temporário com o nome correto
-        with tempfile.TemporaryDirectory() as temp_dir:
-            file_path = os.path.join(temp_dir, f"{class_name}.java")
-            with open(file_path, 'w') as temp_file:
-                temp_file.write(code)
-
-            # Compilar o arquivo Java
-            process = subprocess.Popen(['javac', file_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-            _, stderr = process.communicate()
-
-            if stderr:
-                errors = stderr.splitlines()
-                for error in errors:
-                    # Ignorar avisos sobre o nome do arquivo
-                    if "should be declared in a file named" in error:
-                        continue
-                    
-                    # Procurar por padrões de erro
-                    match = re.search(r'(.+\.java):(\d+): error: (.*)', error)
-                    if match:
-                        _, reported_line_num, error_msg = match.groups()
-                        try:
-                            reported_line_num = int(reported_line_num)
-                            code_lines = code.splitlines()
-                            
-                            # Usar diretamente o número da linha reportada
-                            actual_line_num = reported_line_num
-                            
-                            if 1 <= actual_line_num <= len(code_lines):
-                                error_line = code_lines[actual_line_num-1]
-                            else:
-                                error_line = ''
-                            
-                            self.showProblem(SyntaxError(error_msg, ('<string>', actual_line_num, 0, error_line)))
-                        except ValueError:
-                            self.showProblem(SyntaxError(error_msg, ('<string>', 1, 0, '')))
-                    else:
-                        # Se não conseguirmos extrair as informações do erro, mostramos a mensagem completa
-                        self.showProblem(SyntaxError(error.strip(), ('<string>', 1, 0, '')))
+        for e in javaSyntaxErrors(code):
+            self.showProblem(e)
 
     def checkRubySyntax(self, code):
-        process = subprocess.Popen(['ruby', '-c'], stdin=subprocess.PIPE, stderr=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
-        _, stderr = process.communicate(input=code)
-
-        if stderr:
-            for line in stderr.splitlines():
-                if ':' in line:
-                    parts = line.split(':')
-                    if len(parts) >= 3:
-                        try:
-                            line_num = int(parts[1])
-                            error_msg = ':'.join(parts[2:]).strip()
-                            code_lines = code.splitlines()
-                            if 1 <= line_num <= len(code_lines):
-                                error_line = code_lines[line_num-1]
-                            else:
-                                error_line = ''
-                            self.showProblem(SyntaxError(error_msg, ('<string>', line_num, 0, error_line)))
-                        except ValueError:
-                            # Se não conseguirmos converter o número da linha para inteiro, apenas mostramos o erro sem a linha específica
-                            self.showProblem(SyntaxError(line.strip(), ('<string>', 1, 0, '')))
-                    else:
-                        # Se não conseguirmos separar a linha em partes suficientes, mostramos o erro completo
-                        self.showProblem(SyntaxError(line.strip(), ('<string>', 1, 0, '')))
+        for e in rubySyntaxErrors(code):
+            self.showProblem(e)
 
     def setupStatusBar(self):
         self.statusBar = self.statusBar()
@@ -283,10 +6212,123 @@ class MainWindow(QMainWindow):
         self.encodingLabel = QLabel("UTF-8")
         self.languageLabel = QLabel("Plain Text")
 
+        self.cloneProgress = QProgressBar()
+        self.cloneProgress.setMaximumWidth(220)
+        self.cloneProgress.setVisible(False)
+        self.statusBar.addPermanentWidget(self.cloneProgress)
+
         self.statusBar.addPermanentWidget(self.lineColLabel)
         self.statusBar.addPermanentWidget(self.encodingLabel)
         self.statusBar.addPermanentWidget(self.languageLabel)
 
+    def resetOutline(self):
+        self.outlineGeneration += 1
+        self.outlineEdits = []
+        self.outlineTimer.stop()
+        ext = os.path.splitext(self.currentFile)[1].lower() if self.currentFile else ''
+        self.outlineWorker.reset(self.outlineGeneration, ext, self.editor.text())
+
+    @timedSlot
+    def onEditorModified(self, position, modificationType, text, length, linesAdded, *args):
+        # Só registra a faixa alterada; o trabalho pesado fica no OutlineWorker
+        if modificationType & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            if modificationType & QsciScintilla.SC_MOD_INSERTTEXT:
+                self.journal.insert(position, text)
+            else:
+                self.journal.delete(position, length)
+            line = self.editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+            self.outlineEdits.append((line, linesAdded))
+            self.outlineTimer.start(150)
+
+    def flushOutlineEdits(self):
+        if self.outlineEdits:
+            edits, self.outlineEdits = self.outlineEdits, []
+            self.outlineWorker.update(self.outlineGeneration, edits, self.editor.text())
+
+    @timedSlot
+    def onOutlineReady(self, generation, entries):
+        if generation != self.outlineGeneration:
+            return
+        self.outlinePanel.setEntries(entries)
+        self.outlinePanel.highlightLine(self.editor.getCursorPosition()[0])
+
+    def restoreWorkspace(self):
+        # Primeiro o que aparece na tela; a conferência com o disco fica para o WorkspaceValidator
+        currentFile, expanded = self.workspace.projectState(self.projectPath)
+        # A raiz e os diretórios expandidos saem das listagens em cache (pais antes dos filhos)
+        directories = [os.path.abspath(self.projectPath)] + expanded
+        for path in directories:
+            _, entries = self.workspace.cachedListing(path)
+            if entries is not None:
+                self.fileSystemModel.seed(path, entries)
+        for path in expanded:
+            index = self.fileSystemModel.index(path)
+            if index.isValid():
+                self.treeView.expand(index)
+        if currentFile and os.path.isfile(currentFile):
+            self.loadFile(currentFile)
+            self.updateFileInfo()
+        self.workspaceValidator = WorkspaceValidator(self.workspace.path, directories, self)
+        self.workspaceValidator.directoryMissing.connect(self.onRestoredDirectoryMissing)
+        self.workspaceValidator.directoryChanged.connect(self.fileSystemModel.refreshPath)
+        self.workspaceValidator.start(QThread.LowPriority)
+
+    def onRestoredDirectoryMissing(self, directory):
+        # expandedDirs é substituído ao trocar de projeto; o slot sempre usa o conjunto atual
+        self.expandedDirs.discard(directory)
+
+    def saveDocumentState(self):
+        if not self.currentFile or self.splitter1.widget(1) != self.editor:
+            return
+        try:
+            stat = os.stat(self.currentFile)
+        except OSError:
+            return
+        line, col = self.editor.getCursorPosition()
+        ext = os.path.splitext(self.currentFile)[1].lower()
+        self.workspace.saveDocument(self.currentFile, line, col, self.editor.firstVisibleLine(),
+                                    self.currentEncoding, ext if ext in self.lexers else None, stat)
+
+    def saveWorkspace(self):
+        self.saveDocumentState()
+        self.workspace.saveProject(self.projectPath, self.currentFile or None, sorted(self.expandedDirs))
+
+    def syncJournal(self):
+        self.journal.sync(self.editor.text)
+
+    def recoverUnsavedBuffers(self):
+        journals = EditJournal.orphans(self.journal.directory)
+        buffers = [buffer for buffer in map(EditJournal.replay, journals) if buffer and os.path.exists(buffer[0])]
+        if buffers:
+            if len(buffers) == 1:
+                reply = QMessageBox.question(self, 'Recover Unsaved Changes',
+                                             f"ScriptBliss did not exit cleanly. Restore your unsaved changes to {buffers[0][0]}?",
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                chosen = buffers[0] if reply == QMessageBox.Yes else None
+            else:
+                items = [path for path, _ in buffers]
+                item, ok = QInputDialog.getItem(self, 'Recover Unsaved Changes',
+                                                'ScriptBliss did not exit cleanly. Restore unsaved changes to:', items, len(items) - 1, False)
+                chosen = buffers[items.index(item)] if ok else None
+            if chosen:
+                path, text = chosen
+                self.loadFile(path)
+                self.updateFileInfo()
+                # Registrado no diário como uma edição comum sobre o arquivo em disco
+                self.editor.setText(text)
+                self.editor.setModified(True)
+                self.statusBar.showMessage(f"Recovered unsaved changes to {os.path.basename(path)}.", 5000)
+        for journal in journals:
+            try:
+                os.remove(journal)
+            except OSError:
+                pass
+
+    def goToLine(self, line):
+        self.editor.setCursorPosition(line, 0)
+        self.editor.ensureLineVisible(line)
+        self.editor.setFocus()
+
     def updateLineColInfo(self):
         line, col = self.editor.getCursorPosition()
         self.lineColLabel.setText(f"Line {line + 1}, Col {col + 1}")
@@ -301,6 +6343,8 @@ class MainWindow(QMainWindow):
             self.languageLabel.setText("Plain Text")
 
     def detectEncoding(self, file_path):
+        if file_path == self.currentFile and self.currentEncoding:
+            return self.currentEncoding.upper()
         encodings = ['utf-8', 'iso-8859-1', 'windows-1252', 'ascii']
         for enc in encodings:
             try:
@@ -312,16 +6356,7 @@ class MainWindow(QMainWindow):
         return "Unknown"
 
     def getLanguage(self, ext):
-        languages = {
-            '.py': 'Python',
-            '.java': 'Java',
-            '.html': 'HTML',
-            '.js': 'JavaScript',
-            '.css': 'CSS',
-            '.cpp': 'C++',
-            '.rb': 'Ruby'
-        }
-        return languages.get(ext, 'Plain Text')
+        return LANGUAGE_NAMES.get(ext, 'Plain Text')
 
     def setupDebugToolbar(self):
         nextAction = QAction(QIcon('img/next.png'), 'Next', self)
@@ -360,9 +6395,12 @@ class MainWindow(QMainWindow):
         self.debugToolbar.addAction(quitAction)
 
     def sendDebugCommand(self, command):
-        if self.process and self.process.state() == QProcess.Running:
-            self.process.write((command + '\n').encode())
-            self.bottomTabWidget.setCurrentIndex(0)  # Switch to Output tab
+        # A barra comanda a depuração mais recente, mesmo que outra aba de execução esteja selecionada
+        session = self.debugSession
+        if session in self.runSessions.sessions and session.isRunning():
+            session.write(command + '\n')
+            self.runSessions.tabs.setCurrentWidget(session.output)
+            self.bottomTabWidget.setCurrentWidget(self.runSessions)  # Switch to Runs tab
     def initUI(self):
         self.setWindowTitle("ScriptBliss")
         self.setWindowIcon(QIcon('img/logo.png'))
@@ -389,6 +6427,7 @@ class MainWindow(QMainWindow):
         self.imageViewer = QLabel()
         self.imageViewer.setAlignment(Qt.AlignCenter)
         self.imageViewer.setStyleSheet("background-color: #1e1e3e;")
+        self.hexViewer = HexViewer()
 
         # Crie o widget de boas-vindas
         self.welcomeWidget = QLabel()
@@ -430,13 +6469,16 @@ class MainWindow(QMainWindow):
         lexer.setDefaultFont(font)
         self.editor.setLexer(lexer)
 
-        self.fileSystemModel = CustomFileSystemModel()
+        self.fileSystemModel = CustomFileSystemModel(self)
         self.fileSystemModel.setRootPath(self.projectPath)
 
         self.treeView = DraggableTreeView()
         self.treeView.setModel(self.fileSystemModel)
         self.treeView.setRootIndex(self.fileSystemModel.index(self.projectPath))
         self.treeView.clicked.connect(self.onFileClicked)
+        self.treeView.expanded.connect(lambda index: self.expandedDirs.add(self.fileSystemModel.filePath(index)))
+        self.treeView.expanded.connect(self.fileSystemModel.touch)
+        self.treeView.collapsed.connect(lambda index: self.expandedDirs.discard(self.fileSystemModel.filePath(index)))
         self.treeView.setHeaderHidden(True)
         self.treeView.setIndentation(10)  # Aumenta a indentação
         self.treeView.setAnimated(True)  # Adiciona animações ao expandir/colapsar
@@ -447,6 +6489,13 @@ class MainWindow(QMainWindow):
         self.treeView.customContextMenuRequested.connect(self.showContextMenu)
         self.treeView.dropped.connect(self.onDropped)
 
+        self.treeThumbnailTimer = QTimer(self)
+        self.treeThumbnailTimer.setSingleShot(True)
+        self.treeThumbnailTimer.timeout.connect(self.requestTreeThumbnails)
+        self.treeView.verticalScrollBar().valueChanged.connect(lambda: self.treeThumbnailTimer.start(50))
+        self.treeView.expanded.connect(lambda: self.treeThumbnailTimer.start(50))
+        self.fileSystemModel.directoryLoaded.connect(lambda: self.treeThumbnailTimer.start(50))
+
         self.treeView.setColumnHidden(1, True)
         self.treeView.setColumnHidden(2, True)
         self.treeView.setColumnHidden(3, True)
@@ -473,6 +6522,55 @@ class MainWindow(QMainWindow):
         self.bottomTabWidget.addTab(self.console, "Output")
         self.bottomTabWidget.addTab(self.terminal, "Terminal")
         self.bottomTabWidget.addTab(self.problemsWidget, "Problems")
+
+        self.runSessions = RunSessionManager()
+        self.bottomTabWidget.addTab(self.runSessions, "Runs")
+
+        self.runLogViewer = RunLogViewer()
+        self.runLogViewer.compareRequested.connect(self.compareRunLogs)
+        self.runSessions.openLog.connect(self.openRunLog)
+        self.bottomTabWidget.addTab(self.runLogViewer, "Run Logs")
+
+        self.runMetrics = RunMetricsStore()
+        self.runMetricsPanel = RunMetricsPanel(self.runMetrics)
+        self.runMetricsPanel.openLog.connect(self.openRunLog)
+        self.runSessions.runFinished.connect(self.onRunFinished)
+        self.bottomTabWidget.addTab(self.runMetricsPanel, "Run Metrics")
+        self.runMetricsPanel.showSource(None)
+
+        self.pythonSession = PythonSessionPanel()
+        self.bottomTabWidget.addTab(self.pythonSession, "Python Session")
+
+        # Compilação de C++/Java fora da thread da interface
+        self.buildInputs = {}
+        self.buildWorker = BuildWorker(self)
+        self.buildWorker.progress.connect(self.console.append)
+        self.buildWorker.buildFinished.connect(self.onBuildFinished)
+        self.buildWorker.start()
+
+        # Watch mode: reexecuta o alvo quando ele ou seus imports locais mudam no disco
+        self.toolchains = {}
+        self.runEncodings = {}
+        self.watchTarget = None
+        self.watchFiles = set()
+        self.watchSession = None
+        self.watchStopping = False
+        self.runWatcher = FileWatcherService(self)
+        self.runWatcher.filesChanged.connect(self.onRunTargetChanged)
+        self.watchTimer = QTimer(self)
+        self.watchTimer.setSingleShot(True)
+        self.watchTimer.timeout.connect(self.rerunWatchTarget)
+
+        self.projectProblemsPanel = ProjectProblemsPanel()
+        self.projectProblemsPanel.openLocation.connect(self.openProblemLocation)
+        self.bottomTabWidget.addTab(self.projectProblemsPanel, "Project Problems")
+
+        self.fileLogPanel = FileLogPanel()
+        self.fileLogPanel.showCommit.connect(self.showCommitDiff)
+        self.bottomTabWidget.addTab(self.fileLogPanel, "File History")
+
+        self.performancePanel = PerformancePanel(self.performanceMonitor)
+        self.bottomTabWidget.addTab(self.performancePanel, "Performance")
         self.bottomTabWidget.setStyleSheet("""
             QTabWidget::pane {
                 border: 1px solid #1e1e3e;
@@ -495,8 +6593,15 @@ class MainWindow(QMainWindow):
             }
         """)
 
+        self.outlinePanel = OutlinePanel()
+        leftSplitter = QSplitter(Qt.Vertical)
+        leftSplitter.addWidget(self.treeView)
+        leftSplitter.addWidget(self.outlinePanel)
+        leftSplitter.setSizes([400, 200])
+        leftSplitter.setHandleWidth(0)
+
         self.splitter1 = QSplitter(Qt.Horizontal)
-        self.splitter1.addWidget(self.treeView)
+        self.splitter1.addWidget(leftSplitter)
         self.splitter1.addWidget(self.welcomeWidget)
         self.splitter1.setSizes([200, 1000])
         self.splitter1.setHandleWidth(0)
@@ -512,7 +6617,18 @@ class MainWindow(QMainWindow):
         self.setupMenuBar()
         self.setupStatusBar()
 
+    def lexerFor(self, ext):
+        # Um lexer (e seu QsciAPIs) por extensão, reaproveitado entre arquivos
+        if ext not in self.lexers and ext in LEXER_CLASSES:
+            lexer = LEXER_CLASSES[ext](self)
+            lexer.setDefaultFont(QFont("Consolas", 10))
+            self.lexers[ext] = lexer
+            self.completions.attach(ext, lexer)
+        return self.lexers.get(ext)
+
     def setupAutocomplete(self):
+        self.lexers = {}
+        self.completions = CompletionManager(self)
         self.editor.setAutoCompletionSource(QsciScintilla.AcsAll)
         self.editor.setAutoCompletionThreshold(1)
         self.editor.setAutoCompletionCaseSensitivity(False)
@@ -605,6 +6721,16 @@ class MainWindow(QMainWindow):
         openFolder.setStatusTip('Open folder as project')
         openFolder.triggered.connect(self.openFolderDialog)
 
+        goToFileAction = QAction('Go to File...', self)
+        goToFileAction.setShortcut('Ctrl+P')
+        goToFileAction.setStatusTip('Open any file of the project by name')
+        goToFileAction.triggered.connect(self.goToFile)
+
+        goToSymbolAction = QAction('Go to Symbol in Project...', self)
+        goToSymbolAction.setShortcut('Ctrl+T')
+        goToSymbolAction.setStatusTip('Jump to a class or function anywhere in the project')
+        goToSymbolAction.triggered.connect(self.goToSymbol)
+
         saveFile = QAction(QIcon('img/save.png'), 'Save', self)
         saveFile.setShortcut('Ctrl+S')
         saveFile.setStatusTip('Save current file')
@@ -615,11 +6741,70 @@ class MainWindow(QMainWindow):
         self.autosaveAction.setStatusTip('Toggle autosave functionality')
         self.autosaveAction.triggered.connect(self.toggleAutosave)
 
+        self.treeThumbnailsAction = QAction('Image Thumbnails in Tree', self)
+        self.treeThumbnailsAction.setCheckable(True)
+        self.treeThumbnailsAction.setStatusTip('Show real thumbnails instead of the generic image icon in the file tree')
+        self.treeThumbnailsAction.triggered.connect(self.toggleTreeThumbnails)
+
+        treeExcludesAction = QAction('Edit Tree Exclude Rules...', self)
+        treeExcludesAction.setStatusTip(f'Edit the {TREE_IGNORE_FILE} file (.gitignore syntax) that hides paths from the file tree')
+        treeExcludesAction.triggered.connect(self.editTreeExcludes)
+
+        convertEncodingsAction = QAction('Convert Project to UTF-8...', self)
+        convertEncodingsAction.setStatusTip('Find files in other encodings and rewrite them as UTF-8 after a dry-run report')
+        convertEncodingsAction.triggered.connect(self.normalizeProjectEncodings)
+
+        formatFileAction = QAction('Format File', self)
+        formatFileAction.setShortcut('Ctrl+Shift+I')
+        formatFileAction.setStatusTip('Format the editor buffer with black, clang-format or prettier')
+        formatFileAction.triggered.connect(self.formatCurrentFile)
+
+        formatProjectAction = QAction('Format Project', self)
+        formatProjectAction.setStatusTip('Format every supported file in the project in place, skipping files unchanged since the last run')
+        formatProjectAction.triggered.connect(self.formatProject)
+
         runAction = QAction(QIcon('img/run.png'), 'Run Code', self)
         runAction.setShortcut('Ctrl+R')
         runAction.setStatusTip('Run Code')
         runAction.triggered.connect(self.runCode)
 
+        stopRunsAction = QAction('Stop All Runs', self)
+        stopRunsAction.setStatusTip('Stop every running program')
+        stopRunsAction.triggered.connect(lambda: [session.stop() for session in self.runSessions.sessions])
+
+        limitsAction = QAction('Resource Limits...', self)
+        limitsAction.setStatusTip('Set memory and CPU limits for new runs (Linux)')
+        limitsAction.triggered.connect(self.setRunLimits)
+
+        self.watchAction = QAction('Watch Mode', self)
+        self.watchAction.setCheckable(True)
+        self.watchAction.setShortcut('Ctrl+Alt+R')
+        self.watchAction.setStatusTip('Rerun the current file whenever it or its local imports change on disk')
+        self.watchAction.triggered.connect(self.toggleWatchMode)
+
+        runCellAction = QAction('Run Cell or Selection', self)
+        runCellAction.setShortcut('Ctrl+Return')
+        runCellAction.setStatusTip('Run the selection, the current "# %%" cell or the current line in the persistent Python session')
+        runCellAction.triggered.connect(lambda: self.runCell(False))
+
+        runCellAdvanceAction = QAction('Run Cell and Advance', self)
+        runCellAdvanceAction.setShortcut('Ctrl+Shift+Return')
+        runCellAdvanceAction.setStatusTip('Run the current cell and move the cursor to the next one')
+        runCellAdvanceAction.triggered.connect(lambda: self.runCell(True))
+
+        interruptSessionAction = QAction('Interrupt Python Session', self)
+        interruptSessionAction.setShortcut('Ctrl+Alt+I')
+        interruptSessionAction.setStatusTip('Stop the running cell without losing the session variables')
+        interruptSessionAction.triggered.connect(lambda: self.pythonSession.kernel.interrupt())
+
+        restartSessionAction = QAction('Restart Python Session', self)
+        restartSessionAction.setStatusTip('Discard all session variables and start a fresh interpreter')
+        restartSessionAction.triggered.connect(lambda: self.pythonSession.restart())
+
+        runLogsAction = QAction('Run Logs', self)
+        runLogsAction.setStatusTip('Browse and search the full output of recent runs')
+        runLogsAction.triggered.connect(lambda: self.openRunLog())
+
         gitCommit = QAction(QIcon('img/commit.png'), 'Commit', self)
         gitCommit.setStatusTip('Commit changes')
         gitCommit.triggered.connect(self.gitCommit)
@@ -632,8 +6817,28 @@ class MainWindow(QMainWindow):
         gitPull.setStatusTip('Pull changes')
         gitPull.triggered.connect(self.gitPull)
 
+        gitDiff = QAction('Diff Against HEAD', self)
+        gitDiff.setShortcut('Ctrl+Shift+D')
+        gitDiff.setStatusTip('Compare the buffer with the last committed version')
+        gitDiff.triggered.connect(lambda: self.showDiff('HEAD'))
+
+        compareSaved = QAction('Compare with Saved', self)
+        compareSaved.setStatusTip('Compare the buffer with the file on disk')
+        compareSaved.triggered.connect(lambda: self.showDiff('disk'))
+
+        fileHistory = QAction('File History', self)
+        fileHistory.setShortcut('Ctrl+Alt+H')
+        fileHistory.setStatusTip('Show the commits that changed the current file')
+        fileHistory.triggered.connect(self.showFileHistory)
+
+        self.blameAction = QAction('Blame Annotations', self)
+        self.blameAction.setCheckable(True)
+        self.blameAction.setShortcut('Ctrl+Alt+B')
+        self.blameAction.setStatusTip('Show who last changed each visible line')
+        self.blameAction.triggered.connect(self.toggleBlame)
+
         cloneRepo = QAction(QIcon('img/clone.png'), 'Clone Repository', self)
-        cloneRepo.setStatusTip('Clone a repository from GitHub')
+        cloneRepo.setStatusTip('Clone a repository with optional depth, partial and sparse checkout')
         cloneRepo.triggered.connect(self.cloneRepository)
 
         debugMenu = menubar.addMenu('&Debug')
@@ -647,12 +6852,32 @@ class MainWindow(QMainWindow):
         fileMenu.addAction(newFolderAction)
         fileMenu.addAction(openFile)
         fileMenu.addAction(openFolder)
+        fileMenu.addAction(goToFileAction)
+        fileMenu.addAction(goToSymbolAction)
         fileMenu.addAction(saveFile)
+        fileMenu.addAction(compareSaved)
         fileMenu.addAction(self.autosaveAction)
+        fileMenu.addAction(self.treeThumbnailsAction)
+        fileMenu.addAction(treeExcludesAction)
+        fileMenu.addAction(convertEncodingsAction)
+        fileMenu.addAction(formatFileAction)
+        fileMenu.addAction(formatProjectAction)
         runMenu.addAction(runAction)
+        runMenu.addAction(stopRunsAction)
+        runMenu.addAction(limitsAction)
+        runMenu.addAction(self.watchAction)
+        runMenu.addAction(runLogsAction)
+        runMenu.addSeparator()
+        runMenu.addAction(runCellAction)
+        runMenu.addAction(runCellAdvanceAction)
+        runMenu.addAction(interruptSessionAction)
+        runMenu.addAction(restartSessionAction)
         gitMenu.addAction(gitCommit)
         gitMenu.addAction(gitPush)
         gitMenu.addAction(gitPull)
+        gitMenu.addAction(gitDiff)
+        gitMenu.addAction(fileHistory)
+        gitMenu.addAction(self.blameAction)
         gitMenu.addAction(cloneRepo)
 
         # Compilers Menu
@@ -682,21 +6907,29 @@ class MainWindow(QMainWindow):
         compilerMenu.addAction(rubyCompiler)
         compilerMenu.addAction(jsCompiler)
 
+        # Tools Menu
+        toolsMenu = menubar.addMenu('&Tools')
+
+        performanceAction = QAction('Performance Panel', self)
+        performanceAction.setStatusTip('Show UI responsiveness and slot timings')
+        performanceAction.triggered.connect(lambda: self.bottomTabWidget.setCurrentWidget(self.performancePanel))
+
+        exportPerformanceAction = QAction('Export Performance Data', self)
+        exportPerformanceAction.setStatusTip('Export event loop lag, slot timings and stall stacks as JSON')
+        exportPerformanceAction.triggered.connect(self.performancePanel.exportStats)
+
+        toolsMenu.addAction(performanceAction)
+        toolsMenu.addAction(exportPerformanceAction)
+
     def debugCode(self):
         if self.currentFile and self.currentFile.endswith('.py'):
-            self.console.clear()
-            self.terminal.clear()
-
-            command = f'python -m pdb "{self.currentFile}"'
-            self.process = QProcess()
-            self.process.setProcessChannelMode(QProcess.SeparateChannels)
-            self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-            self.process.readyReadStandardError.connect(self.updateConsoleOutput)
-            self.process.finished.connect(self.processFinished)
-            self.process.start(command)
+            # O pdb roda como uma sessão com aba própria: depurar de novo não derruba a depuração anterior
+            path = self.currentFile
+            self.debugSession = self.runSessions.startSession(f"Debug {os.path.basename(path)}", 'python', ['-m', 'pdb', path],
+                                                              os.path.dirname(path))
 
             self.debugToolbar.setVisible(True)  # Mostrar a barra de ferramentas de depuração
-            self.bottomTabWidget.setCurrentIndex(0)  # Switch to Output tab
+            self.bottomTabWidget.setCurrentWidget(self.runSessions)  # Switch to Runs tab
 
     def newFile(self):
         text, ok = QInputDialog.getText(self, 'New File', 'Enter file name:')
@@ -704,7 +6937,10 @@ class MainWindow(QMainWindow):
             self.currentFile = os.path.join(self.projectPath, text)
             with open(self.currentFile, 'w') as f:
                 f.write('')
+            self.journal.close()
             self.editor.setText("")
+            self.journal.begin(self.currentFile, "")
+            self.resetOutline()
             self.setWindowTitle(f"ScriptBliss - {self.currentFile}")
             self.treeView.setRootIndex(self.fileSystemModel.index(self.projectPath))
             self.updateFileInfo()
@@ -721,11 +6957,14 @@ class MainWindow(QMainWindow):
     def openFolderDialog(self):
         folder = QFileDialog.getExistingDirectory(self, "Open Folder", QDir.currentPath())
         if folder:
+            self.saveWorkspace()
             self.projectPath = folder
+            self.expandedDirs = set()
             self.fileSystemModel.setRootPath(folder)
             self.treeView.setRootIndex(self.fileSystemModel.index(folder))
             
             # Limpar o editor
+            self.journal.close()
             self.editor.clear()
             self.currentFile = ''
             self.setWindowTitle("ScriptBliss")
@@ -738,16 +6977,38 @@ class MainWindow(QMainWindow):
             self.splitter1.replaceWidget(1, self.welcomeWidget)
             
             self.updateFileInfo()
+            self.startProjectScan()
+            self.startProjectIndex()
 
-    def loadFile(self, fileName):
+    @timedSlot
+    def loadFile(self, fileName, binary=False):
         self.console.clear()
         self.terminal.clear()
         self.clearProblems()
+        if self.currentFile:
+            self.saveDocumentState()
+            self.fileWatcher.unwatchFile(self.currentFile)
+        self.journal.close()
+        self.hexViewer.close()
         self.currentFile = fileName
+        self.currentEncoding = None
+        self.diskState = None
         if fileName.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
             self.displayImage(fileName)
+            self.outlinePanel.setEntries([])
+        elif binary or self.isBinaryFile(fileName):
+            self.displayBinary(fileName)
+            self.outlinePanel.setEntries([])
         else:
             encodings = ['utf-8', 'iso-8859-1', 'windows-1252', 'ascii']
+            try:
+                document = self.workspace.document(fileName, os.stat(fileName))
+            except OSError:
+                document = None
+            if document and document['encoding'] in encodings:
+                # O encoding decidido na sessão anterior vale enquanto o arquivo não mudar
+                encodings.remove(document['encoding'])
+                encodings.insert(0, document['encoding'])
             for encoding in encodings:
                 try:
                     with codecs.open(fileName, 'r', encoding=encoding) as f:
@@ -760,38 +7021,38 @@ class MainWindow(QMainWindow):
             else:
                 QMessageBox.critical(self, "Error", f"Unable to decode the file {fileName} with any of the attempted encodings.")
                 return
+            self.editor.setModified(False)
+            self.recordDiskState(fileName)
+            self.fileWatcher.watchFile(fileName)
+            self.journal.begin(fileName, self.editor.text())
+            self.currentEncoding = encoding
+            self.resetOutline()
+            self.refreshBlame()
 
             # Set the appropriate lexer based on the file extension
             if fileName.endswith('.py'):
-                lexer = QsciLexerPython()
                 if not self.checkCompiler('python --version'):
                     self.showCompilerMissingMessage('Python')
             elif fileName.endswith('.java'):
-                lexer = QsciLexerJava()
                 if not self.checkCompiler('javac -version'):
                     self.showCompilerMissingMessage('Java')
-            elif fileName.endswith('.html'):
-                lexer = QsciLexerHTML()
             elif fileName.endswith('.js'):
-                lexer = QsciLexerJavaScript()
                 if not self.checkCompiler('node --version'):
                     self.showCompilerMissingMessage('Node.js')
-            elif fileName.endswith('.css'):
-                lexer = QsciLexerCSS()
             elif fileName.endswith('.cpp'):
-                lexer = QsciLexerCPP()
                 if not self.checkCompiler('g++ --version'):
                     self.showCompilerMissingMessage('C++')
             elif fileName.endswith('.rb'):
-                lexer = QsciLexerRuby()
                 if not self.checkCompiler('ruby --version'):
                     self.showCompilerMissingMessage('Ruby')
-            else:
-                lexer = None
 
+            lexer = self.lexerFor(document['lexer'] if document and document['lexer'] else os.path.splitext(fileName)[1].lower())
             if lexer:
-                lexer.setDefaultFont(QFont("Consolas", 10))
                 self.editor.setLexer(lexer)
+                # Com um banco de APIs preparado, o popup não precisa varrer o documento a cada tecla
+                self.editor.setAutoCompletionSource(QsciScintilla.AcsAPIs)
+            else:
+                self.editor.setAutoCompletionSource(QsciScintilla.AcsDocument)
 
             self.updateFileInfo()
 
@@ -799,22 +7060,197 @@ class MainWindow(QMainWindow):
             if self.splitter1.widget(1) != self.editor:
                 self.splitter1.replaceWidget(1, self.editor)
 
+            if document:
+                self.editor.setCursorPosition(min(document['line'], self.editor.lines() - 1), document['col'])
+                self.editor.setFirstVisibleLine(document['firstLine'])
+
         self.updateTreeViewForFile(fileName)
 
     def updateTreeViewForFile(self, fileName):
         # Obter o diretório do arquivo
         fileDir = os.path.dirname(fileName)
         
-        # Definir o diretório do arquivo como raiz do treeView
-        self.fileSystemModel.setRootPath(fileDir)
-        self.treeView.setRootIndex(self.fileSystemModel.index(fileDir))
+        # A raiz da árvore nunca muda ao abrir um arquivo; fora do projeto (ou excluído) só não há o que selecionar
+        projectDir = os.path.join(os.path.abspath(self.projectPath), '')
+        if not os.path.join(os.path.abspath(fileDir), '').startswith(projectDir):
+            self.treeView.clearSelection()
+            return
         
         # Expandir até o arquivo selecionado
         index = self.fileSystemModel.index(fileName)
+        if not index.isValid():
+            self.treeView.clearSelection()
+            return
         self.treeView.scrollTo(index)
         self.treeView.setCurrentIndex(index)
         self.treeView.expand(index.parent())
 
+    def editTreeExcludes(self):
+        path = os.path.join(self.projectPath, TREE_IGNORE_FILE)
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("# Paths hidden from the file tree, in .gitignore syntax (.gitignore files are applied too).\n"
+                        f"# Hidden by default: {', '.join(sorted(IGNORED_DIRS))}. Use !name to show one of them.\n")
+        self.loadFile(path)
+
+    def openGallery(self, directory):
+        if self.gallery is None:
+            self.gallery = ImageGallery()
+            self.gallery.openImage.connect(self.loadFile)
+        self.gallery.setDirectory(directory)
+        self.splitter1.replaceWidget(1, self.gallery)
+        self.gallery.show()
+        self.setWindowTitle(f"ScriptBliss - {directory}")
+
+    def normalizeProjectEncodings(self):
+        if self.encodingNormalizer and self.encodingNormalizer.isRunning():
+            QMessageBox.information(self, 'Convert Project to UTF-8', 'An encoding scan is already in progress.')
+            return
+        self.statusBar.showMessage(f"Scanning {self.projectPath} for non UTF-8 files...")
+        self.encodingNormalizer = EncodingNormalizer(self.projectPath, parent=self)
+        self.encodingNormalizer.reportReady.connect(self.onEncodingReport)
+        self.encodingNormalizer.start()
+
+    def onEncodingReport(self, entries):
+        self.statusBar.clearMessage()
+        if not entries:
+            QMessageBox.information(self, 'Convert Project to UTF-8', 'Every text file in the project is already UTF-8.')
+            return
+        if EncodingReportDialog(self.projectPath, entries, self).exec_() != QDialog.Accepted:
+            return
+        self.statusBar.showMessage(f"Converting {len(entries)} files to UTF-8...")
+        self.encodingNormalizer = EncodingNormalizer(self.projectPath, entries, self)
+        self.encodingNormalizer.converted.connect(self.onEncodingsConverted)
+        self.encodingNormalizer.start()
+
+    def onEncodingsConverted(self, results):
+        failed = [result for result in results if result['status'] != 'converted']
+        self.statusBar.showMessage(f"Converted {len(results) - len(failed)} files to UTF-8.", 5000)
+        self.runEncodings.clear()
+        for result in failed:
+            self.console.append(f"<span style='color: #ff8c8c;'>{result['path']}: {result['status']}</span>")
+        if failed:
+            self.bottomTabWidget.setCurrentIndex(0)
+
+    def formatCurrentFile(self):
+        if not self.currentFile or self.splitter1.widget(1) != self.editor:
+            self.statusBar.showMessage('Open a source file to format it.', 3000)
+            return
+        if self.formatWorker and self.formatWorker.isRunning():
+            self.statusBar.showMessage('A format is already in progress.', 3000)
+            return
+        self.formatRequest = (self.currentFile, self.editor.text())
+        data = self.formatRequest[1].encode('utf-8')
+        self.formatWorker = FormatWorker(self.projectPath, self.currentFile, data, parent=self)
+        self.formatWorker.bufferFormatted.connect(self.onBufferFormatted)
+        self.formatWorker.start()
+
+    def onBufferFormatted(self, path, ok, output):
+        if not ok:
+            self.statusBar.showMessage(f"Format failed: {output}", 5000)
+            return
+        # Descarta o resultado se o usuário trocou de arquivo ou editou enquanto o formatador rodava
+        if (self.currentFile, self.editor.text()) != self.formatRequest or self.splitter1.widget(1) != self.editor:
+            self.statusBar.showMessage('The buffer changed while formatting; run Format File again.', 3000)
+            return
+        text = output.decode('utf-8', errors='replace').rstrip('\n')
+        if self.replaceEditorText(text):
+            self.statusBar.showMessage(f"Formatted {os.path.basename(path)}.", 3000)
+        else:
+            self.statusBar.showMessage(f"{os.path.basename(path)} is already formatted.", 3000)
+
+    def replaceEditorText(self, text):
+        # Troca só o trecho entre o prefixo e o sufixo de linhas iguais, em uma única ação de desfazer:
+        # cursor, marcadores e breakpoints fora da região alterada ficam onde estavam
+        old = self.editor.text().split('\n')
+        new = text.split('\n')
+        if old == new:
+            return False
+        common = min(len(old), len(new))
+        start = 0
+        while start < common - 1 and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < common - start and old[len(old) - 1 - end] == new[len(new) - 1 - end]:
+            end += 1
+        startPosition = self.editor.positionFromLineIndex(start, 0)
+        if end:
+            endPosition = self.editor.positionFromLineIndex(len(old) - end, 0)
+            replacement = ''.join(line + '\n' for line in new[start:len(new) - end])
+        else:
+            endPosition = self.editor.length()
+            replacement = '\n'.join(new[start:])
+        data = replacement.encode('utf-8')
+        self.editor.beginUndoAction()
+        self.editor.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, startPosition)
+        self.editor.SendScintilla(QsciScintilla.SCI_SETTARGETEND, endPosition)
+        self.editor.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(data), data)
+        self.editor.endUndoAction()
+        return True
+
+    def formatProject(self):
+        if self.formatWorker and self.formatWorker.isRunning():
+            QMessageBox.information(self, 'Format Project', 'A format is already in progress.')
+            return
+        # O buffer com alterações não salvas tem prioridade sobre o arquivo em disco
+        skip = [self.currentFile] if self.currentFile and self.splitter1.widget(1) == self.editor and self.editor.isModified() else []
+        self.statusBar.showMessage(f"Formatting {self.projectPath}...")
+        self.formatWorker = FormatWorker(self.projectPath, skip=skip, parent=self)
+        self.formatWorker.projectFormatted.connect(self.onProjectFormatted)
+        self.formatWorker.start()
+
+    def onProjectFormatted(self, results, stats):
+        if not stats.get('formatters'):
+            self.statusBar.clearMessage()
+            QMessageBox.information(self, 'Format Project', 'No formatter found. Install black, clang-format or prettier '
+                                                            '(globally or in the project\'s node_modules / virtualenv).')
+            return
+        formatted = [result['path'] for result in results if result['status'] == 'formatted']
+        failed = [result for result in results if result['status'] not in ('formatted', 'unchanged', 'cached')]
+        self.statusBar.showMessage(f"Formatted {len(formatted)} of {stats['files']} files "
+                                   f"({stats.get('cached', 0)} unchanged since the last run, {len(failed)} not formatted).", 5000)
+        for result in failed:
+            self.console.append(f"<span style='color: #ff8c8c;'>{html.escape(result['path'])}: {html.escape(result['status'])}</span>")
+        if failed:
+            self.bottomTabWidget.setCurrentIndex(0)
+        if self.projectScanner and formatted:
+            self.projectScanner.enqueue(formatted)
+        current = os.path.abspath(self.currentFile) if self.currentFile else None
+        if current in formatted and self.splitter1.widget(1) == self.editor and not self.editor.isModified():
+            # Atualiza o buffer no lugar (sem recarregar) e registra o novo estado antes do watcher avisar
+            _, code = readSource(current)
+            if code is not None:
+                self.replaceEditorText(code.rstrip('\n'))
+                self.editor.setModified(False)
+                self.journal.begin(current, self.editor.text())
+                self.recordDiskState(current)
+                self.changeMarkerTimer.start(300)
+                return
+        self.checkExternalChange()
+
+    def toggleTreeThumbnails(self, enabled):
+        previous = self.fileSystemModel.thumbnailLoader
+        self.fileSystemModel.setThumbnailLoader(ThumbnailLoader(self) if enabled else None)
+        if previous:
+            previous.stop()
+            previous.deleteLater()
+        self.treeView.viewport().update()
+        self.treeThumbnailTimer.start(0)
+
+    def requestTreeThumbnails(self):
+        # Só as imagens nas linhas visíveis da árvore; o resto espera a rolagem
+        if self.fileSystemModel.thumbnailLoader is None:
+            return
+        paths = []
+        index = self.treeView.indexAt(QPoint(0, 0))
+        bottom = self.treeView.viewport().height()
+        while index.isValid() and self.treeView.visualRect(index).top() <= bottom:
+            path = self.fileSystemModel.filePath(index)
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(path)
+            index = self.treeView.indexBelow(index)
+        self.fileSystemModel.requestThumbnails(paths)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if hasattr(self, 'imageLabel') and hasattr(self, 'scrollArea'):
@@ -823,19 +7259,32 @@ class MainWindow(QMainWindow):
     def updateImageSize(self):
         if self.currentFile and self.currentFile.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
             available_size = self.splitter1.widget(1).size()
-            pixmap = QPixmap(self.currentFile)
-            scaled_pixmap = pixmap.scaled(available_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.imageLabel.setPixmap(scaled_pixmap)
+            self.imageLabel.setPixmap(QPixmap.fromImage(scaledImage(self.currentFile, available_size)))
+
+    def isBinaryFile(self, fileName):
+        # Decide pelo conteúdo (amostras do início, meio e fim), não só pela extensão
+        try:
+            return sniffEncoding(fileName) is None
+        except OSError:
+            return False
+
+    def displayBinary(self, fileName):
+        self.hexViewer.open(fileName)
+        if self.splitter1.widget(1) != self.hexViewer:
+            self.splitter1.replaceWidget(1, self.hexViewer)
+        self.fileWatcher.watchFile(fileName)
+        # Evita que a barra de status decodifique o arquivo inteiro procurando um encoding
+        self.currentEncoding = 'binary'
+        self.updateFileInfo()
+        self.setWindowTitle(f"ScriptBliss - {fileName}")
 
     def displayImage(self, fileName):
         try:
-            pixmap = QPixmap(fileName)
-            
             # Get the size of the splitter widget where the image will be displayed
             available_size = self.splitter1.widget(1).size()
             
-            # Scale the pixmap to fit within the available size while maintaining aspect ratio
-            scaled_pixmap = pixmap.scaled(available_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            # Decode straight to the available size while maintaining aspect ratio
+            scaled_pixmap = QPixmap.fromImage(scaledImage(fileName, available_size))
             
             # Create a new QLabel to hold the scaled image
             imageLabel = QLabel()
@@ -862,7 +7311,11 @@ class MainWindow(QMainWindow):
         # Update the window title
         self.setWindowTitle(f"ScriptBliss - {fileName}")
 
+    @timedSlot
     def saveFileDialog(self):
+        if self.currentFile and self.splitter1.widget(1) != self.editor:
+            # Imagens e binários são somente leitura; o editor guarda outro arquivo
+            return
         if self.currentFile:
             fileName = self.currentFile
         else:
@@ -875,6 +7328,11 @@ class MainWindow(QMainWindow):
                 f.write(code.rstrip('\n'))  # Remove trailing newlines before saving
             self.currentFile = fileName
             self.setWindowTitle(f"ScriptBliss - {fileName}")
+            self.editor.setModified(False)
+            self.recordDiskState(fileName)
+            self.fileWatcher.watchFile(fileName)
+            self.journal.begin(fileName, code)
+            self.onFileSaved(fileName)
 
     def toggleAutosave(self, checked):
         if checked:
@@ -887,135 +7345,247 @@ class MainWindow(QMainWindow):
                 self.autosaveTimer.stop()
             self.autosaveAction.setText('Enable Autosave')
 
+    @timedSlot
     def autosave(self):
-        if self.currentFile:
+        if self.currentFile and self.editor.isModified() and self.splitter1.widget(1) == self.editor:
+            # Nunca sobrescreve alterações feitas por outro programa
+            if self.diskConflict or self.diskChanged():
+                self.checkExternalChange()
+                return
             with open(self.currentFile, 'w', newline='') as f:  # Add newline='' parameter
                 code = self.editor.text()
                 f.write(code.rstrip('\n'))  # Remove trailing newlines before saving
+            self.editor.setModified(False)
+            self.recordDiskState(self.currentFile)
+            self.journal.begin(self.currentFile, code)
+            self.onFileSaved(self.currentFile)
 
+    @timedSlot
     def runCode(self):
         if self.currentFile:
-            self.console.clear()
-            self.terminal.clear()
-
-            if self.currentFile.endswith('.py'):
-                if self.checkCompiler('python --version'):
-                    # Detecta a codificação do arquivo
-                    encodings = ['utf-8', 'iso-8859-1', 'windows-1252', 'ascii']
-                    detected_encoding = None
-                    for encoding in encodings:
-                        try:
-                            with codecs.open(self.currentFile, 'r', encoding=encoding) as f:
-                                f.read()
-                            detected_encoding = encoding
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if detected_encoding:
-                        command = f'python -X utf8=0 -c "import codecs; exec(codecs.open(\'{self.currentFile}\', encoding=\'{detected_encoding}\').read())"'
-                    else:
-                        command = f'python "{self.currentFile}"'
-                    
-                    self.process = QProcess(self)
-                    self.process.setProcessChannelMode(QProcess.SeparateChannels)
-                    self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-                    self.process.readyReadStandardError.connect(self.updateConsoleError)
-                    self.process.finished.connect(self.processFinished)
-                    self.process.start(command)
-                else:
-                    self.showCompilerMissingMessage('Python')
+            self.runTarget(self.currentFile)
 
-            elif self.currentFile.endswith('.java'):
-                if self.checkCompiler('javac -version'):
-                    compile_command = f'javac "{self.currentFile}"'
-                    self.process = QProcess()
-                    self.process.start(compile_command)
-                    self.process.waitForFinished()
-                    compile_output = self.process.readAllStandardOutput().data().decode()
-                    compile_error = self.process.readAllStandardError().data().decode()
-
-                    if compile_error:
-                        self.console.append(f"<span style='color:#ff8c8c;'>{compile_error}</span>")
-                        return
-
-                    class_name = os.path.splitext(os.path.basename(self.currentFile))[0]
-                    run_command = f'java -cp "{os.path.dirname(self.currentFile)}" {class_name}'
-                    self.process = QProcess()
-                    self.process.setProcessChannelMode(QProcess.SeparateChannels)
-                    self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-                    self.process.readyReadStandardError.connect(self.updateConsoleOutput)
-                    self.process.finished.connect(self.processFinished)
-                    self.process.start(run_command)
+    def runCell(self, advance=False):
+        if not self.currentFile or not self.currentFile.endswith('.py') or self.splitter1.widget(1) != self.editor:
+            self.statusBar.showMessage('Cells run in the Python session; open a Python file.', 3000)
+            return
+        if self.editor.hasSelectedText():
+            start, _, end, endIndex = self.editor.getSelection()
+            code = self.editor.selectedText()
+            nextLine = end + 1 if endIndex else end
+        else:
+            line, _ = self.editor.getCursorPosition()
+            lines = self.editor.text().splitlines()
+            start, nextLine = cellRange(lines, line)
+            code = '\n'.join(lines[start:nextLine])
+        # Trechos selecionados de dentro de um bloco chegam indentados
+        self.pythonSession.execute(textwrap.dedent(code), os.path.abspath(self.currentFile), start)
+        self.bottomTabWidget.setCurrentWidget(self.pythonSession)
+        if advance and not self.editor.hasSelectedText():
+            nextLine = min(nextLine + (1 if CELL_MARKER.match(self.editor.text(nextLine)) else 0), self.editor.lines() - 1)
+            self.editor.setCursorPosition(nextLine, 0)
+            self.editor.ensureLineVisible(nextLine)
+
+    def runTarget(self, path):
+        self.console.clear()
+        self.terminal.clear()
+        name = os.path.basename(path)
+        directory = os.path.dirname(path)
+        session = None
+
+        if path.endswith('.py'):
+            if self.checkCompiler('python --version'):
+                detected_encoding = self.runEncoding(path)
+                if detected_encoding:
+                    arguments = ['-X', 'utf8=0', '-c', f"import codecs; exec(codecs.open({path!r}, encoding={detected_encoding!r}).read())"]
                 else:
-                    self.showCompilerMissingMessage('Java')
+                    arguments = [path]
+                session = self.runSessions.startSession(name, 'python', arguments, directory)
+            else:
+                self.showCompilerMissingMessage('Python')
 
-            elif self.currentFile.endswith('.cpp'):
-                if self.checkCompiler('g++ --version'):
-                    executable = self.currentFile[:-4]
-                    compile_command = f'g++ "{self.currentFile}" -o "{executable}"'
-                    run_command = f'"{executable}"'
-                    self.process = QProcess()
-                    self.process.setProcessChannelMode(QProcess.SeparateChannels)
-                    self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-                    self.process.readyReadStandardError.connect(self.updateConsoleOutput)
-
-                    self.process.start(compile_command)
-                    self.process.waitForFinished()
-                    compile_output = self.process.readAllStandardOutput().data().decode()
-                    compile_error = self.process.readAllStandardError().data().decode()
-
-                    if compile_error:
-                        self.console.append(f"<span style='color: #ff8c8c;'>{compile_error}</span>")
-                        return
+        elif path.endswith('.java'):
+            if self.checkCompiler('javac -version'):
+                # Compila em segundo plano; a execução começa em onBuildFinished
+                self.buildWorker.submit(path)
+                return None
+            else:
+                self.showCompilerMissingMessage('Java')
 
-                    self.process.start(run_command)
-                    self.process.finished.connect(self.processFinished)
-                else:
-                    self.showCompilerMissingMessage('C++')
+        elif path.endswith('.cpp'):
+            if self.checkCompiler('g++ --version'):
+                self.buildWorker.submit(path)
+                return None
+            else:
+                self.showCompilerMissingMessage('C++')
 
-            elif self.currentFile.endswith('.rb'):
-                if self.checkCompiler('ruby --version'):
-                    command = f'ruby "{self.currentFile}"'
-                    self.process = QProcess()
-                    self.process.setProcessChannelMode(QProcess.SeparateChannels)
-                    self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-                    self.process.readyReadStandardError.connect(self.updateConsoleOutput)
-                    self.process.finished.connect(self.processFinished)
-                    self.process.start(command)
-                else:
-                    self.showCompilerMissingMessage('Ruby')
+        elif path.endswith('.rb'):
+            if self.checkCompiler('ruby --version'):
+                session = self.runSessions.startSession(name, 'ruby', [path], directory)
+            else:
+                self.showCompilerMissingMessage('Ruby')
 
-            elif self.currentFile.endswith('.html'):
-                html_file_path = f'file://{os.path.abspath(self.currentFile)}'
-                webbrowser.open(html_file_path)
-                self.console.append(f"Opened {self.currentFile} in the default web browser.")
-
-            elif self.currentFile.endswith('.js'):
-                if self.checkCompiler('node --version'):
-                    command = f'node "{self.currentFile}"'
-                    self.process = QProcess()
-                    self.process.setProcessChannelMode(QProcess.SeparateChannels)
-                    self.process.readyReadStandardOutput.connect(self.updateConsoleOutput)
-                    self.process.readyReadStandardError.connect(self.updateConsoleOutput)
-                    self.process.finished.connect(self.processFinished)
-                    self.process.start(command)
-                else:
-                    self.showCompilerMissingMessage('Node.js')
+        elif path.endswith('.html'):
+            self.previewFile(path)
+            self.bottomTabWidget.setCurrentIndex(0)
+            return None
 
-            elif self.currentFile.endswith('.css'):
-                self.console.append("Cannot execute CSS files directly.")
+        elif path.endswith('.js'):
+            if self.checkCompiler('node --version'):
+                session = self.runSessions.startSession(name, 'node', [path], directory)
+            else:
+                self.showCompilerMissingMessage('Node.js')
 
+        elif path.endswith('.css'):
+            if self.previewServer and self.previewServer.hasClients() and self.previewServer.notifyChanged(path, force=True):
+                self.console.append(f"Reloaded {name} in the live preview.")
             else:
-                self.console.append("Unsupported file format for direct execution.")
-                return
-            
-            self.debugToolbar.setVisible(False)  # Ocultar a barra de ferramentas de depuração
-            self.bottomTabWidget.setCurrentIndex(0)  # Switch to Output tab
+                self.console.append("Cannot execute CSS files directly. Run an HTML page to open the live preview.")
+            self.bottomTabWidget.setCurrentIndex(0)
+            return None
+
+        else:
+            self.console.append("Unsupported file format for direct execution.")
+            return None
+
+        if session:
+            session.source = os.path.abspath(path)
+        self.bottomTabWidget.setCurrentWidget(self.runSessions)  # Switch to Runs tab
+        return session
+
+    def runEncoding(self, path):
+        # Reaproveita a codificação detectada enquanto o arquivo não mudar de tamanho/mtime
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self.runEncodings.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        detected_encoding = None
+        for encoding in ['utf-8', 'iso-8859-1', 'windows-1252', 'ascii']:
+            try:
+                with codecs.open(path, 'r', encoding=encoding) as f:
+                    f.read()
+                detected_encoding = encoding
+                break
+            except UnicodeDecodeError:
+                continue
+        self.runEncodings[path] = (key, detected_encoding)
+        return detected_encoding
+
+    def onBuildFinished(self, path, result):
+        self.buildInputs[path] = result['inputs']
+        if result['output']:
+            color = '#c9dcff' if result['ok'] else '#ff8c8c'
+            self.console.append(f"<pre style='color: {color};'>{html.escape(result['output'])}</pre>")
+        if not result['ok']:
+            self.statusBar.showMessage(f"Build of {os.path.basename(path)} failed", 5000)
+            self.bottomTabWidget.setCurrentIndex(0)
+            return
+        session = self.runSessions.startSession(os.path.basename(path), result['program'], result['arguments'], result['directory'])
+        # Métricas da execução: o tempo do build (mesmo sem nada a compilar) vai junto com o rusage
+        session.source = path
+        session.compileSeconds = result['seconds']
+        self.statusBar.showMessage(f"Built {os.path.basename(path)}: {result['compiled']} files compiled in {result['seconds']:.3f} s", 5000)
+        if path == self.watchTarget:
+            self.watchSession = session
+            self.updateWatchFiles()
+        self.bottomTabWidget.setCurrentWidget(self.runSessions)
+
+    def toggleWatchMode(self, enabled):
+        for path in self.watchFiles:
+            self.runWatcher.unwatchFile(path)
+        self.runWatcher.clearDirectories()
+        self.watchFiles = set()
+        self.watchTimer.stop()
+        if not enabled:
+            self.watchTarget = None
+            self.statusBar.showMessage('Watch mode disabled', 3000)
+            return
+        if not self.currentFile:
+            self.watchAction.setChecked(False)
+            return
+        self.watchTarget = os.path.abspath(self.currentFile)
+        self.watchSession = self.runTarget(self.watchTarget)
+        self.updateWatchFiles()
+        self.statusBar.showMessage(f"Watching {os.path.basename(self.watchTarget)} and {len(self.watchFiles) - 1} local imports", 5000)
+
+    def updateWatchFiles(self):
+        # Os imports podem ter mudado desde a última execução
+        files = set(localDependencies(self.watchTarget)) | set(self.buildInputs.get(self.watchTarget, []))
+        for path in self.watchFiles - files:
+            self.runWatcher.unwatchFile(path)
+        for path in files - self.watchFiles:
+            self.runWatcher.watchFile(path)
+        # Observar os diretórios pega também os editores que salvam com rename
+        self.runWatcher.watchDirectories(sorted({os.path.dirname(path) for path in files}))
+        self.watchFiles = files
+
+    def onRunTargetChanged(self, files):
+        if self.watchTarget and self.watchFiles.intersection(files):
+            self.watchTimer.start(100)
+
+    def rerunWatchTarget(self):
+        if not self.watchTarget:
+            return
+        if not os.path.exists(self.watchTarget):
+            # Salvamentos atômicos deixam o arquivo ausente por um instante
+            self.watchTimer.start(100)
+            return
+        session = self.watchSession
+        if session is not None and session.isRunning():
+            # Encerra a execução anterior (SIGTERM e depois SIGKILL) antes de recompilar
+            if not self.watchStopping:
+                self.watchStopping = True
+                session.process.finished.connect(self.onWatchSessionStopped)
+                session.stop()
+            return
+        self.watchSession = self.runTarget(self.watchTarget)
+        self.updateWatchFiles()
+
+    def onWatchSessionStopped(self, *args):
+        self.watchStopping = False
+        QTimer.singleShot(0, self.rerunWatchTarget)
+
+    def previewFile(self, fileName):
+        root = self.projectPath if os.path.abspath(fileName).startswith(os.path.abspath(self.projectPath) + os.sep) else os.path.dirname(fileName)
+        if self.previewServer and os.path.abspath(root) != self.previewServer.root:
+            self.previewServer.stop()
+            self.previewServer = None
+            self.previewPages.clear()
+        if not self.previewServer:
+            self.previewServer = LivePreviewServer(root)
+
+        url = self.previewServer.urlFor(fileName)
+        # Com a página já aberta, só recarrega em vez de abrir outra aba
+        if url in self.previewPages and self.previewServer.hasClients():
+            self.previewServer.notifyChanged(fileName, force=True)
+            self.console.append(f"Reloaded {url} in the live preview.")
+        else:
+            self.previewPages.add(url)
+            webbrowser.open(url)
+            self.console.append(f"Serving {self.previewServer.root} at http://127.0.0.1:{self.previewServer.port}/ with live reload.")
+            self.console.append(f"Opened {url} in the default web browser.")
+
+    def setRunLimits(self):
+        memory, ok = QInputDialog.getInt(self, 'Resource Limits', 'Memory limit per run in MB (0 = unlimited):',
+                                         self.runSessions.memoryLimitMB, 0, 1024 * 1024)
+        if not ok:
+            return
+        cpu, ok = QInputDialog.getInt(self, 'Resource Limits', 'CPU time limit per run in seconds (0 = unlimited):',
+                                      self.runSessions.cpuLimitSeconds, 0, 24 * 3600)
+        if ok:
+            self.runSessions.memoryLimitMB = memory
+            self.runSessions.cpuLimitSeconds = cpu
+            if not sys.platform.startswith('linux') and (memory or cpu):
+                QMessageBox.information(self, 'Resource Limits', 'Resource limits are only applied on Linux.')
 
     def checkCompiler(self, command):
+        # Só o sucesso fica em cache: uma ferramenta instalada depois ainda é encontrada
+        if self.toolchains.get(command):
+            return True
         try:
-            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            subprocess.run(command.split(), check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.toolchains[command] = True
             return True
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
@@ -1041,75 +7611,281 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, 'Download Error', f'Download link for {compiler} not found.')
 
-    def updateConsoleOutput(self):
-        if not self.process:
-            return
+    def closeEvent(self, event):
+        self.performanceMonitor.stop()
+        self.runSessions.stopAll()
+        if self.terminalProcess:
+            self.terminalProcess.kill()
+        if self.previewServer:
+            self.previewServer.stop()
+        if self.projectScanner:
+            self.projectScanner.stop()
+        if self.projectIndex:
+            self.projectIndex.stop()
+        self.diffWorker.stop()
+        self.buildWorker.stop()
+        self.pythonSession.kernel.stop()
+        self.gitHistory.stop()
+        self.outlineWorker.stop()
+        self.completions.stop()
+        if self.gallery:
+            self.gallery.stop()
+        if self.encodingNormalizer:
+            self.encodingNormalizer.wait()
+        if self.formatWorker:
+            self.formatWorker.wait()
+        if self.fileSystemModel.thumbnailLoader:
+            self.fileSystemModel.thumbnailLoader.stop()
+        self.fileSystemModel.stop()
+        self.journalTimer.stop()
+        self.journal.discard()
+        self.saveWorkspace()
+        if self.workspaceValidator:
+            self.workspaceValidator.stop()
+        self.workspace.close()
+        self.runMetrics.close()
+        super().closeEvent(event)
 
-        encodings = ['utf-8', 'cp1252', 'iso-8859-1', 'ascii']
-        
-        for encoding in encodings:
-            try:
-                output = self.process.readAllStandardOutput().data().decode(encoding)
-                if output:
-                    self.console.append(f"<span style='color: #c9dcff;'>{output}</span>")
-                return
-            except UnicodeDecodeError:
-                continue
-        
-        self.console.append("<span style='color: #ff8c8c;'>Failed to decode output. Try converting the file to UTF-8.</span>")
-   
-    def updateConsoleError(self):
-        if not self.process:
+    def cloneRepository(self):
+        if self.cloneProcess:
+            QMessageBox.information(self, 'Clone Repository', 'A clone is already in progress.')
             return
-
-        encodings = ['utf-8', 'cp1252', 'iso-8859-1', 'ascii']
-        
-        for encoding in encodings:
-            try:
-                error = self.process.readAllStandardError().data().decode(encoding)
-                if error:
-                    self.console.append(f"<span style='color: #ff8c8c;'>{error}</span>")
-                return
-            except UnicodeDecodeError:
-                continue
-        
-        self.console.append("<span style='color: #ff8c8c;'>Failed to decode error output. Try converting the file to UTF-8.</span>")
-        
-    def processFinished(self):
-        if not self.process:
+        dialog = CloneDialog(self)
+        if dialog.exec_() != QDialog.Accepted or not dialog.urlEdit.text().strip():
             return
 
-        exit_code = self.process.exitCode()
-        exit_status = self.process.exitStatus()
+        self.cloneDestination = dialog.destination()
+        self.cloneSparsePaths = dialog.sparsePaths()
+        self.cloneError = ''
+        self.cloneProcess = QProcess(self)
+        self.cloneProcess.setWorkingDirectory(dialog.targetEdit.text())
+        self.cloneProcess.readyReadStandardError.connect(self.updateCloneProgress)
+        self.cloneProcess.finished.connect(self.cloneFinished)
+        self.cloneProcess.start('git', dialog.cloneArguments())
+
+        self.cloneProgress.setValue(0)
+        self.cloneProgress.setVisible(True)
+        self.statusBar.showMessage(f"Cloning into {self.cloneDestination}...")
+
+    def updateCloneProgress(self):
+        text = self.cloneProcess.readAllStandardError().data().decode('utf-8', errors='replace')
+        # O git reescreve a linha de progresso com \r
+        for line in re.split(r'[\r\n]+', text):
+            match = re.search(r'([A-Za-z ]+):\s+(\d+)%', line)
+            if match:
+                self.cloneProgress.setValue(int(match.group(2)))
+                self.cloneProgress.setFormat(f"{match.group(1).strip()} %p%")
+            elif line.strip():
+                self.cloneError = line.strip()
+
+    def cloneFinished(self, exit_code, exit_status):
+        self.updateCloneProgress()
+        self.cloneProcess = None
+        if exit_code != 0 or exit_status != QProcess.NormalExit:
+            self.cloneProgress.setVisible(False)
+            self.statusBar.showMessage('Clone failed.', 5000)
+            QMessageBox.critical(self, 'Clone Repository', f"git clone failed: {self.cloneError}")
+            return
 
-        if exit_status == QProcess.CrashExit:
-            self.console.append("<span style='color: #ff8c8c;'>Process crashed.</span>")
-        elif exit_code != 0:
-            self.console.append(f"<span style='color: #ff8c8c;'>Process finished with exit code {exit_code}. Check the output above for error details.</span>")
+        if self.cloneSparsePaths:
+            self.cloneProgress.setFormat('Sparse checkout %p%')
+            process = QProcess(self)
+            process.setWorkingDirectory(self.cloneDestination)
+            process.finished.connect(lambda *args: self.cloneCompleted())
+            process.start('git', ['sparse-checkout', 'set'] + self.cloneSparsePaths)
         else:
-            self.console.append("<span style='color: #c9dcff;'>Process finished successfully.</span>")
+            self.cloneCompleted()
 
-        # Capture any remaining output
-        self.updateConsoleOutput()
-        self.updateConsoleError()
+    def cloneCompleted(self):
+        self.cloneProgress.setVisible(False)
+        self.statusBar.showMessage(f"Cloned into {self.cloneDestination}. Indexing...", 5000)
+        self.updateTreeView(self.cloneDestination)
 
-        self.debugToolbar.setVisible(False)
-        self.process = None
+    def updateChangeMarkers(self):
+        self.diffGeneration += 1
+        if not self.currentFile or self.splitter1.widget(1) != self.editor:
+            self.applyChangeMarkers(set())
+            return
+        self.diffWorker.submit('gutter', self.diffGeneration, self.currentFile, 'auto', self.editor.text())
 
-    def cloneRepository(self):
-        repo_url, ok = QInputDialog.getText(self, 'Clone Repository', 'Enter repository URL:')
-        if ok and repo_url:
-            target_path = QFileDialog.getExistingDirectory(self, "Select Directory to Clone Into")
-            if target_path:
-                process = QProcess()
-                process.setWorkingDirectory(target_path)
-                process.start('git', ['clone', repo_url])
-                process.finished.connect(lambda: self.updateTreeView(target_path))
+    def onDiffReady(self, tag, generation, result):
+        if tag == 'view':
+            if self.diffView and self.diffView.generation == generation:
+                self.diffView.setDiff(result, None, self.diffView.rightTitle)
+            return
+        if generation != self.diffGeneration:
+            return  # o texto mudou desde a requisição
+        markers = set()
+        if result:
+            for op, i1, i2, j1, j2 in result[2]:
+                if op == 'insert':
+                    markers.update((line, DIFF_ADDED_MARKER) for line in range(j1, j2))
+                elif op == 'replace':
+                    markers.update((line, DIFF_MODIFIED_MARKER) for line in range(j1, j2))
+                elif op == 'delete':
+                    markers.add((min(j1, max(0, self.editor.lines() - 1)), DIFF_REMOVED_MARKER))
+        self.applyChangeMarkers(markers)
+
+    def applyChangeMarkers(self, markers):
+        # Atualiza só o que mudou; os handles acompanham as linhas quando o texto é editado
+        current = {}
+        for handle, marker in getattr(self, 'changeMarkerHandles', []):
+            line = self.editor.markerLine(handle)
+            if line >= 0:
+                current[(line, marker)] = handle
+        for key, handle in current.items():
+            if key not in markers:
+                self.editor.markerDeleteHandle(handle)
+        for line, marker in markers - set(current):
+            current[(line, marker)] = self.editor.markerAdd(line, marker)
+        self.changeMarkerHandles = [(handle, key[1]) for key, handle in current.items() if key in markers]
+
+    def showDiff(self, base):
+        if not self.currentFile or self.splitter1.widget(1) != self.editor:
+            QMessageBox.information(self, 'Diff', 'Open a text file to compare it.')
+            return
+        self.diffGeneration += 1
+        title = 'HEAD' if base == 'HEAD' else 'saved file'
+        self.diffView = DiffView(f"Diff: {os.path.basename(self.currentFile)} ({title} \u2194 buffer)", self)
+        self.diffView.generation = self.diffGeneration
+        self.diffView.rightTitle = 'Buffer'
+        self.diffView.show()
+        self.diffWorker.submit('view', self.diffGeneration, self.currentFile, base, self.editor.text())
+
+    def showCommitDiff(self, commit, path):
+        self.diffGeneration += 1
+        self.diffView = DiffView(f"{os.path.basename(path)} @ {commit[:8]}", self)
+        self.diffView.generation = self.diffGeneration
+        self.diffView.rightTitle = commit[:8]
+        self.diffView.show()
+        self.diffWorker.submit('view', self.diffGeneration, path, f'{commit}^', ('rev', commit))
+
+    def onRunFinished(self, session):
+        if session is self.debugSession and session.status != 'Restarting':
+            self.debugToolbar.setVisible(False)
+        self.statusBar.showMessage(f"{session.title}: {session.status} in {formatRunMetrics(session.metrics)}", 15000)
+        if session.source:
+            self.runMetrics.add(session)
+            self.runMetricsPanel.showSource(session.source)
+
+    def openRunLog(self, path=None):
+        if path:
+            self.runLogViewer.openLog(path)
+        else:
+            self.runLogViewer.refreshHistory()
+        self.bottomTabWidget.setCurrentWidget(self.runLogViewer)
+
+    def compareRunLogs(self, base, other):
+        # O diff carrega as linhas em memória; logs gigantes ficam só no visualizador paginado
+        limit = 50 * 1024 * 1024
+        if max(os.path.getsize(base), os.path.getsize(other)) > limit:
+            QMessageBox.information(self, 'Run Logs', 'These logs are too large to compare (limit: 50 MB each).')
+            return
+        self.diffGeneration += 1
+        self.diffView = DiffView(f"Run logs: {os.path.basename(base)} \u2194 {os.path.basename(other)}", self)
+        self.diffView.generation = self.diffGeneration
+        self.diffView.rightTitle = os.path.basename(other)
+        self.diffView.show()
+        self.diffWorker.submit('view', self.diffGeneration, base, 'disk', ('disk', other))
+
+    def showFileHistory(self):
+        if not self.currentFile or self.splitter1.widget(1) != self.editor:
+            QMessageBox.information(self, 'File History', 'Open a text file to see its history.')
+            return
+        if not findGitRoot(self.currentFile):
+            QMessageBox.information(self, 'File History', 'This file is not inside a git repository.')
+            return
+        self.historyGeneration += 1
+        self.fileLogPanel.setLoading(self.currentFile)
+        self.bottomTabWidget.setCurrentWidget(self.fileLogPanel)
+        self.gitHistory.submitFileLog(self.historyGeneration, self.currentFile)
+
+    def onFileLogReady(self, generation, path, entries):
+        if generation == self.historyGeneration:
+            self.fileLogPanel.setEntries(path, findGitRoot(path), entries)
+
+    def toggleBlame(self, enabled):
+        self.blameEnabled = enabled
+        self.editor.clearMarginText()
+        width = QFontMetrics(self.editor.font()).width('0' * 34) if enabled else 0
+        self.editor.setMarginWidth(BLAME_MARGIN, width)
+        self.refreshBlame()
+
+    def refreshBlame(self):
+        # Chamado quando o disco e o buffer coincidem (abrir, recarregar, salvar)
+        self.blameGeneration += 1
+        if self.currentFile and findGitRoot(self.currentFile):
+            self.gitHistory.submitUpdate(findGitRoot(self.currentFile))
+            if self.blameEnabled:
+                self.editor.clearMarginText()
+                self.blameTimer.start(0)
+
+    def requestBlame(self):
+        if not self.blameEnabled or not self.currentFile or self.splitter1.widget(1) != self.editor:
+            return
+        first = self.editor.firstVisibleLine()
+        count = self.editor.SendScintilla(QsciScintilla.SCI_LINESONSCREEN)
+        self.gitHistory.submitBlame(self.blameGeneration, self.currentFile, first + 1, first + count + 1)
+
+    def onGitHistoryFailed(self, message):
+        self.statusBar.showMessage(f"Git history: {message}", 5000)
+
+    def onBlameReady(self, generation, path, lines):
+        if generation != self.blameGeneration or path != self.currentFile or not self.blameEnabled:
+            return
+        for line, (commit, author, timestamp, summary) in lines.items():
+            if commit.strip('0'):
+                text = f"{commit[:7]} {time.strftime('%Y-%m-%d', time.localtime(timestamp))} {author[:14]}"
+            else:
+                text = 'Not committed yet'
+            self.editor.setMarginText(line - 1, text, self.blameStyle)
+
+    def startProjectIndex(self):
+        if self.projectIndex:
+            self.projectIndex.stop()
+        self.projectFiles = []
+        self.projectSymbols = {}
+        self.projectIndex = ProjectIndex(self.projectPath, self)
+        self.projectIndex.indexReady.connect(self.onProjectIndexed)
+        self.projectIndex.start(QThread.LowPriority)
+
+    def onProjectIndexed(self, files, symbols):
+        self.projectFiles = files
+        self.projectSymbols = symbols
+        self.completions.setProjectSymbols(symbols)
+        self.statusBar.showMessage(f"Indexed {len(files)} files and {len(symbols)} symbols.", 3000)
+
+    def goToFile(self):
+        if not self.projectFiles:
+            self.statusBar.showMessage('The project index is still being built.', 3000)
+            return
+        items = [os.path.relpath(path, self.projectPath) for path in self.projectFiles]
+        item, ok = QInputDialog.getItem(self, 'Go to File', 'File:', items, 0, True)
+        if ok and item:
+            path = os.path.join(self.projectPath, item)
+            if os.path.isfile(path):
+                self.loadFile(path)
+
+    def goToSymbol(self):
+        if not self.projectSymbols:
+            self.statusBar.showMessage('The project index is still being built.', 3000)
+            return
+        locations = {}
+        for name in sorted(self.projectSymbols, key=str.lower):
+            for path, line, kind in self.projectSymbols[name]:
+                locations[f"{name}  ({kind}, {os.path.relpath(path, self.projectPath)}:{line + 1})"] = (path, line + 1)
+        item, ok = QInputDialog.getItem(self, 'Go to Symbol', 'Symbol:', list(locations), 0, True)
+        if ok and item in locations:
+            self.openProblemLocation(*locations[item])
 
     def updateTreeView(self, path):
+        self.saveWorkspace()
         self.projectPath = path
+        self.expandedDirs = set()
         self.fileSystemModel.setRootPath(path)
         self.treeView.setRootIndex(self.fileSystemModel.index(path))
+        self.startProjectScan()
+        self.startProjectIndex()
 
     def gitCommit(self):
         message, ok = QInputDialog.getText(self, 'Git Commit', 'Enter commit message:')
@@ -1137,29 +7913,61 @@ class MainWindow(QMainWindow):
         error = process.readAllStandardError().data().decode()
         self.console.append(output + '\n' + error)
 
+    @timedSlot
     def onFileClicked(self, index):
         if not self.fileSystemModel.isDir(index):
             fileName = self.fileSystemModel.filePath(index)
-            if fileName.endswith(('.exe', '.zip', '.class')):
-                QMessageBox.information(self, "Incompatible format", "This file type cannot be viewed in the IDE.")
-            else:
-                self.loadFile(fileName)
-                self.treeView.setRootIndex(self.fileSystemModel.index(self.projectPath))
+            self.loadFile(fileName)
+            self.treeView.setRootIndex(self.fileSystemModel.index(self.projectPath))
 
 
     def terminalKeyPressEvent(self, event):
         if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
-            command = self.terminal.toPlainText().splitlines()[-1]
-            if self.process and self.process.state() == QProcess.Running:
-                self.process.write((command + '\n').encode())
-                self.bottomTabWidget.setCurrentIndex(0)  # Switch to Output tab
-            else:
-                process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                output, error = process.communicate()
-                self.terminal.append(output.decode() + error.decode())
+            lines = self.terminal.toPlainText().splitlines()
+            command = lines[-1] if lines else ''
+            self.terminal.moveCursor(QTextCursor.End)
+            self.terminal.insertPlainText('\n')
+            if self.terminalProcess:
+                # Enquanto um comando roda, as linhas digitadas vão para a entrada dele
+                self.terminalProcess.write((command + '\n').encode())
+            elif command.strip():
+                self.startTerminalCommand(command)
         else:
             QTextEdit.keyPressEvent(self.terminal, event)
 
+    def startTerminalCommand(self, command):
+        # Assíncrono: um comando demorado não congela a interface
+        self.terminalDecoder = StreamDecoder()
+        self.terminalProcess = QProcess(self)
+        self.terminalProcess.setProcessChannelMode(QProcess.MergedChannels)
+        self.terminalProcess.readyReadStandardOutput.connect(self.readTerminalOutput)
+        self.terminalProcess.finished.connect(self.onTerminalCommandFinished)
+        self.terminalProcess.errorOccurred.connect(self.onTerminalCommandError)
+        if os.name == 'nt':
+            self.terminalProcess.start('cmd', ['/c', command])
+        else:
+            self.terminalProcess.start('/bin/sh', ['-c', command])
+
+    def readTerminalOutput(self):
+        text = self.terminalDecoder.decode(self.terminalProcess.readAllStandardOutput().data())
+        if text:
+            self.terminal.moveCursor(QTextCursor.End)
+            self.terminal.insertPlainText(text)
+            self.terminal.ensureCursorVisible()
+
+    def onTerminalCommandFinished(self, exit_code, exit_status):
+        self.readTerminalOutput()
+        if not self.terminal.toPlainText().endswith('\n'):
+            self.terminal.insertPlainText('\n')
+        self.terminalProcess.deleteLater()
+        self.terminalProcess = None
+
+    def onTerminalCommandError(self, error):
+        if error == QProcess.FailedToStart:
+            self.terminal.insertPlainText("Failed to start the shell.\n")
+            self.terminalProcess.deleteLater()
+            self.terminalProcess = None
+
     def showContextMenu(self, point: QPoint):
         index = self.treeView.indexAt(point)
         if index.isValid():
@@ -1170,6 +7978,14 @@ class MainWindow(QMainWindow):
             renameAction.triggered.connect(lambda: self.renameFile(index))
             contextMenu.addAction(deleteAction)
             contextMenu.addAction(renameAction)
+            if self.fileSystemModel.isDir(index):
+                galleryAction = QAction(QIcon('img/image.png'), 'Open as Gallery', self)
+                galleryAction.triggered.connect(lambda: self.openGallery(self.fileSystemModel.filePath(index)))
+                contextMenu.addAction(galleryAction)
+            else:
+                hexAction = QAction('Open in Hex Viewer', self)
+                hexAction.triggered.connect(lambda: self.loadFile(self.fileSystemModel.filePath(index), binary=True))
+                contextMenu.addAction(hexAction)
             contextMenu.exec_(self.treeView.mapToGlobal(point))
 
     def createFolder(self, parentIndex):
@@ -1250,14 +8066,28 @@ class MainWindow(QMainWindow):
                     return
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ScriptBliss IDE')
+    parser.add_argument('--lint', metavar='DIR', help='check the syntax of every supported file under DIR without opening the IDE')
+    parser.add_argument('--format', choices=['json', 'sarif'], default='json', help='output format for --lint (default: json)')
+    parser.add_argument('--output', metavar='FILE', help='write --lint results to FILE instead of stdout')
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes for --lint and --reformat (default: all cores)')
+    parser.add_argument('--no-cache', action='store_true', help='ignore the content-hash cache for --lint and --reformat')
+    parser.add_argument('--reformat', metavar='DIR', help='run the installed formatters (black, clang-format, prettier) over DIR in place')
+    args, qt_args = parser.parse_known_args()
+    if args.lint:
+        sys.exit(runLint(args))
+    if args.reformat:
+        sys.exit(runReformat(args))
+
     def exception_hook(exctype, value, traceback):
         print(exctype, value, traceback)
         sys._excepthook(exctype, value, traceback)
+        syncEditJournals()  # garante que as edições não salvas possam ser recuperadas
         sys.exit(1)
 
     sys._excepthook = sys.excepthook
     sys.excepthook = exception_hook
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     main = MainWindow()
     main.show()
     sys.exit(app.exec_())
\ No newline at end of file